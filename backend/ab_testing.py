@@ -10,6 +10,7 @@ No PII stored - only uses hashed wallet addresses for bucketing.
 
 import os
 import hashlib
+from functools import lru_cache
 from typing import Literal, Dict
 from datetime import datetime, timezone
 
@@ -22,6 +23,14 @@ CONTROL_FEE_PERCENT = 0.25  # M1 tier (Balanced)
 
 CohortType = Literal["tiered", "control"]
 
+WALLET_HASH_CACHE_SIZE = 8192  # recent wallets; each hash is computed once while hot
+
+@lru_cache(maxsize=WALLET_HASH_CACHE_SIZE)
+def wallet_hash(wallet_address: str) -> str:
+    """Pseudonymized wallet id used in logs and cohort events."""
+    return hashlib.sha256(wallet_address.encode()).hexdigest()[:16]
+
+@lru_cache(maxsize=WALLET_HASH_CACHE_SIZE)
 def get_user_cohort(wallet_address: str) -> CohortType:
     """
     Determine user cohort based on wallet address.
@@ -101,11 +110,8 @@ def log_cohort_event(wallet_address: str, cohort: CohortType, event_type: str,
     Returns:
         Log entry dict (ready for MongoDB)
     """
-    # Hash wallet for privacy
-    wallet_hash = hashlib.sha256(wallet_address.encode()).hexdigest()[:16]
-    
     return {
-        "wallet_hash": wallet_hash,
+        "wallet_hash": wallet_hash(wallet_address),  # hashed for privacy
         "cohort": cohort,
         "event_type": event_type,
         "amount_usd": amount_usd,
@@ -0,0 +1,298 @@
+"""
+Multi-Aggregator Best-Route Quoting
+===================================
+
+Queries several EVM swap aggregators (0x, KyberSwap) concurrently and returns
+the quote with the best output, for the frontend's BestRouteComparison and
+BestRouteBadge.
+
+- Adapters: pluggable objects with `name` and `async quote(...)` returning a
+  0x-shaped quote dict (buyAmount, minBuyAmount, transaction{to,data,value,gas},
+  issues.allowance.spender) - tests plug in local stand-ins
+- Deadline: the best quote among responders is returned once all adapters
+  answered or BEST_ROUTE_DEADLINE passed, whichever comes first
+- Hedging: when an adapter has not answered within its own p95 latency, a
+  duplicate request is sent and whichever finishes first wins
+
+All sell amounts are already net of the platform fee, so comparing buyAmount
+compares what the user actually receives.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from http_pool import http_pool
+from upstream_budget import PRIORITY_QUOTE
+
+logger = logging.getLogger(__name__)
+
+BEST_ROUTE_DEADLINE = float(os.getenv('BEST_ROUTE_DEADLINE', '3.0'))  # seconds
+BEST_ROUTE_SLIPPAGE_BPS = int(os.getenv('BEST_ROUTE_SLIPPAGE_BPS', '100'))
+HEDGE_MIN_DELAY = float(os.getenv('BEST_ROUTE_HEDGE_MIN_DELAY', '0.2'))  # never hedge earlier than this
+HEDGE_MIN_SAMPLES = 20  # latency samples before p95 is trusted
+LATENCY_WINDOW = 200
+
+KYBERSWAP_API_URL = os.getenv('KYBERSWAP_API_URL', 'https://aggregator-api.kyberswap.com')
+KYBERSWAP_CLIENT_ID = os.getenv('KYBERSWAP_CLIENT_ID', 'swaplaunch')
+NATIVE_TOKEN_ADDRESS = "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
+
+
+class AggregatorError(Exception):
+    """An aggregator returned no usable quote."""
+
+    def __init__(self, source: str, detail: str, status_code: int = 502):
+        super().__init__(f"{source}: {detail}")
+        self.source = source
+        self.detail = detail
+        self.status_code = status_code
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+
+class AggregatorAdapter:
+    """Base class for aggregator adapters."""
+
+    name = "aggregator"
+
+    async def quote(
+        self,
+        chain: str,
+        chain_id: int,
+        sell_token: str,
+        buy_token: str,
+        sell_amount: str,
+        taker: str
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class ZeroExAdapter(AggregatorAdapter):
+    """0x Swap API v2 (allowance-holder) - same request as /evm/quote."""
+
+    name = "0x"
+
+    def __init__(self, headers: Callable[[], Dict[str, str]], api_base: str = "https://api.0x.org"):
+        self._headers = headers
+        self.api_base = api_base
+
+    async def quote(self, chain, chain_id, sell_token, buy_token, sell_amount, taker):
+        async with http_pool.session("zerox", timeout=BEST_ROUTE_DEADLINE, priority=PRIORITY_QUOTE) as http_client:
+            response = await http_client.get(
+                f"{self.api_base}/swap/allowance-holder/quote",
+                params={
+                    "chainId": str(chain_id),
+                    "sellToken": sell_token,
+                    "buyToken": buy_token,
+                    "sellAmount": sell_amount,
+                    "taker": taker
+                },
+                headers=self._headers()
+            )
+        if response.status_code != 200:
+            raise AggregatorError(self.name, response.text, response.status_code)
+        data = response.json()
+        if not data.get("buyAmount") or not (data.get("transaction") or {}).get("data"):
+            raise AggregatorError(self.name, "no liquidity or missing transaction data")
+        return data
+
+
+class KyberSwapAdapter(AggregatorAdapter):
+    """KyberSwap Aggregator API v1 (route lookup + build), mapped to the 0x quote shape."""
+
+    name = "KyberSwap"
+
+    def __init__(self, api_url: str = KYBERSWAP_API_URL, client_id: str = KYBERSWAP_CLIENT_ID):
+        self.api_url = api_url.rstrip("/")
+        self.headers = {"x-client-id": client_id}
+
+    async def quote(self, chain, chain_id, sell_token, buy_token, sell_amount, taker):
+        async with http_pool.session("kyberswap", timeout=BEST_ROUTE_DEADLINE, priority=PRIORITY_QUOTE) as http_client:
+            response = await http_client.get(
+                f"{self.api_url}/{chain}/api/v1/routes",
+                params={"tokenIn": sell_token, "tokenOut": buy_token, "amountIn": sell_amount},
+                headers=self.headers
+            )
+            route = self._data(response)
+            response = await http_client.post(
+                f"{self.api_url}/{chain}/api/v1/route/build",
+                json={
+                    "routeSummary": route["routeSummary"],
+                    "sender": taker,
+                    "recipient": taker,
+                    "slippageTolerance": BEST_ROUTE_SLIPPAGE_BPS
+                },
+                headers=self.headers
+            )
+            built = self._data(response)
+
+        buy_amount = int(built["amountOut"])
+        router = built["routerAddress"]
+        quote = {
+            "sellToken": sell_token,
+            "buyToken": buy_token,
+            "sellAmount": built.get("amountIn", sell_amount),
+            "buyAmount": str(buy_amount),
+            "minBuyAmount": str(buy_amount * (10000 - BEST_ROUTE_SLIPPAGE_BPS) // 10000),
+            "transaction": {
+                "to": router,
+                "data": built["data"],
+                "value": built.get("transactionValue", "0"),
+                "gas": built.get("gas")
+            },
+            "issues": {"allowance": None}
+        }
+        if sell_token.lower() != NATIVE_TOKEN_ADDRESS:
+            quote["issues"]["allowance"] = {"spender": router}
+        return quote
+
+    def _data(self, response) -> Dict[str, Any]:
+        if response.status_code != 200:
+            raise AggregatorError(self.name, response.text, response.status_code)
+        body = response.json()
+        if body.get("code") != 0 or not body.get("data"):
+            raise AggregatorError(self.name, body.get("message", "no route"))
+        return body["data"]
+
+
+class BestRouteQuoter:
+    """Concurrent, deadline-bounded, hedged quoting across adapters."""
+
+    def __init__(self, adapters: List[AggregatorAdapter], deadline: float = BEST_ROUTE_DEADLINE):
+        self.adapters = adapters
+        self.deadline = deadline
+        self._latency: Dict[str, LatencyTracker] = {a.name: LatencyTracker() for a in adapters}
+
+        # Metrics
+        self.requests = 0
+        self.wins: Dict[str, int] = {a.name: 0 for a in adapters}
+        self.errors: Dict[str, int] = {a.name: 0 for a in adapters}
+        self.late: Dict[str, int] = {a.name: 0 for a in adapters}
+        self.hedges: Dict[str, int] = {a.name: 0 for a in adapters}
+        self.hedge_wins: Dict[str, int] = {a.name: 0 for a in adapters}
+
+    async def best_quote(self, **params) -> Dict[str, Any]:
+        """
+        Quote all adapters concurrently.
+
+        Returns:
+            {"best": quote, "source": name, "quotes": [{source, buyAmount, minBuyAmount, latencyMs, hedged}]}
+            with quotes sorted best first
+
+        Raises:
+            AggregatorError: no adapter returned a quote before the deadline
+        """
+        self.requests += 1
+        tasks = {asyncio.create_task(self._hedged(adapter, params)): adapter for adapter in self.adapters}
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+            self.late[tasks[task].name] += 1
+
+        results = []
+        errors = []
+        for task in done:
+            adapter = tasks[task]
+            try:
+                results.append(task.result())
+            except Exception as e:
+                self.errors[adapter.name] += 1
+                errors.append(e)
+                logger.warning(f"Best-route quote from {adapter.name} failed: {e}")
+
+        if not results:
+            status = next((e.status_code for e in errors if isinstance(e, AggregatorError)), 504)
+            raise AggregatorError("best-route", "no aggregator returned a quote in time", status)
+
+        results.sort(key=lambda r: int(r["quote"]["buyAmount"]), reverse=True)
+        best = results[0]
+        self.wins[best["source"]] += 1
+        return {
+            "best": best["quote"],
+            "source": best["source"],
+            "quotes": [
+                {
+                    "source": r["source"],
+                    "buyAmount": r["quote"]["buyAmount"],
+                    "minBuyAmount": r["quote"].get("minBuyAmount"),
+                    "latencyMs": r["latency_ms"],
+                    "hedged": r["hedged"]
+                }
+                for r in results
+            ]
+        }
+
+    async def _hedged(self, adapter: AggregatorAdapter, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call an adapter; send one duplicate if it is slower than its p95."""
+        tracker = self._latency[adapter.name]
+        start = time.monotonic()
+
+        async def attempt(hedged: bool) -> Dict[str, Any]:
+            attempt_start = time.monotonic()
+            quote = await adapter.quote(**params)
+            tracker.record(time.monotonic() - attempt_start)
+            return {"quote": quote, "hedged": hedged}
+
+        primary = asyncio.create_task(attempt(False))
+        attempts = {primary}
+        p95 = tracker.p95()
+        try:
+            if p95 is not None:
+                done, _ = await asyncio.wait(attempts, timeout=max(p95, HEDGE_MIN_DELAY))
+                if not done:
+                    self.hedges[adapter.name] += 1
+                    attempts.add(asyncio.create_task(attempt(True)))
+
+            error = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        result = task.result()
+                        if result["hedged"]:
+                            self.hedge_wins[adapter.name] += 1
+                        result["source"] = adapter.name
+                        result["latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+                        return result
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "deadline_seconds": self.deadline,
+            "adapters": {
+                a.name: {
+                    "wins": self.wins[a.name],
+                    "errors": self.errors[a.name],
+                    "late": self.late[a.name],
+                    "hedges": self.hedges[a.name],
+                    "hedge_wins": self.hedge_wins[a.name],
+                    "p95_ms": round(self._latency[a.name].p95() * 1000, 1) if self._latency[a.name].p95() else None
+                }
+                for a in self.adapters
+            }
+        }
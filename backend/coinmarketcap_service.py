@@ -3,7 +3,7 @@ CoinMarketCap API Service
 Replaces CoinGecko with CoinMarketCap Pro API
 """
 import os
-import httpx
+from http_pool import http_pool
 import logging
 from typing import Optional, Dict, List
 from datetime import datetime, timezone
@@ -29,7 +29,7 @@ class CoinMarketCapService:
         Get trending tokens (using CMC's latest listings)
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_pool.session("cmc", timeout=10.0) as client:
                 response = await client.get(
                     f"{self.base_url}/cryptocurrency/trending/latest",
                     headers=self.headers
@@ -49,7 +49,7 @@ class CoinMarketCapService:
         Get coin price data by symbol
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_pool.session("cmc", timeout=10.0) as client:
                 response = await client.get(
                     f"{self.base_url}/cryptocurrency/quotes/latest",
                     headers=self.headers,
@@ -82,7 +82,7 @@ class CoinMarketCapService:
         category: 'top', 'gainers', 'losers'
         """
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with http_pool.session("cmc", timeout=15.0) as client:
                 params = {
                     'limit': limit,
                     'convert': 'USD'
@@ -135,7 +135,7 @@ class CoinMarketCapService:
         Get detailed token metadata
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_pool.session("cmc", timeout=10.0) as client:
                 response = await client.get(
                     f"{self.base_url}/cryptocurrency/info",
                     headers=self.headers,
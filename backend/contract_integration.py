@@ -1,14 +1,23 @@
 """
 EVM Smart Contract Integration for Referral System
 Handles interaction with FeeTakingRouterV2 contract
+
+Contract reads are blocking web3 calls: they run in a worker thread with a
+timeout derived from the request's remaining deadline (see deadline), so a
+slow RPC neither blocks the event loop nor outlives the request.
 """
 import os
+import asyncio
 from web3 import Web3
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 import logging
 
+from deadline import timeout_for
+
 logger = logging.getLogger(__name__)
 
+ONCHAIN_CALL_TIMEOUT = float(os.getenv('ONCHAIN_CALL_TIMEOUT', '8'))  # seconds per contract read
+
 # Contract ABI for FeeTakingRouterV2 - key functions only
 ROUTER_V2_ABI = [
     {
@@ -96,15 +105,15 @@ CHAIN_CONTRACTS = {
     },
 }
 
-def get_web3_instance(chain_id: int) -> Optional[Web3]:
-    """Get Web3 instance for a specific chain"""
+def get_web3_instance(chain_id: int, timeout: float = ONCHAIN_CALL_TIMEOUT) -> Optional[Web3]:
+    """Get Web3 instance for a specific chain (RPC requests time out after `timeout` seconds)"""
     config = CHAIN_CONTRACTS.get(chain_id)
     if not config or not config['rpc']:
         logger.warning(f"No RPC configured for chain {chain_id}")
         return None
     
     try:
-        w3 = Web3(Web3.HTTPProvider(config['rpc']))
+        w3 = Web3(Web3.HTTPProvider(config['rpc'], request_kwargs={"timeout": timeout}))
         if not w3.is_connected():
             logger.error(f"Failed to connect to {config['name']} RPC")
             return None
@@ -140,6 +149,29 @@ def get_router_contract(chain_id: int, w3: Web3 = None):
         logger.error(f"Error creating contract instance for chain {chain_id}: {e}")
         return None
 
+async def read_router(chain_id: int, read: Callable[[Web3, Any], Any]) -> Any:
+    """
+    Run read(w3, router_contract) in a worker thread within the request deadline.
+    
+    Returns:
+        The read result, or None if the chain has no RPC/contract configured
+    
+    Raises:
+        TimeoutError (incl. DeadlineExceeded), or whatever the read raised
+    """
+    timeout = timeout_for(ONCHAIN_CALL_TIMEOUT, "on-chain read")
+    
+    def run():
+        w3 = get_web3_instance(chain_id, timeout)
+        if not w3:
+            return None
+        contract = get_router_contract(chain_id, w3)
+        if not contract:
+            return None
+        return read(w3, contract)
+    
+    return await asyncio.wait_for(asyncio.to_thread(run), timeout)
+
 async def check_referral_on_chain(wallet_address: str, chain_id: int) -> Dict[str, Any]:
     """
     Check if wallet has a referrer registered on-chain
@@ -152,17 +184,12 @@ async def check_referral_on_chain(wallet_address: str, chain_id: int) -> Dict[st
         }
     """
     try:
-        w3 = get_web3_instance(chain_id)
-        if not w3:
-            return {'has_referrer': False, 'referrer': None, 'chain': CHAIN_CONTRACTS.get(chain_id, {}).get('name', 'unknown')}
-        
-        contract = get_router_contract(chain_id, w3)
-        if not contract:
-            return {'has_referrer': False, 'referrer': None, 'chain': CHAIN_CONTRACTS.get(chain_id, {}).get('name', 'unknown')}
-        
         # Call getReferralInfo
         checksum_address = Web3.to_checksum_address(wallet_address)
-        referrer, has_referrer = contract.functions.getReferralInfo(checksum_address).call()
+        info = await read_router(chain_id, lambda w3, contract: contract.functions.getReferralInfo(checksum_address).call())
+        if info is None:
+            return {'has_referrer': False, 'referrer': None, 'chain': CHAIN_CONTRACTS.get(chain_id, {}).get('name', 'unknown')}
+        referrer, has_referrer = info
         
         return {
             'has_referrer': has_referrer,
@@ -185,20 +212,15 @@ async def get_referrer_stats_on_chain(wallet_address: str, chain_id: int) -> Dic
         }
     """
     try:
-        w3 = get_web3_instance(chain_id)
-        if not w3:
-            return {'referral_count': 0, 'total_rewards': 0, 'chain': CHAIN_CONTRACTS.get(chain_id, {}).get('name', 'unknown')}
-        
-        contract = get_router_contract(chain_id, w3)
-        if not contract:
-            return {'referral_count': 0, 'total_rewards': 0, 'chain': CHAIN_CONTRACTS.get(chain_id, {}).get('name', 'unknown')}
-        
         # Call getReferrerStats
         checksum_address = Web3.to_checksum_address(wallet_address)
-        count, total_rewards = contract.functions.getReferrerStats(checksum_address).call()
+        stats = await read_router(chain_id, lambda w3, contract: contract.functions.getReferrerStats(checksum_address).call())
+        if stats is None:
+            return {'referral_count': 0, 'total_rewards': 0, 'chain': CHAIN_CONTRACTS.get(chain_id, {}).get('name', 'unknown')}
+        count, total_rewards = stats
         
         # Convert wei to ETH/BNB/MATIC
-        total_rewards_native = w3.from_wei(total_rewards, 'ether')
+        total_rewards_native = Web3.from_wei(total_rewards, 'ether')
         
         return {
             'referral_count': count,
@@ -224,8 +246,11 @@ async def get_all_chain_referrer_stats(wallet_address: str) -> Dict[str, Any]:
     results = []
     total_referrals = 0
     
-    for chain_id in CHAIN_CONTRACTS.keys():
-        stats = await get_referrer_stats_on_chain(wallet_address, chain_id)
+    # All chains concurrently, each bounded by the same request deadline
+    all_stats = await asyncio.gather(*(
+        get_referrer_stats_on_chain(wallet_address, chain_id) for chain_id in CHAIN_CONTRACTS.keys()
+    ))
+    for stats in all_stats:
         if stats.get('referral_count', 0) > 0 or stats.get('total_rewards', 0) > 0:
             results.append(stats)
             total_referrals += stats.get('referral_count', 0)
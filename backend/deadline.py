@@ -0,0 +1,211 @@
+"""
+Per-Request Deadlines
+=====================
+
+Every API request gets a deadline: the client's `X-Request-Timeout-Ms`
+header or the endpoint default, whichever is shorter. Upstream HTTP calls,
+Mongo queries (maxTimeMS) and on-chain reads derive their timeout from the
+time remaining instead of a fixed per-call-site value, so a client that gives
+up after 3 seconds does not leave a 30-second upstream call behind.
+
+- The deadline lives in a context variable set by DeadlineMiddleware and is
+  inherited by every task the request spawns
+- timeout_for(default) -> min(default, remaining); raises DeadlineExceeded
+  once the budget is spent
+- DeadlineMiddleware also cancels the handler when the deadline passes (504)
+  or the client disconnects (work stops; nothing is sent)
+
+Work shared with other requests (single-flight fetches, background refreshes)
+runs in its own task and is only cancelled once nobody waits for it.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEADLINE_HEADER = "x-request-timeout-ms"
+REQUEST_DEADLINE_DEFAULT = float(os.getenv('REQUEST_DEADLINE_DEFAULT', '30'))  # seconds
+REQUEST_DEADLINE_MIN = 0.05  # below this nothing useful fits - fail fast
+
+# Endpoint defaults by path prefix (longest match wins); streaming endpoints have none
+ENDPOINT_DEADLINES: Dict[str, Optional[float]] = {
+    "/api/evm/quote": float(os.getenv('REQUEST_DEADLINE_QUOTE', '15')),
+    "/api/evm/price": float(os.getenv('REQUEST_DEADLINE_PRICE', '8')),
+    "/api/solana/quote": float(os.getenv('REQUEST_DEADLINE_QUOTE', '15')),
+    "/api/token/resolve": float(os.getenv('REQUEST_DEADLINE_DISCOVERY', '10')),
+    "/api/referral": float(os.getenv('REQUEST_DEADLINE_REFERRAL', '10')),
+    "/api/quote/stream": None,
+    "/api/quote/ws": None,
+    "/api/pump/stream": None,
+    "/api/pump/ws": None
+}
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Metrics (reported by /api/health)
+_counters = {"exceeded": 0, "cancelled_on_disconnect": 0}
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget is spent."""
+
+    def __init__(self, what: str = "request"):
+        super().__init__(f"Deadline exceeded before {what}")
+        self.what = what
+
+
+def remaining() -> Optional[float]:
+    """Seconds left for the current request, None outside a deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout_for(default: float, what: str = "upstream call") -> float:
+    """
+    Timeout for one operation: its default, capped by the remaining budget.
+
+    Raises:
+        DeadlineExceeded: less than REQUEST_DEADLINE_MIN seconds left
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left < REQUEST_DEADLINE_MIN:
+        raise DeadlineExceeded(what)
+    return min(default, left)
+
+
+def max_time_ms(default: float = REQUEST_DEADLINE_DEFAULT) -> int:
+    """Mongo maxTimeMS for a query in the current request."""
+    return max(1, int(timeout_for(default, "database query") * 1000))
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """Run a block under a deadline `seconds` from now (None = no deadline)."""
+    token = _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def detached(fn: Callable[[], Awaitable[T]]) -> Callable[[], Awaitable[T]]:
+    """
+    Coroutine factory running fn() without the caller's deadline - for work
+    shared with other requests (single-flight fetches), which keeps its own
+    per-call timeouts and is cancelled only when its last waiter leaves.
+    """
+    async def run() -> T:
+        with deadline_scope(None):
+            return await fn()
+    return run
+
+
+def request_deadline(path: str, header_value: Optional[str]) -> Optional[float]:
+    """Seconds allowed for a request: header and endpoint default, whichever is shorter."""
+    matches = [prefix for prefix in ENDPOINT_DEADLINES if path.startswith(prefix)]
+    seconds = ENDPOINT_DEADLINES[max(matches, key=len)] if matches else REQUEST_DEADLINE_DEFAULT
+    if seconds is None:
+        return None
+    if header_value:
+        try:
+            requested = float(header_value) / 1000
+        except ValueError:
+            requested = None
+        if requested is not None and requested > 0:
+            seconds = min(seconds, requested)
+    return seconds
+
+
+class DeadlineMiddleware:
+    """
+    ASGI middleware: applies the request deadline and cancels the handler on
+    expiry (504 unless a response already started) or client disconnect.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        header_value = headers.get(DEADLINE_HEADER.encode())
+        seconds = request_deadline(scope.get("path", ""), header_value.decode() if header_value else None)
+        if seconds is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"started": False, "complete": False, "disconnected": False}
+        messages: asyncio.Queue = asyncio.Queue()
+
+        async def tracked_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                state["started"] = True
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                state["complete"] = True
+            await send(message)
+
+        async def app_receive() -> Dict[str, Any]:
+            message = await messages.get()
+            if message["type"] == "http.disconnect":
+                messages.put_nowait(message)  # every later receive sees it too
+            return message
+
+        with deadline_scope(seconds):
+            handler = asyncio.create_task(self.app(scope, app_receive, tracked_send))
+
+        async def watch_client() -> None:
+            # Sole reader of the server's receive channel, relaying to the app
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not state["complete"] and not handler.done():
+                        state["disconnected"] = True
+                        _counters["cancelled_on_disconnect"] += 1
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch_client())
+        try:
+            await asyncio.wait_for(asyncio.shield(handler), timeout=seconds)
+        except asyncio.TimeoutError:
+            handler.cancel()
+            await asyncio.gather(handler, return_exceptions=True)
+            _counters["exceeded"] += 1
+            logger.warning(f"Request deadline ({seconds:.1f}s) exceeded: {scope.get('method')} {scope.get('path')}")
+            if not state["started"]:
+                await send({
+                    "type": "http.response.start",
+                    "status": 504,
+                    "headers": [(b"content-type", b"application/json")]
+                })
+                await send({"type": "http.response.body", "body": b'{"detail":"Request deadline exceeded"}'})
+        except asyncio.CancelledError:
+            if state["disconnected"] and handler.cancelled():
+                return  # client went away: nothing left to answer
+            handler.cancel()
+            raise
+        finally:
+            watcher.cancel()
+
+
+def deadline_stats() -> Dict[str, Any]:
+    return {
+        "default_seconds": REQUEST_DEADLINE_DEFAULT,
+        **_counters
+    }
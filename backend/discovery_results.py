@@ -0,0 +1,62 @@
+"""
+Merged Discovery Results
+========================
+
+/token/resolve merges several sources (Dexscreener search, the Jupiter token
+list). A source can be skipped without answering, for example:
+
+- the request deadline or the client timeout ran out
+- its circuit is open or its bulkhead is full (UpstreamUnavailable)
+- the upstream budget shed the discovery call (BudgetExhausted)
+
+The merged list is then incomplete. It must not replace the cached result in
+the local or the shared tier, because a blank list would be served to every
+instance for the whole cache TTL. Instead:
+
+- the last known result, within the local tier's stale grace, is served
+- without one, the incomplete list goes out marked "partial" and uncached
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from deadline import DeadlineExceeded
+from json_bytes import EncodedJSON, decoded
+from resilience import UpstreamUnavailable
+from shared_cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+# BudgetExhausted is an UpstreamUnavailable
+SKIPPED_SOURCE_ERRORS = (DeadlineExceeded, UpstreamUnavailable, httpx.TimeoutException)
+
+
+def source_skipped(error: BaseException) -> bool:
+    """True if a source failed without answering (deadline, timeout, circuit, bulkhead, budget)."""
+    return isinstance(error, SKIPPED_SOURCE_ERRORS)
+
+
+def stale_result(cache: TieredCache, cache_key: str) -> Optional[Dict[str, Any]]:
+    """Last known result for `cache_key` (within the stale grace), annotated with its age."""
+    stale = cache.local.get_stale(cache_key)
+    if stale is None:
+        return None
+    value, age = stale
+    logger.warning(f"Serving stale discovery data for {cache_key} ({age:.0f}s old)")
+    return {**decoded(value), "cacheAgeSeconds": round(age, 1), "stale": True}
+
+
+async def finish_result(cache: TieredCache, cache_key: str, result: Dict[str, Any], incomplete: bool, ttl: float) -> Any:
+    """
+    Cache and return a merged result or, if a source was skipped, fall back.
+
+    Returns:
+        EncodedJSON of the cached result, or a dict (stale or partial result)
+    """
+    if incomplete:
+        return stale_result(cache, cache_key) or {**result, "partial": True}
+    encoded = EncodedJSON.encode(result)
+    await cache.set(cache_key, encoded, ttl=ttl)
+    return encoded
@@ -20,7 +20,7 @@ Security:
 
 import os
 import asyncio
-import httpx
+from http_pool import http_pool
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -121,7 +121,7 @@ class EmailService:
             "Content-Type": "application/json"
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_pool.session("email", timeout=30.0) as client:
             response = await client.post(url, json=payload, headers=headers)
             
             if response.status_code in [200, 202]:
@@ -177,7 +177,7 @@ class EmailService:
             "html": html_body
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_pool.session("email", timeout=30.0) as client:
             response = await client.post(
                 url,
                 auth=("api", self.api_key),
@@ -236,7 +236,7 @@ class EmailService:
                 "timestamp": datetime.utcnow().isoformat()
             }
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_pool.session("email", timeout=10.0) as client:
                 response = await client.post(ALERT_WEBHOOK_URL, json=payload)
                 
                 if response.status_code == 200:
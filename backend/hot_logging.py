@@ -0,0 +1,205 @@
+"""
+Hot-Path Logging
+================
+
+Every quote used to emit several eagerly formatted f-string log lines,
+written synchronously to stdout from the event loop. This module keeps the
+quote path's logging cheap:
+
+- Async handler: records go through a QueueHandler to a QueueListener
+  thread, which formats and writes them - the loop only enqueues (records
+  are dropped and counted when the queue is full, never blocking)
+- Lazy formatting: log_event() stores the event name and fields; the line
+  is rendered by the listener, and only if the record is kept
+- Sampling: per-event rates (e.g. 1% of cache hits) are checked before
+  anything is built
+- Structured mode: LOG_FORMAT=json writes one JSON object per line with the
+  event fields as keys
+
+Plain logger.info(...) calls elsewhere go through the same queue unchanged.
+
+ENV:
+- LOG_LEVEL (INFO), LOG_FORMAT (text | json)
+- LOG_ASYNC (true) / LOG_QUEUE_SIZE (10000)
+- LOG_SAMPLE_RATES: "event=rate,..." overriding DEFAULT_SAMPLE_RATES
+"""
+
+import os
+import sys
+import atexit
+import queue
+import random
+import logging
+from collections import defaultdict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from json_bytes import dumps
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Fraction of each event kept; events not listed are always logged
+DEFAULT_SAMPLE_RATES: Dict[str, float] = {
+    "quote.cache": 0.01,     # cache hits / stale serves
+    "quote.fee": 0.1,        # tier decision per quote
+    "quote.upstream": 0.1,   # upstream request / status lines
+}
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "event=rate,..." (rates clamped to 0..1; malformed entries skipped)."""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+SAMPLE_RATES: Dict[str, float] = {
+    **DEFAULT_SAMPLE_RATES,
+    **parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', ''))
+}
+
+# Metrics (reported by /api/health)
+_sampled_out: Dict[str, int] = defaultdict(int)
+_state: Dict[str, Any] = {"handler": None, "format": LOG_FORMAT}
+
+
+class Event:
+    """Log message for a structured event, rendered only when formatted."""
+
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name: str, fields: Dict[str, Any]):
+        self.name = name
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join([self.name, *(f"{key}={value}" for key, value in self.fields.items())])
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields: Any) -> None:
+    """
+    Log a hot-path event, subject to its sample rate.
+
+    Field values are stored as passed and rendered later on the listener
+    thread, so pass values that are not mutated afterwards.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = SAMPLE_RATES.get(event, 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        _sampled_out[event] += 1
+        return
+    if rate < 1.0:
+        fields["sample_rate"] = rate
+    logger.log(level, Event(event, fields))
+
+
+def _plain(value: Any) -> Any:
+    return value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record; event fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name
+        }
+        if isinstance(record.msg, Event):
+            entry["event"] = record.msg.name
+            for key, value in record.msg.fields.items():
+                entry[key] = _plain(value)
+        else:
+            entry["msg"] = record.getMessage()
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return dumps(entry).decode()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the caller and defers formatting.
+
+    The stock handler formats each record before enqueueing it (on the event
+    loop); records are passed through as-is here and formatted by the
+    listener's handler instead.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stop_listener(listener: QueueListener) -> None:
+    # stop() is not idempotent before Python 3.12
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    use_queue: bool = LOG_ASYNC,
+    stream: Any = None
+) -> Optional[QueueListener]:
+    """
+    Configure the root logger (replaces logging.basicConfig).
+
+    Returns:
+        The running QueueListener (stopped at exit), or None when records
+        are written synchronously
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JSONFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    _state["format"] = fmt
+
+    if not use_queue:
+        root.addHandler(output)
+        _state["handler"] = None
+        return None
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    root.addHandler(handler)
+    listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop_listener, listener)  # flushes what is still queued
+    _state["handler"] = handler
+    return listener
+
+
+def logging_stats() -> Dict[str, Any]:
+    handler: Optional[DroppingQueueHandler] = _state["handler"]
+    return {
+        "format": _state["format"],
+        "async": handler is not None,
+        "queue_depth": handler.queue.qsize() if handler else 0,
+        "dropped": handler.dropped if handler else 0,
+        "sample_rates": SAMPLE_RATES,
+        "sampled_out": dict(_sampled_out)
+    }
@@ -0,0 +1,348 @@
+"""
+Upstream HTTP Client Pool
+=========================
+
+Process-wide registry of pooled httpx clients, one per upstream API
+(0x, KyberSwap, Jupiter, Dexscreener, CoinGecko, CoinMarketCap, mail providers).
+
+Each upstream keeps its own keep-alive connection pool, so a quote no longer
+pays a fresh TCP+TLS handshake to api.0x.org or Jupiter. HTTP/2 is negotiated
+via ALPN where the host supports it (requires the optional `h2` package).
+
+Lifecycle:
+- start(): create clients and warm connections (server startup)
+- close(): close all pools (server shutdown)
+
+Clients are also created lazily on first use, so CLI tools that never call
+start() (e.g. weekly_report_cli) work unchanged.
+
+Every request goes through the upstream's guard (see resilience): a bulkhead
+capping concurrent calls and a circuit breaker that fails fast while the
+upstream is erroring or slow.
+
+Pool limits are tunable via ENV:
+- HTTP_POOL_MAX_CONNECTIONS / HTTP_POOL_MAX_KEEPALIVE / HTTP_POOL_KEEPALIVE_EXPIRY
+- HTTP_POOL_<UPSTREAM>_MAX_CONNECTIONS / HTTP_POOL_<UPSTREAM>_MAX_KEEPALIVE
+- HTTP_POOL_<UPSTREAM>_MAX_CONCURRENT (bulkhead size)
+
+Upstreams with a "budget" (requests/second, burst) draw a token per request
+from their UpstreamBudget first (see upstream_budget); "priority" is the
+default queue priority for the upstream's callers.
+
+Inside an API request the per-call timeout is capped by the request's
+remaining deadline (see deadline).
+"""
+
+import os
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+import httpx
+
+from resilience import UpstreamGuard
+from deadline import timeout_for
+from upstream_budget import (
+    UpstreamBudget,
+    parse_retry_after,
+    PRIORITY_NORMAL,
+    PRIORITY_DISCOVERY,
+    PRIORITY_BACKGROUND
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Pool configuration
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv('HTTP_POOL_MAX_CONNECTIONS', '100'))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv('HTTP_POOL_MAX_KEEPALIVE', '20'))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_POOL_KEEPALIVE_EXPIRY', '60'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true'
+WARM_TIMEOUT = 5.0  # seconds
+
+# Upstream configuration
+UPSTREAMS: Dict[str, Dict[str, Any]] = {
+    "zerox": {
+        "base_url": "https://api.0x.org",
+        "timeout": 30.0,
+        "warm": True,
+        "max_concurrent": 50,
+        "budget": None,
+        "priority": PRIORITY_NORMAL
+    },
+    "jupiter": {
+        "base_url": os.environ.get('JUPITER_API_URL'),
+        "timeout": 30.0,
+        "warm": True,
+        "max_concurrent": 50,
+        "budget": None,
+        "priority": PRIORITY_NORMAL
+    },
+    "kyberswap": {  # best-route quotes (see aggregators)
+        "base_url": "https://aggregator-api.kyberswap.com",
+        "timeout": 10.0,
+        "warm": True,
+        "max_concurrent": 50,
+        "budget": None,
+        "priority": PRIORITY_NORMAL
+    },
+    "jupiter_tokens": {
+        "base_url": "https://token.jup.ag",
+        "timeout": 10.0,
+        "warm": False,
+        "max_concurrent": 5,
+        "budget": (1.0, 5),
+        "priority": PRIORITY_DISCOVERY
+    },
+    "dexscreener": {
+        "base_url": "https://api.dexscreener.com",
+        "timeout": 10.0,
+        "warm": True,
+        "max_concurrent": 10,
+        "budget": (5.0, 20),  # 300 calls/min (search/pairs)
+        "priority": PRIORITY_DISCOVERY
+    },
+    "coingecko": {
+        "base_url": "https://api.coingecko.com",
+        "timeout": 10.0,
+        "warm": True,
+        "max_concurrent": 5,
+        "budget": (0.5, 10),  # free tier ~30 calls/min
+        "priority": PRIORITY_NORMAL
+    },
+    "cmc": {
+        "base_url": "https://pro-api.coinmarketcap.com",
+        "timeout": 10.0,
+        "warm": True,
+        "max_concurrent": 5,
+        "budget": (0.5, 10),  # Basic plan ~30 calls/min
+        "priority": PRIORITY_DISCOVERY
+    },
+    "jupiter_price": {
+        "base_url": "https://lite-api.jup.ag",
+        "timeout": 10.0,
+        "warm": True,
+        "max_concurrent": 5,
+        "budget": (1.0, 10),  # lite-api
+        "priority": PRIORITY_BACKGROUND
+    },
+    "solana_rpc": {  # RPC_SOLANA (mint decimals)
+        "base_url": None,
+        "timeout": 10.0,
+        "warm": False,
+        "max_concurrent": 10,
+        "budget": None,
+        "priority": PRIORITY_BACKGROUND
+    },
+    "evm_rpc": {  # JSON-RPC endpoints from RPC_* (token metadata)
+        "base_url": None,
+        "timeout": 10.0,
+        "warm": False,
+        "max_concurrent": 10,
+        "budget": None,
+        "priority": PRIORITY_BACKGROUND
+    },
+    "email": {  # SendGrid / Mailgun / alert webhooks
+        "base_url": None,
+        "timeout": 30.0,
+        "warm": False,
+        "max_concurrent": 5,
+        "budget": None,
+        "priority": PRIORITY_NORMAL
+    }
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Invalid {name}={value!r}, using {default}")
+        return default
+
+
+def get_pool_limits(upstream: str) -> httpx.Limits:
+    """Connection pool limits for an upstream (global defaults + per-upstream ENV override)."""
+    prefix = f"HTTP_POOL_{upstream.upper()}"
+    return httpx.Limits(
+        max_connections=_env_int(f"{prefix}_MAX_CONNECTIONS", HTTP_POOL_MAX_CONNECTIONS),
+        max_keepalive_connections=_env_int(f"{prefix}_MAX_KEEPALIVE", HTTP_POOL_MAX_KEEPALIVE),
+        keepalive_expiry=HTTP_POOL_KEEPALIVE_EXPIRY
+    )
+
+
+class UpstreamSession:
+    """
+    Thin handle on a pooled upstream client.
+
+    Supports `async with` so call sites read like the per-request clients they
+    replace - but leaving the block does NOT close the pooled connection.
+    """
+
+    def __init__(self, pool: "HTTPClientPool", upstream: str, timeout: Optional[float] = None, priority: Optional[int] = None):
+        self._pool = pool
+        self.upstream = upstream
+        self.timeout = timeout if timeout is not None else pool.config(upstream).get("timeout", 30.0)
+        self.priority = priority if priority is not None else pool.config(upstream).get("priority", PRIORITY_NORMAL)
+
+    async def __aenter__(self) -> "UpstreamSession":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the upstream's budget, bulkhead and circuit breaker
+        (may raise UpstreamUnavailable).
+        """
+        client = self._pool.client(self.upstream)
+        budget = self._pool.budget(self.upstream)
+        if budget is not None:
+            await budget.acquire(self.priority)
+        # After any budget wait, before the guard (an expired deadline is not an upstream failure)
+        timeout = kwargs.get("timeout", self.timeout)
+        capped = False
+        if isinstance(timeout, (int, float)):
+            kwargs["timeout"] = timeout_for(timeout, f"{self.upstream} request")
+            capped = kwargs["timeout"] < timeout
+        async with self._pool.guard(self.upstream).slot() as record:
+            self._pool.record_request(self.upstream)
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TimeoutException:
+                if capped:
+                    record(None)  # the caller's deadline ran out, not the upstream's patience
+                raise
+            record(response.status_code < 500 and response.status_code != 429)
+        if response.status_code == 429 and budget is not None:
+            budget.throttle(parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+
+class HTTPClientPool:
+    """Registry of one pooled httpx.AsyncClient per upstream."""
+
+    def __init__(self, upstreams: Dict[str, Dict[str, Any]]):
+        self._upstreams = upstreams
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._guards: Dict[str, UpstreamGuard] = {}
+        self._budgets: Dict[str, Optional[UpstreamBudget]] = {}
+        self._request_counts: Dict[str, int] = {}
+        self.http2 = HTTP2_ENABLED and HTTP2_AVAILABLE
+
+        if HTTP2_ENABLED and not HTTP2_AVAILABLE:
+            logger.warning("h2 not installed - upstream clients use HTTP/1.1. Install with: pip install h2")
+
+    def config(self, upstream: str) -> Dict[str, Any]:
+        return self._upstreams.get(upstream, {})
+
+    def client(self, upstream: str) -> httpx.AsyncClient:
+        """Get (or lazily create) the pooled client for an upstream."""
+        client = self._clients.get(upstream)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=get_pool_limits(upstream),
+                timeout=self.config(upstream).get("timeout", 30.0)
+            )
+            self._clients[upstream] = client
+        return client
+
+    def guard(self, upstream: str) -> UpstreamGuard:
+        """Get (or lazily create) the bulkhead/circuit breaker for an upstream."""
+        guard = self._guards.get(upstream)
+        if guard is None:
+            max_concurrent = _env_int(
+                f"HTTP_POOL_{upstream.upper()}_MAX_CONCURRENT",
+                self.config(upstream).get("max_concurrent", HTTP_POOL_MAX_CONNECTIONS)
+            )
+            guard = UpstreamGuard(upstream, max_concurrent)
+            self._guards[upstream] = guard
+        return guard
+
+    def budget(self, upstream: str) -> Optional[UpstreamBudget]:
+        """Get (or lazily create) the request budget for an upstream; None if unlimited."""
+        if upstream not in self._budgets:
+            rate, burst = self.config(upstream).get("budget") or (0.0, 0)
+            prefix = f"UPSTREAM_BUDGET_{upstream.upper()}"
+            rate = float(os.getenv(f"{prefix}_RATE", rate))
+            burst = _env_int(f"{prefix}_BURST", burst or max(1, int(rate)))
+            self._budgets[upstream] = UpstreamBudget(upstream, rate, burst) if rate > 0 else None
+        return self._budgets[upstream]
+
+    def session(self, upstream: str, timeout: Optional[float] = None, priority: Optional[int] = None) -> UpstreamSession:
+        """
+        Get a request handle bound to an upstream's pool, optionally with its own
+        default timeout and budget priority (see upstream_budget).
+        """
+        return UpstreamSession(self, upstream, timeout, priority)
+
+    def record_request(self, upstream: str) -> None:
+        self._request_counts[upstream] = self._request_counts.get(upstream, 0) + 1
+
+    async def start(self) -> None:
+        """Create clients for all configured upstreams and warm their connections in the background."""
+        for upstream in self._upstreams:
+            self.client(upstream)
+        asyncio.create_task(self.warm())
+        logger.info(f"HTTP client pool started ({len(self._clients)} upstreams, http2={self.http2})")
+
+    async def warm(self) -> None:
+        """Open one keep-alive connection per warmable upstream so the first quote skips the handshake."""
+        async def _warm_one(upstream: str, base_url: str):
+            try:
+                await self.client(upstream).head(base_url, timeout=WARM_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Failed to warm {upstream} connection: {e}")
+
+        targets = [
+            (upstream, config["base_url"])
+            for upstream, config in self._upstreams.items()
+            if config.get("warm") and config.get("base_url")
+        ]
+        await asyncio.gather(*(_warm_one(upstream, url) for upstream, url in targets))
+        logger.info(f"Warmed {len(targets)} upstream connections")
+
+    async def close(self) -> None:
+        """Close all pooled clients."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client: {e}")
+        logger.info("HTTP client pool closed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "upstreams": {
+                upstream: {
+                    "open": upstream in self._clients and not self._clients[upstream].is_closed,
+                    "requests": self._request_counts.get(upstream, 0),
+                    **self.guard(upstream).stats(),
+                    "budget": self.budget(upstream).stats() if self.budget(upstream) else None
+                }
+                for upstream in self._upstreams
+            }
+        }
+
+
+# Global instance
+http_pool = HTTPClientPool(UPSTREAMS)
@@ -0,0 +1,134 @@
+"""
+Bounded Ingest Queue with Merging
+=================================
+
+Decouples a WebSocket receive loop from slower handlers: the receiver only
+timestamps and enqueues raw messages, and a pool of workers drains the queue.
+
+Below `maxsize` messages are queued unparsed. Once the queue is full the
+receiver still never waits (waiting would back-pressure the socket until
+the server drops the connection); instead each message is parsed and, if
+`merge_key` gives it a key (e.g. trades of one mint), it replaces the
+message already queued under that key. Messages without a key (e.g. new
+tokens, migrations) and first messages of a new key are still queued, so
+between `maxsize` and `hard_limit` the queue grows with distinct keys and
+rare events, not with messages, and nothing is lost.
+
+`hard_limit` bounds memory when even that grows (a burst across many
+distinct keys): at the hard limit a message that cannot merge is dropped
+and counted in `dropped`.
+
+Each item keeps the time its oldest merged message arrived, so lag measured
+from it is end-to-end.
+"""
+
+import time
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class IngestItem:
+    """A queued message (raw, or parsed if it went through merge_key)."""
+
+    __slots__ = ("message", "received_at", "key", "merged")
+
+    def __init__(self, message: Any, received_at: float, key: Optional[str] = None):
+        self.message = message
+        self.received_at = received_at
+        self.key = key
+        self.merged = 0
+
+
+class IngestQueue:
+    """FIFO of received messages; at capacity, messages sharing a merge key collapse."""
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        merge_key: Callable[[Any], Tuple[Any, Optional[str]]],
+        hard_limit: Optional[int] = None
+    ):
+        """
+        Args:
+            maxsize: Messages queued before merging starts
+            merge_key: Maps a raw message to (parsed message, key or None);
+                only called at capacity
+            hard_limit: Items queued before unmergeable messages are dropped
+                (default 4 x maxsize)
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.hard_limit = hard_limit if hard_limit is not None else maxsize * 4
+        self.merge_key = merge_key
+
+        self._items: Deque[IngestItem] = deque()
+        self._slots: Dict[str, IngestItem] = {}  # merge key -> queued item
+        self._ready = asyncio.Event()
+
+        # Metrics
+        self.enqueued = 0
+        self.merged = 0
+        self.over_capacity = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, message: Any) -> bool:
+        """
+        Enqueue a message without waiting (merging it at capacity).
+
+        Returns:
+            False if the message was dropped at the hard limit
+        """
+        now = time.monotonic()
+        self.enqueued += 1
+        if len(self._items) < self.maxsize:
+            item = IngestItem(message, now)
+        else:
+            parsed, key = self.merge_key(message)
+            slot = self._slots.get(key) if key is not None else None
+            if slot is not None:
+                slot.message = parsed
+                slot.merged += 1
+                self.merged += 1
+                return True
+            if len(self._items) >= self.hard_limit:
+                self.dropped += 1
+                return False
+            item = IngestItem(parsed, now, key)
+            if key is not None:
+                self._slots[key] = item
+            self.over_capacity += 1
+
+        self._items.append(item)
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._ready.set()
+        return True
+
+    async def get(self) -> IngestItem:
+        """Next item, waiting while the queue is empty."""
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        item = self._items.popleft()
+        if item.key is not None and self._slots.get(item.key) is item:
+            del self._slots[item.key]
+        return item
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, Any]:
+        oldest = self._items[0].received_at if self._items else None
+        return {
+            "depth": len(self._items),
+            "maxsize": self.maxsize,
+            "hard_limit": self.hard_limit,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "merged": self.merged,
+            "over_capacity": self.over_capacity,
+            "dropped": self.dropped,
+            "oldest_age_ms": round((time.monotonic() - oldest) * 1000, 1) if oldest is not None else None
+        }
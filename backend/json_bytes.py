@@ -0,0 +1,85 @@
+"""
+Pre-Encoded JSON Cache Values
+=============================
+
+Cached quote and discovery responses are stored as the JSON bytes of the
+response body, encoded once when the entry is written. A cache hit is then
+sent as-is (see cached_response in server.py) instead of running FastAPI's
+jsonable_encoder + json.dumps over a multi-KB 0x payload on every request.
+
+- orjson when installed, stdlib json otherwise (same compact output)
+- EncodedJSON keeps only the bytes; `.data` decodes on demand for the few
+  callers that need the dict (batch items, stale annotations)
+- The shared cache tier stores the bytes unchanged, so a shared hit needs
+  no re-encoding either
+- Projections (e.g. the quote preview view) are encoded once per entry and
+  kept alongside it
+"""
+
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+    loads = orjson.loads
+except ImportError:
+    import json
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+
+MAX_PROJECTIONS = 4  # memoized projections per entry; others are computed per call
+
+
+class EncodedJSON:
+    """A JSON response body encoded once, for caches that serve it many times."""
+
+    __slots__ = ("body", "_projections")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._projections: Optional[Dict[str, "EncodedJSON"]] = None
+
+    @classmethod
+    def encode(cls, value: Any) -> "EncodedJSON":
+        """Encode a JSON-compatible value (raises TypeError if it is not)."""
+        return cls(dumps(value))
+
+    @property
+    def data(self) -> Any:
+        """Decoded value - a fresh copy on every access."""
+        return loads(self.body)
+
+    def projected(self, key: str, project: Callable[[Any], Any]) -> "EncodedJSON":
+        """
+        Encoded projection of this value, memoized under `key`.
+
+        Args:
+            key: Identifies the projection (e.g. the field list)
+            project: Maps the decoded value to the projected value
+        """
+        if self._projections is not None and key in self._projections:
+            return self._projections[key]
+        projection = EncodedJSON.encode(project(self.data))
+        if self._projections is None:
+            self._projections = {}
+        if len(self._projections) < MAX_PROJECTIONS:
+            self._projections[key] = projection
+        return projection
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def __repr__(self) -> str:
+        return f"EncodedJSON({len(self.body)} bytes)"
+
+
+def decoded(value: Any) -> Any:
+    """The plain value of a cache entry, whether stored pre-encoded or not."""
+    return value.data if isinstance(value, EncodedJSON) else value
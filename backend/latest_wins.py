@@ -0,0 +1,90 @@
+"""
+Latest-Wins Request Scopes
+==========================
+
+The swap form sends a new quote request on every amount edit, but only the
+last answer is shown. Requests are grouped into scopes (wallet + chain +
+pair); when a newer request claims a scope, the older one still waiting for
+upstream is cancelled and answered with Superseded.
+
+The older request only stops waiting - its upstream fetch (run through
+SingleFlight with cancel_abandoned=True) is cancelled only if no other caller
+still awaits it, which frees the connection and bulkhead slot for other users.
+
+Requests without a wallet (empty or placeholder taker, e.g. the zero
+address the form sends before a wallet connects) get no scope: they come
+from unrelated users and must never supersede each other.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Placeholder takers sent by clients without a connected wallet
+ANONYMOUS_TAKERS = frozenset({
+    "0x0000000000000000000000000000000000000000",
+    "11111111111111111111111111111111"
+})
+
+
+def taker_scope(taker: Optional[str], *parts: str) -> Optional[str]:
+    """Scope for a taker's requests on `parts` (None for anonymous takers)."""
+    if not taker or taker.lower() in ANONYMOUS_TAKERS:
+        return None
+    return ":".join((taker, *parts))
+
+
+class Superseded(Exception):
+    """A newer request for the same scope replaced this one."""
+
+    def __init__(self, scope: str):
+        super().__init__(f"Superseded by a newer request for {scope}")
+        self.scope = scope
+
+
+class LatestWins:
+    """Tracks the newest in-flight request per scope and cancels older ones."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._current: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.superseded = 0
+
+    async def run(self, scope: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() as the newest request for `scope`, cancelling the previous one.
+
+        Raises:
+            Superseded: a newer request for the same scope arrived first
+        """
+        task = asyncio.create_task(fn())
+        previous = self._current.get(scope)
+        self._current[scope] = task
+        self.started += 1
+        if previous is not None and not previous.done():
+            previous.cancel()
+            self.superseded += 1
+            logger.debug(f"LatestWins[{self.name}] superseded request for {scope}")
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Our task was cancelled by a newer request, not the caller being cancelled
+            if task.cancelled() and self._current.get(scope) is not task:
+                raise Superseded(scope)
+            raise
+        finally:
+            if self._current.get(scope) is task:
+                del self._current[scope]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._current),
+            "started": self.started,
+            "superseded": self.superseded
+        }
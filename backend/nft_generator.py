@@ -8,6 +8,8 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient
 import logging
 
+from ttl_cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
 # MongoDB connection
@@ -46,8 +48,9 @@ class NFTRegenerateRequest(BaseModel):
     uniqueTwist: Optional[str] = ""
     seed: int
 
-# In-memory job storage (in production, use Redis or DB)
-generation_jobs = {}
+# In-memory job storage (in production, use Redis or DB) - bounded, jobs expire after 24h
+GENERATION_JOBS_MAX = int(os.getenv('NFT_GENERATION_JOBS_MAX', '1000'))
+generation_jobs = TTLCache("nft_generation_jobs", max_entries=GENERATION_JOBS_MAX, default_ttl=24 * 3600)
 
 @nft_router.post("/generate-preview")
 async def generate_preview(request: NFTPreviewRequest):
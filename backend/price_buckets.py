@@ -0,0 +1,37 @@
+"""
+Price Size Buckets
+==================
+
+Indicative prices (/evm/price, Solana price streams, quote ladder rungs) are
+cached per size bucket instead of per exact amount: sell amounts are rounded
+to PRICE_BUCKET_SIG_DIGITS significant digits so nearby sizes share one
+upstream call, and the bucket's output is scaled back to the caller's size.
+
+Amounts are integers in the token's smallest unit, passed as strings like
+every quote endpoint.
+
+ENV:
+- PRICE_BUCKET_SIG_DIGITS (3)
+"""
+
+import os
+from typing import Optional
+
+PRICE_BUCKET_SIG_DIGITS = int(os.getenv('PRICE_BUCKET_SIG_DIGITS', '3'))
+
+
+def bucket_amount(amount: str, sig_digits: int = PRICE_BUCKET_SIG_DIGITS) -> str:
+    """Round an integer amount (smallest unit) to `sig_digits` significant digits."""
+    value = int(amount)
+    digits = len(str(value))
+    if value <= 0 or digits <= sig_digits:
+        return str(value)
+    factor = 10 ** (digits - sig_digits)
+    return str((value + factor // 2) // factor * factor)
+
+
+def scale_amount(amount: Optional[str], numerator: str, denominator: str) -> Optional[str]:
+    """Scale an integer amount by numerator/denominator (e.g. bucket buyAmount -> actual size)."""
+    if amount is None or int(denominator) == 0:
+        return amount
+    return str(int(amount) * int(numerator) // int(denominator))
@@ -0,0 +1,217 @@
+"""
+In-Memory USD Valuation Base
+============================
+
+Shared core of token_pricing (EVM) and solana_pricing: per-chain tables of
+token metadata (decimals, symbol) and USD prices that quotes read from memory
+only (O(1)), never waiting on a price provider.
+
+- value_usd(): a miss (unknown decimals or no fresh price) returns None -
+  the caller applies the fallback fee - and queues the token for a fill
+- Fill loop: collects misses for TOKEN_PRICE_FILL_DELAY, then resolves them
+  in one batch per chain
+- Refresh loop: re-prices every tracked token each TOKEN_PRICE_REFRESH_INTERVAL
+- Tracked tokens per chain are an LRU of TOKEN_PRICE_MAX_TRACKED entries
+
+Subclasses supply the upstream calls: _fill_metadata() and _refresh_prices().
+Metadata is persisted in MongoDB (`token_metadata`, keyed by chain + address).
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PRICE_REFRESH_INTERVAL = float(os.getenv('TOKEN_PRICE_REFRESH_INTERVAL', '60'))  # seconds
+TOKEN_PRICE_MAX_AGE = float(os.getenv('TOKEN_PRICE_MAX_AGE', '300'))  # older prices count as a miss
+TOKEN_PRICE_MAX_TRACKED = int(os.getenv('TOKEN_PRICE_MAX_TRACKED', '2000'))  # per chain, LRU
+TOKEN_PRICE_FILL_DELAY = 0.5  # seconds to collect misses into one batch
+
+
+def to_decimal_amount(amount: str, decimals: int) -> float:
+    """Convert an integer amount in the smallest unit to whole tokens."""
+    return int(amount) / (10 ** decimals)
+
+
+class PricingService:
+    """Memory-only USD valuation per chain with background fill and refresh."""
+
+    name = "Token pricing"  # used in logs
+
+    def __init__(
+        self,
+        metadata_collection,
+        chains: Iterable[str],
+        seed_metadata: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
+    ):
+        """
+        Args:
+            chains: Chains this service prices
+            seed_metadata: chain -> address -> {"decimals", "symbol"} known upfront
+        """
+        self.metadata_collection = metadata_collection
+        seed_metadata = seed_metadata or {}
+        chains = list(chains)
+
+        # chain -> address -> {"decimals", "symbol"}
+        self._metadata: Dict[str, Dict[str, Dict[str, Any]]] = {
+            chain: dict(seed_metadata.get(chain, {})) for chain in chains
+        }
+        # chain -> address -> (price_usd, updated_at)
+        self._prices: Dict[str, Dict[str, Tuple[float, float]]] = {chain: {} for chain in chains}
+        # chain -> addresses to keep refreshed (LRU by last request)
+        self._tracked: Dict[str, "OrderedDict[str, None]"] = {
+            chain: OrderedDict((address, None) for address in seed_metadata.get(chain, {}))
+            for chain in chains
+        }
+        self._pending: Dict[str, set] = {chain: set() for chain in chains}
+        self._fill_event: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def _key(self, address: str) -> str:
+        """Canonical form of an address (e.g. lowercase hex on EVM)."""
+        return address
+
+    # ---------- Read path (quotes) ----------
+
+    def value_usd(self, chain: str, address: str, amount: str) -> Optional[float]:
+        """
+        USD value of `amount` (smallest unit) from memory only.
+
+        Returns:
+            USD value, or None on a miss (token queued for async fill)
+        """
+        if chain not in self._prices:
+            return None
+        address = self._key(address)
+        self._touch(chain, address)
+
+        metadata = self._metadata[chain].get(address)
+        price = self._prices[chain].get(address)
+        if metadata is None or price is None or time.time() - price[1] > TOKEN_PRICE_MAX_AGE:
+            self.misses += 1
+            self._queue_fill(chain, address)
+            return None
+
+        self.hits += 1
+        return to_decimal_amount(amount, metadata["decimals"]) * price[0]
+
+    def get_price(self, chain: str, address: str) -> Optional[float]:
+        price = self._prices.get(chain, {}).get(self._key(address))
+        return price[0] if price else None
+
+    def get_decimals(self, chain: str, address: str) -> Optional[int]:
+        metadata = self._metadata.get(chain, {}).get(self._key(address))
+        return metadata["decimals"] if metadata else None
+
+    def _touch(self, chain: str, address: str) -> None:
+        tracked = self._tracked[chain]
+        if address in tracked:
+            tracked.move_to_end(address)
+            return
+        tracked[address] = None
+        while len(tracked) > TOKEN_PRICE_MAX_TRACKED:
+            evicted, _ = tracked.popitem(last=False)
+            self._prices[chain].pop(evicted, None)
+
+    def _queue_fill(self, chain: str, address: str) -> None:
+        self._pending[chain].add(address)
+        if self._fill_event is not None:
+            self._fill_event.set()
+
+    # ---------- Lifecycle ----------
+
+    async def start(self) -> None:
+        """Load persisted metadata and start the fill and refresh loops."""
+        try:
+            async for doc in self.metadata_collection.find({"chain": {"$in": list(self._metadata)}}, {"_id": 0}):
+                chain = doc.get("chain")
+                if chain in self._metadata and doc.get("decimals") is not None:
+                    self._metadata[chain][doc["address"]] = {
+                        "decimals": doc["decimals"],
+                        "symbol": doc.get("symbol")
+                    }
+        except Exception as e:
+            logger.error(f"{self.name}: failed to load token metadata: {e}")
+
+        self._fill_event = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._fill_loop()),
+            asyncio.create_task(self._refresh_loop())
+        ]
+        logger.info(f"{self.name} started ({sum(len(m) for m in self._metadata.values())} tokens with metadata)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _fill_loop(self) -> None:
+        while True:
+            await self._fill_event.wait()
+            await asyncio.sleep(TOKEN_PRICE_FILL_DELAY)  # collect a batch
+            self._fill_event.clear()
+            for chain, pending in self._pending.items():
+                if not pending:
+                    continue
+                addresses = list(pending)
+                pending.clear()
+                try:
+                    await self._fill(chain, addresses)
+                except Exception as e:
+                    self.refresh_errors += 1
+                    logger.error(f"{self.name} fill failed on {chain}: {e}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            for chain, tracked in self._tracked.items():
+                try:
+                    await self._refresh_prices(chain, list(tracked))
+                except Exception as e:
+                    self.refresh_errors += 1
+                    logger.error(f"{self.name} refresh failed on {chain}: {e}")
+            await asyncio.sleep(TOKEN_PRICE_REFRESH_INTERVAL)
+
+    # ---------- Upstream fills ----------
+
+    async def _fill(self, chain: str, addresses: List[str]) -> None:
+        """Resolve a batch of misses: metadata first, then prices."""
+        await self._fill_metadata(chain, addresses)
+        await self._refresh_prices(chain, addresses)
+
+    async def _fill_metadata(self, chain: str, addresses: List[str]) -> None:
+        """Resolve decimals/symbol for addresses without metadata (store with _store_metadata)."""
+        raise NotImplementedError
+
+    async def _refresh_prices(self, chain: str, addresses: List[str]) -> None:
+        """Fetch USD prices for `addresses` into self._prices[chain]."""
+        raise NotImplementedError
+
+    async def _store_metadata(self, chain: str, address: str, metadata: Dict[str, Any]) -> None:
+        self._metadata[chain][address] = metadata
+        await self.metadata_collection.update_one(
+            {"chain": chain, "address": address},
+            {"$set": {"chain": chain, "address": address, **metadata}},
+            upsert=True
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "tokens_with_metadata": {chain: len(m) for chain, m in self._metadata.items()},
+            "prices": {chain: len(p) for chain, p in self._prices.items()},
+            "pending": {chain: len(p) for chain, p in self._pending.items()}
+        }
@@ -0,0 +1,107 @@
+"""
+Typed PumpPortal Events
+=======================
+
+Decodes PumpPortal WebSocket messages straight into small typed events
+carrying only the fields the watcher uses, instead of a generic dict per
+message followed by data.get(...) lookups.
+
+- msgspec (when installed): schema-aware decoding into Structs tagged on
+  "type"; fields not declared below are skipped without being built
+- otherwise: orjson/json (see json_bytes) into a dict, then a table of
+  builders keyed on "type" fills __slots__ classes
+
+decode_event() returns None for messages that are not one of these events
+(subscription acks, other event types) and raises ValueError for malformed
+JSON. EVENT_NAMES maps each class to its wire type for metrics.
+"""
+
+from typing import Any, Callable, Dict, Optional, Union
+
+from json_bytes import loads
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+if msgspec is not None:
+
+    class NewTokenEvent(msgspec.Struct, tag_field="type", tag="newToken"):
+        mint: Optional[str] = None
+        name: Optional[str] = None
+        symbol: Optional[str] = None
+        uri: Optional[str] = None
+
+    class TradeEvent(msgspec.Struct, tag_field="type", tag="trade", rename="camel"):
+        mint: Optional[str] = None
+        market_cap_sol: float = 0.0
+
+    class MigrationEvent(msgspec.Struct, tag_field="type", tag="migration"):
+        mint: Optional[str] = None
+        pair: Optional[str] = None
+
+    _decoder = msgspec.json.Decoder(Union[NewTokenEvent, TradeEvent, MigrationEvent])
+
+    def decode_event(message: Union[str, bytes]) -> Any:
+        """Typed event for a raw message, None if it is not a known event."""
+        try:
+            return _decoder.decode(message)
+        except msgspec.ValidationError:
+            return None  # valid JSON, not one of our events
+        except msgspec.DecodeError as e:
+            raise ValueError(f"Malformed PumpPortal message: {e}") from e
+
+else:
+
+    class NewTokenEvent:
+        __slots__ = ("mint", "name", "symbol", "uri")
+
+        def __init__(self, mint=None, name=None, symbol=None, uri=None):
+            self.mint = mint
+            self.name = name
+            self.symbol = symbol
+            self.uri = uri
+
+    class TradeEvent:
+        __slots__ = ("mint", "market_cap_sol")
+
+        def __init__(self, mint=None, market_cap_sol=0.0):
+            self.mint = mint
+            self.market_cap_sol = market_cap_sol
+
+    class MigrationEvent:
+        __slots__ = ("mint", "pair")
+
+        def __init__(self, mint=None, pair=None):
+            self.mint = mint
+            self.pair = pair
+
+    def _trade(data: Dict[str, Any]) -> TradeEvent:
+        try:
+            market_cap_sol = float(data.get("marketCapSol") or 0)
+        except (TypeError, ValueError):
+            market_cap_sol = 0.0
+        return TradeEvent(data.get("mint"), market_cap_sol)
+
+    _BUILDERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+        "newToken": lambda data: NewTokenEvent(data.get("mint"), data.get("name"), data.get("symbol"), data.get("uri")),
+        "trade": _trade,
+        "migration": lambda data: MigrationEvent(data.get("mint"), data.get("pair"))
+    }
+
+    def decode_event(message: Union[str, bytes]) -> Any:
+        """Typed event for a raw message, None if it is not a known event."""
+        data = loads(message)  # ValueError (JSONDecodeError) if malformed
+        if not isinstance(data, dict):
+            return None
+        builder = _BUILDERS.get(data.get("type"))
+        return builder(data) if builder else None
+
+
+EVENT_NAMES: Dict[type, str] = {
+    NewTokenEvent: "newToken",
+    TradeEvent: "trade",
+    MigrationEvent: "migration"
+}
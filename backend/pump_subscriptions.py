@@ -0,0 +1,142 @@
+"""
+Key-Scoped PumpPortal Trade Subscriptions
+=========================================
+
+Instead of the global trade stream (every trade on pump.fun), the watcher
+subscribes to trades of the mints users track via /api/pump/track, so
+bandwidth, JSON decoding and DB writes scale with tracked tokens.
+
+- track()/untrack() queue subscribeTokenTrade / unsubscribeTokenTrade
+  changes; the watcher sends them in batches (a track followed by an
+  untrack before the next batch cancels out)
+- After a reconnect the full key set is subscribed again
+- Mints without a trade for PUMP_TRACK_IDLE_TTL_HOURS expire
+- PUMP_GLOBAL_TRADE_STREAM=true restores the global stream
+
+ENV:
+- PUMP_GLOBAL_TRADE_STREAM (false)
+- PUMP_SUBSCRIBE_BATCH_MS (250) / PUMP_SUBSCRIBE_BATCH_MAX (200 keys per message)
+- PUMP_TRACK_IDLE_TTL_HOURS (24)
+"""
+
+import os
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+PUMP_GLOBAL_TRADE_STREAM = os.getenv('PUMP_GLOBAL_TRADE_STREAM', 'false').lower() == 'true'
+PUMP_SUBSCRIBE_BATCH_MS = int(os.getenv('PUMP_SUBSCRIBE_BATCH_MS', '250'))
+PUMP_SUBSCRIBE_BATCH_MAX = int(os.getenv('PUMP_SUBSCRIBE_BATCH_MAX', '200'))
+PUMP_TRACK_IDLE_TTL_HOURS = float(os.getenv('PUMP_TRACK_IDLE_TTL_HOURS', '24'))
+
+SUBSCRIBE = "subscribeTokenTrade"
+UNSUBSCRIBE = "unsubscribeTokenTrade"
+
+
+class TradeSubscriptions:
+    """Tracked mints and the subscription changes not yet sent."""
+
+    def __init__(
+        self,
+        batch_max: int = PUMP_SUBSCRIBE_BATCH_MAX,
+        idle_ttl: float = PUMP_TRACK_IDLE_TTL_HOURS * 3600
+    ):
+        self.batch_max = batch_max
+        self.idle_ttl = idle_ttl
+
+        self.keys: Set[str] = set()
+        self._last_seen: Dict[str, float] = {}
+        self._pending: Dict[str, bool] = {}  # mint -> subscribe (True) / unsubscribe (False)
+        self._changed: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.messages_sent = 0
+        self.subscribed = 0
+        self.unsubscribed = 0
+        self.expired = 0
+        self.resubscribes = 0
+
+    @property
+    def changed(self) -> asyncio.Event:
+        """Set whenever changes are pending."""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed
+
+    def _queue(self, mint: str, subscribe: bool) -> None:
+        if self._pending.get(mint) is (not subscribe):
+            del self._pending[mint]  # the opposite change was never sent
+        else:
+            self._pending[mint] = subscribe
+        self.changed.set()
+
+    def track(self, mint: str) -> bool:
+        """Subscribe to a mint's trades (False if already tracked)."""
+        if mint in self.keys:
+            return False
+        self.keys.add(mint)
+        self._last_seen[mint] = time.monotonic()
+        self._queue(mint, True)
+        return True
+
+    def untrack(self, mint: str) -> bool:
+        """Unsubscribe from a mint's trades (False if not tracked)."""
+        if mint not in self.keys:
+            return False
+        self.keys.discard(mint)
+        self._last_seen.pop(mint, None)
+        self._queue(mint, False)
+        return True
+
+    def touch(self, mint: str) -> None:
+        """Note a trade on a tracked mint (keeps it from expiring)."""
+        if mint in self._last_seen:
+            self._last_seen[mint] = time.monotonic()
+
+    def expire_idle(self, now: Optional[float] = None) -> List[str]:
+        """Untrack mints without a trade for idle_ttl seconds."""
+        cutoff = (now if now is not None else time.monotonic()) - self.idle_ttl
+        idle = [mint for mint, seen in self._last_seen.items() if seen < cutoff]
+        for mint in idle:
+            self.untrack(mint)
+        self.expired += len(idle)
+        return idle
+
+    def _messages(self, method: str, keys: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {"method": method, "keys": keys[i:i + self.batch_max]}
+            for i in range(0, len(keys), self.batch_max)
+        ]
+
+    def pending_messages(self) -> List[Dict[str, Any]]:
+        """Messages for the changes queued since the last call."""
+        pending, self._pending = self._pending, {}
+        self.changed.clear()
+        subscribe = [mint for mint, sub in pending.items() if sub]
+        unsubscribe = [mint for mint, sub in pending.items() if not sub]
+        self.subscribed += len(subscribe)
+        self.unsubscribed += len(unsubscribe)
+        messages = self._messages(SUBSCRIBE, subscribe) + self._messages(UNSUBSCRIBE, unsubscribe)
+        self.messages_sent += len(messages)
+        return messages
+
+    def full_messages(self) -> List[Dict[str, Any]]:
+        """Messages subscribing every tracked mint (for a fresh connection)."""
+        self._pending = {}
+        self.changed.clear()
+        self.resubscribes += 1
+        messages = self._messages(SUBSCRIBE, sorted(self.keys))
+        self.messages_sent += len(messages)
+        return messages
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "global" if PUMP_GLOBAL_TRADE_STREAM else "per_mint",
+            "tracked": len(self.keys),
+            "pending_changes": len(self._pending),
+            "messages_sent": self.messages_sent,
+            "subscribed": self.subscribed,
+            "unsubscribed": self.unsubscribed,
+            "expired": self.expired,
+            "resubscribes": self.resubscribes
+        }
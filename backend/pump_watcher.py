@@ -2,20 +2,90 @@
 Pump.fun Token Watcher (Non-Custodial)
 Only tracks token status - no private keys, no transactions
 With resilient reconnect & health checks
+
+Trade messages only update in-memory state per mint; dirty mints are written
+every PUMP_FLUSH_INTERVAL_MS with one unordered bulk_write (CoalescingWriter),
+so Mongo load follows active mints rather than trades.
+
+The receive loop only timestamps and enqueues messages; PUMP_WORKERS workers
+parse and handle them from a bounded IngestQueue. When the queue is full,
+trades for the same mint are merged (latest wins) instead of being dropped
+or stalling the socket; past PUMP_INGEST_HARD_LIMIT items, messages that
+cannot merge are dropped (counted in the queue stats). Queue depth, end-to-end lag and per-event-type
+handling time are reported by /api/pump/health.
+
+Trades are subscribed per tracked mint (see pump_subscriptions), not
+through the global trade stream, unless PUMP_GLOBAL_TRADE_STREAM is set.
+
+Status of tracked mints is kept in memory (loaded from Mongo on start) and
+is authoritative for /api/pump/status; every stage or progress change is
+pushed to that mint's stream subscribers (status_updates).
+
+Messages are decoded into typed events (see pump_events) and dispatched
+through a table keyed on event class.
 """
+import os
+import time
 import asyncio
 import json
 import logging
-from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Dict, Any, List
 import websockets
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from ingest_queue import IngestQueue, IngestItem
+from pump_events import decode_event, NewTokenEvent, TradeEvent, MigrationEvent, EVENT_NAMES
+from pump_subscriptions import TradeSubscriptions, PUMP_GLOBAL_TRADE_STREAM, PUMP_SUBSCRIBE_BATCH_MS
+from stream_hub import PushHub
+from ttl_cache import TTLCache
+from write_behind import CoalescingWriter
+
 logger = logging.getLogger(__name__)
 
 PUMPPORTAL_WS = "wss://pumpportal.fun/api/data"
 MAX_RECONNECT_ATTEMPTS = 5
 RECONNECT_BASE_DELAY = 2  # seconds
+SUBSCRIPTION_SWEEP_SECONDS = 60  # idle-mint expiry check
+PROGRESS_DECIMALS = 4  # pushed bonding progress resolution (0.01%)
+PUMP_FLUSH_INTERVAL_MS = int(os.getenv('PUMP_FLUSH_INTERVAL_MS', '250'))
+PUMP_MAX_DIRTY_MINTS = int(os.getenv('PUMP_MAX_DIRTY_MINTS', '2000'))  # flush early past this
+PUMP_INGEST_QUEUE_SIZE = int(os.getenv('PUMP_INGEST_QUEUE_SIZE', '5000'))
+PUMP_INGEST_HARD_LIMIT = int(os.getenv('PUMP_INGEST_HARD_LIMIT', '20000'))  # drop unmergeable messages past this
+PUMP_WORKERS = int(os.getenv('PUMP_WORKERS', '4'))
+PUMP_UNTRACKED_STATUS_TTL = float(os.getenv('PUMP_UNTRACKED_STATUS_TTL', '10'))  # seconds
+
+
+def token_status(token: Dict[str, Any]) -> Dict[str, Any]:
+    """Public status fields of a pump_tokens document"""
+    created_at = token.get("created_at")
+    return {
+        "mint": token["mint"],
+        "stage": token.get("stage", "unknown"),
+        "bonding_progress": token.get("bonding_progress", 0),
+        "migrated": token.get("migrated", False),
+        "pair_address": token.get("pair_address"),
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at
+    }
+
+
+def _utc(value: Any) -> Optional[datetime]:
+    # Motor returns naive UTC datetimes unless the client is tz_aware
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def trade_merge_key(message: Any):
+    """IngestQueue merge key: trades merge per mint, other events never merge."""
+    try:
+        event = decode_event(message)
+    except ValueError:
+        return message, None  # left for the worker to report
+    if isinstance(event, TradeEvent) and event.mint:
+        return event, event.mint
+    return event, None
+
 
 class PumpWatcher:
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -26,10 +96,42 @@ class PumpWatcher:
         self.reconnect_attempts = 0
         self.last_heartbeat = datetime.now(timezone.utc)
         self.is_healthy = False
+        # Bonding progress per mint, coalesced between flushes; migrated
+        # tokens are never moved back to "bonding" by a late flush
+        self.progress_writer = CoalescingWriter(
+            db.pump_tokens,
+            "pump_tokens",
+            key_field="mint",
+            flush_interval=PUMP_FLUSH_INTERVAL_MS / 1000,
+            max_dirty=PUMP_MAX_DIRTY_MINTS,
+            match={"migrated": {"$ne": True}}
+        )
+        self.ingest = IngestQueue("pumpportal", PUMP_INGEST_QUEUE_SIZE, trade_merge_key, PUMP_INGEST_HARD_LIMIT)
+        self.workers: List[asyncio.Task] = []
+        # Metrics: event type -> [count, total seconds, max seconds]
+        self.handle_times: Dict[str, List[float]] = {}
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.handle_errors = 0
+        self.subscriptions = TradeSubscriptions()
+        self.statuses: Dict[str, Dict[str, Any]] = {}  # mint -> token_status()
+        # Lookups of untracked / unknown mints (None), so polling them doesn't hit Mongo
+        self.untracked_statuses = TTLCache("pump_untracked_status", max_entries=10000, default_ttl=PUMP_UNTRACKED_STATUS_TTL)
+        self.status_updates = PushHub("pump_status")
+        # Event class -> handler
+        self._handlers = {
+            NewTokenEvent: self._handle_new_token,
+            TradeEvent: self._handle_trade,
+            MigrationEvent: self._handle_migration  # Custom event if available
+        }
         
     async def start(self):
         """Start watching pump.fun WebSocket with resilient reconnect"""
         self.running = True
+        await self.progress_writer.start()
+        await self._load_tracked()
+        # Workers outlive reconnects and keep draining while we reconnect
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(PUMP_WORKERS)]
         while self.running:
             try:
                 # Exponential backoff for reconnects
@@ -48,27 +150,27 @@ class PumpWatcher:
                     self.is_healthy = True
                     self.reconnect_attempts = 0
                     
-                    # Subscribe to events
+                    # Subscribe to events (trades: every tracked mint, then changes as they come)
                     await ws.send(json.dumps({"method": "subscribeNewToken"}))
-                    await ws.send(json.dumps({"method": "subscribeTokenTrade"}))
+                    if PUMP_GLOBAL_TRADE_STREAM:
+                        await ws.send(json.dumps({"method": "subscribeTokenTrade"}))
+                        subscription_task = None
+                    else:
+                        subscription_task = asyncio.create_task(self._subscription_loop(ws))
                     logger.info("✅ Connected to PumpPortal")
                     
                     # Start heartbeat task
                     heartbeat_task = asyncio.create_task(self._heartbeat())
                     
                     try:
-                        # Listen for messages
+                        # Receive only: timestamp and enqueue, workers do the rest
                         async for message in ws:
                             self.last_heartbeat = datetime.now(timezone.utc)
-                            try:
-                                data = json.loads(message)
-                                await self._handle_event(data)
-                            except json.JSONDecodeError as e:
-                                logger.error(f"Failed to parse message: {e}")
-                            except Exception as e:
-                                logger.error(f"Error handling event: {e}")
+                            self.ingest.put(message)
                     finally:
                         heartbeat_task.cancel()
+                        if subscription_task:
+                            subscription_task.cancel()
                             
             except websockets.exceptions.WebSocketException as e:
                 self.is_healthy = False
@@ -85,6 +187,132 @@ class PumpWatcher:
                 logger.error(f"Unexpected error: {e}")
                 await asyncio.sleep(5)
     
+    async def _load_tracked(self):
+        """
+        Load user-tracked mints: status for all of them, trade subscriptions
+        for those not migrated and active within the idle TTL
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.subscriptions.idle_ttl)
+        try:
+            cursor = self.db.pump_tokens.find(
+                {"user_initiated": True},
+                {"_id": 0, "mint": 1, "stage": 1, "bonding_progress": 1, "migrated": 1,
+                 "pair_address": 1, "created_at": 1, "last_trade": 1}
+            )
+            async for doc in cursor:
+                self.statuses.setdefault(doc["mint"], token_status(doc))
+                last_active = max(filter(None, (_utc(doc.get("last_trade")), _utc(doc.get("created_at")))), default=None)
+                if not doc.get("migrated") and last_active and last_active >= cutoff:
+                    self.subscriptions.track(doc["mint"])
+            logger.info(f"Loaded {len(self.statuses)} tracked pump.fun mints ({len(self.subscriptions.keys)} subscribed)")
+        except Exception as e:
+            logger.error(f"Failed to load tracked mints: {e}")
+    
+    def track(self, mint: str, token: Optional[Dict[str, Any]] = None):
+        """Start receiving trades for a mint (`token`: its pump_tokens document)"""
+        self.untracked_statuses.pop(mint)
+        if token is not None and mint not in self.statuses:
+            self.statuses[mint] = token_status(token)
+        if not self.statuses.get(mint, {}).get("migrated"):
+            self.subscriptions.track(mint)
+    
+    def update_status(self, mint: str, fields: Dict[str, Any]):
+        """Apply status changes for a known mint and push them to its subscribers"""
+        status = self.statuses.get(mint)
+        if status is None:
+            return
+        changed = {key: value for key, value in fields.items() if status.get(key) != value}
+        if not changed:
+            return
+        status.update(changed)
+        self.status_updates.publish(mint, dict(status))
+    
+    def subscribe_status(self, mint: str):
+        """Stream of a mint's status (current status first); None if unknown"""
+        status = self.statuses.get(mint)
+        if status is None:
+            return None
+        return self.status_updates.subscribe(mint, initial=dict(status))
+    
+    def untrack(self, mint: str):
+        """Stop receiving trades for a mint"""
+        self.subscriptions.untrack(mint)
+    
+    async def _subscription_loop(self, ws):
+        """Subscribe the tracked set, then send batched changes and expire idle mints"""
+        for message in self.subscriptions.full_messages():
+            await ws.send(json.dumps(message))
+        last_sweep = time.monotonic()
+        while True:
+            try:
+                await asyncio.wait_for(self.subscriptions.changed.wait(), timeout=SUBSCRIPTION_SWEEP_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            if time.monotonic() - last_sweep >= SUBSCRIPTION_SWEEP_SECONDS:
+                last_sweep = time.monotonic()
+                expired = self.subscriptions.expire_idle()
+                if expired:
+                    logger.info(f"Unsubscribed {len(expired)} idle pump.fun mints")
+            await asyncio.sleep(PUMP_SUBSCRIBE_BATCH_MS / 1000)  # let the batch fill
+            for message in self.subscriptions.pending_messages():
+                await ws.send(json.dumps(message))
+    
+    async def _worker(self):
+        """Decode and handle queued messages"""
+        while True:
+            item = await self.ingest.get()
+            event_type = "invalid"
+            started = time.monotonic()
+            try:
+                # Raw unless the queue already decoded it while merging
+                event = decode_event(item.message) if isinstance(item.message, (str, bytes)) else item.message
+                handler = self._handlers.get(type(event))
+                if handler is None:
+                    event_type = "ignored"  # acks and event types we don't use
+                else:
+                    event_type = EVENT_NAMES[type(event)]
+                    await handler(event)
+            except ValueError as e:
+                self.handle_errors += 1
+                logger.error(f"Failed to handle {event_type} message: {e}")
+            except Exception as e:
+                self.handle_errors += 1
+                logger.error(f"Error handling event: {e}")
+            finally:
+                self._record_timing(event_type, item, started)
+    
+    def _record_timing(self, event_type: str, item: IngestItem, started: float):
+        done = time.monotonic()
+        elapsed = done - started
+        timing = self.handle_times.get(event_type)
+        if timing is None:
+            timing = self.handle_times[event_type] = [0, 0.0, 0.0]
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+        self.lag_last = done - item.received_at
+        self.lag_max = max(self.lag_max, self.lag_last)
+    
+    def ingest_stats(self) -> Dict[str, Any]:
+        """Queue depth, end-to-end lag and per-event-type handling time"""
+        return {
+            "workers": len(self.workers),
+            "queue": self.ingest.stats(),
+            "lag_ms": {
+                "last": round(self.lag_last * 1000, 1),
+                "max": round(self.lag_max * 1000, 1)
+            },
+            "handle_errors": self.handle_errors,
+            "handle_ms": {
+                event_type: {
+                    "count": count,
+                    "avg": round(total / count * 1000, 3) if count else None,
+                    "max": round(longest * 1000, 3)
+                }
+                for event_type, (count, total, longest) in self.handle_times.items()
+            }
+        }
+    
     async def _heartbeat(self):
         """Monitor connection health"""
         while True:
@@ -94,20 +322,9 @@ class PumpWatcher:
                 logger.warning(f"No heartbeat for {elapsed}s - connection may be dead")
                 self.is_healthy = False
     
-    async def _handle_event(self, data: Dict[str, Any]):
-        """Handle incoming pump.fun events"""
-        event_type = data.get("type")
-        
-        if event_type == "newToken":
-            await self._handle_new_token(data)
-        elif event_type == "trade":
-            await self._handle_trade(data)
-        elif event_type == "migration":  # Custom event if available
-            await self._handle_migration(data)
-    
-    async def _handle_new_token(self, data: Dict[str, Any]):
+    async def _handle_new_token(self, event: NewTokenEvent):
         """Track new token creation"""
-        mint = data.get("mint")
+        mint = event.mint
         if not mint:
             return
             
@@ -116,14 +333,14 @@ class PumpWatcher:
         # Store in database
         token_doc = {
             "mint": mint,
-            "name": data.get("name"),
-            "symbol": data.get("symbol"),
+            "name": event.name,
+            "symbol": event.symbol,
             "created_at": datetime.now(timezone.utc),
             "stage": "created",
             "bonding_progress": 0,
             "migrated": False,
             "pair_address": None,
-            "metadata": data
+            "metadata": {"uri": event.uri}
         }
         
         await self.db.pump_tokens.update_one(
@@ -133,39 +350,44 @@ class PumpWatcher:
         )
         
         self.tracked_tokens[mint] = "created"
+        self.update_status(mint, {"stage": "created", "bonding_progress": 0})
     
-    async def _handle_trade(self, data: Dict[str, Any]):
+    async def _handle_trade(self, event: TradeEvent):
         """Track bonding curve progress"""
-        mint = data.get("mint")
+        mint = event.mint
         if not mint:
             return
             
-        # Update bonding progress
-        bonding_progress = data.get("marketCapSol", 0) / 85.0  # pump.fun bonding target
+        # Update bonding progress (written with the next flush)
+        bonding_progress = event.market_cap_sol / 85.0  # pump.fun bonding target
         
-        await self.db.pump_tokens.update_one(
-            {"mint": mint},
-            {
-                "$set": {
-                    "stage": "bonding",
-                    "bonding_progress": min(bonding_progress, 1.0),
-                    "last_trade": datetime.now(timezone.utc)
-                }
-            }
-        )
+        self.subscriptions.touch(mint)
+        self.progress_writer.update(mint, {
+            "stage": "bonding",
+            "bonding_progress": min(bonding_progress, 1.0),
+            "last_trade": datetime.now(timezone.utc)
+        })
+        status = self.statuses.get(mint)
+        if status is not None and not status.get("migrated"):
+            self.update_status(mint, {
+                "stage": "bonding",
+                "bonding_progress": round(min(bonding_progress, 1.0), PROGRESS_DECIMALS)
+            })
         
-        logger.debug(f"Trade on {mint}: {bonding_progress*100:.1f}% bonding progress")
+        logger.debug("Trade on %s: %.1f%% bonding progress", mint, bonding_progress * 100)
     
-    async def _handle_migration(self, data: Dict[str, Any]):
+    async def _handle_migration(self, event: MigrationEvent):
         """Handle migration to Raydium"""
-        mint = data.get("mint")
-        pair = data.get("pair")
+        mint = event.mint
+        pair = event.pair
         
         if not mint or not pair:
             return
             
         logger.info(f"🚀 Token migrated to Raydium: {mint} -> {pair}")
         
+        self.progress_writer.discard(mint)
+        self.subscriptions.untrack(mint)
         await self.db.pump_tokens.update_one(
             {"mint": mint},
             {
@@ -179,27 +401,43 @@ class PumpWatcher:
         )
         
         self.tracked_tokens[mint] = "migrated"
+        self.update_status(mint, {"stage": "migrated", "migrated": True, "pair_address": pair})
     
     async def stop(self):
         """Stop the watcher"""
         self.running = False
         if self.ws:
             await self.ws.close()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        await self.progress_writer.stop()
     
     async def get_token_status(self, mint: str) -> Optional[Dict[str, Any]]:
-        """Get current status of a token"""
+        """
+        Get current status of a token (from memory; Mongo only on first sight,
+        and at most every PUMP_UNTRACKED_STATUS_TTL for untracked or unknown mints)
+        """
+        status = self.statuses.get(mint)
+        if status is not None:
+            return dict(status)
+        cached = self.untracked_statuses.get_entry(mint)
+        if cached is not None:
+            return dict(cached[0]) if cached[0] is not None else None
+        
         token = await self.db.pump_tokens.find_one({"mint": mint})
         if not token:
+            self.untracked_statuses.set(mint, None)
             return None
-            
-        return {
-            "mint": token["mint"],
-            "stage": token.get("stage", "unknown"),
-            "bonding_progress": token.get("bonding_progress", 0),
-            "migrated": token.get("migrated", False),
-            "pair_address": token.get("pair_address"),
-            "created_at": token.get("created_at").isoformat() if token.get("created_at") else None
-        }
+        if not token.get("migrated"):
+            token.update(self.progress_writer.pending(mint) or {})  # trades since the last flush
+        if not token.get("user_initiated"):
+            status = token_status(token)  # not tracked by anyone: not kept beyond the TTL
+            self.untracked_statuses.set(mint, status)
+            return dict(status)
+        status = self.statuses.setdefault(mint, token_status(token))
+        return dict(status)
 
 
 # Singleton instance
@@ -213,3 +451,14 @@ async def get_watcher(db: AsyncIOMotorDatabase) -> PumpWatcher:
         # Start watcher in background
         asyncio.create_task(_watcher_instance.start())
     return _watcher_instance
+
+async def stop_watcher() -> None:
+    """Stop the watcher (if started) and flush pending progress."""
+    if _watcher_instance is not None:
+        await _watcher_instance.stop()
+
+def persistence_stats() -> Optional[Dict[str, Any]]:
+    """Coalesced progress writer stats (None until the watcher is started)."""
+    if _watcher_instance is None:
+        return None
+    return _watcher_instance.progress_writer.stats()
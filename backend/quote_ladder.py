@@ -0,0 +1,124 @@
+"""
+Quote Ladder
+============
+
+Builds the size ladder behind /api/quote/ladder: a handful of trade sizes for
+one pair, quoted concurrently, so the UI can draw the price-impact curve and
+show what the user would receive at the next fee tier without firing N
+quotes of its own.
+
+- Sizes: given by the client, or generated around the fee tier boundaries
+  (just below and at each threshold) plus the reference size
+- Rates: buyAmount per net input unit; price impact is measured against the
+  smallest quoted size
+- Interpolation: sizes between quoted rungs (and rungs whose quote failed)
+  get a rate interpolated linearly between their neighbours - never
+  extrapolated past the quoted range
+
+Amounts are integers in the sell token's smallest unit, like every quote
+endpoint. Decimals cancel out of rate ratios, so no token metadata is needed.
+"""
+
+import os
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Tuple
+
+from fee_calculator import FEE_TIERS
+
+QUOTE_LADDER_MAX_SIZES = int(os.getenv('QUOTE_LADDER_MAX_SIZES', '12'))
+QUOTE_LADDER_CONCURRENCY = int(os.getenv('QUOTE_LADDER_CONCURRENCY', '4'))
+QUOTE_LADDER_ITEM_TIMEOUT = float(os.getenv('QUOTE_LADDER_ITEM_TIMEOUT', '10'))
+
+BOUNDARY_OFFSET = 0.01  # "just below" a tier threshold: 1% under it
+FALLBACK_MULTIPLES = (0.1, 0.25, 0.5, 1, 2, 5, 10)  # around the reference size when its USD value is unknown
+
+
+def tier_boundaries() -> List[float]:
+    """USD thresholds where a lower fee tier starts."""
+    return sorted(tier["min"] for tier in FEE_TIERS if tier["min"] > 0)
+
+
+def ladder_sizes(
+    reference_amount: int,
+    reference_usd: Optional[float],
+    boundaries: Optional[Iterable[float]] = None,
+    max_sizes: int = QUOTE_LADDER_MAX_SIZES
+) -> List[int]:
+    """
+    Generate ladder sizes around the fee tier boundaries.
+
+    Args:
+        reference_amount: The user's current size (smallest unit)
+        reference_usd: USD value of reference_amount, None if unpriced
+        boundaries: USD thresholds (defaults to the configured fee tiers)
+        max_sizes: Upper bound on the number of sizes
+
+    Returns:
+        Sorted, de-duplicated sizes including reference_amount
+    """
+    if reference_amount <= 0:
+        raise ValueError("reference_amount must be positive")
+
+    sizes = {reference_amount}
+    if reference_usd and reference_usd > 0:
+        units_per_usd = reference_amount / reference_usd
+        for threshold in boundaries if boundaries is not None else tier_boundaries():
+            sizes.add(int(threshold * (1 - BOUNDARY_OFFSET) * units_per_usd))
+            sizes.add(int(threshold * units_per_usd))
+    else:
+        sizes.update(int(reference_amount * multiple) for multiple in FALLBACK_MULTIPLES)
+
+    ordered = sorted(size for size in sizes if size > 0)
+    if len(ordered) <= max_sizes:
+        return ordered
+    # Keep the sizes closest to the reference (on a log scale: ratio to it)
+    closest = sorted(ordered, key=lambda s: max(s, reference_amount) / min(s, reference_amount))
+    return sorted(closest[:max_sizes])
+
+
+def parse_sizes(sizes: Iterable[str]) -> List[int]:
+    """Validate client-supplied sizes; raises ValueError on non-positive or non-integer values."""
+    parsed = []
+    for size in sizes:
+        if not str(size).isdigit() or int(size) <= 0:
+            raise ValueError(f"Invalid size {size!r}: must be a positive integer amount in the smallest unit")
+        parsed.append(int(size))
+    return sorted(set(parsed))
+
+
+def quote_rate(net_amount_in: str, buy_amount: Optional[str]) -> Optional[float]:
+    """Output per net input unit, None when the quote has no usable output."""
+    if buy_amount is None or int(net_amount_in) <= 0 or int(buy_amount) <= 0:
+        return None
+    return int(buy_amount) / int(net_amount_in)
+
+
+def interpolate_rate(points: List[Tuple[int, float]], net_amount_in: int) -> Optional[float]:
+    """
+    Linearly interpolate the rate at net_amount_in between quoted points.
+
+    Args:
+        points: (net_amount_in, rate) pairs sorted by amount
+        net_amount_in: Size to estimate
+
+    Returns:
+        Interpolated rate, or None outside the quoted range
+    """
+    if not points:
+        return None
+    amounts = [amount for amount, _ in points]
+    index = bisect_left(amounts, net_amount_in)
+    if index < len(points) and amounts[index] == net_amount_in:
+        return points[index][1]
+    if index == 0 or index == len(points):
+        return None
+    (low_amount, low_rate), (high_amount, high_rate) = points[index - 1], points[index]
+    weight = (net_amount_in - low_amount) / (high_amount - low_amount)
+    return low_rate + (high_rate - low_rate) * weight
+
+
+def price_impact_pct(rate: float, reference_rate: float) -> float:
+    """Rate shortfall against the reference (smallest size) rate, in percent."""
+    if reference_rate <= 0:
+        return 0.0
+    return round((1 - rate / reference_rate) * 100, 4)
@@ -0,0 +1,116 @@
+"""
+Quote Payload Projection
+========================
+
+The swap-form preview reads a handful of fields from a quote, but the full
+0x v2 payload also carries route fills, token metadata and issues. Quote
+endpoints accept `view=preview|full` or `fields=a,b.c` and return only the
+selected fields (dotted paths keep the nested shape).
+
+Projections of cached quotes are computed once per cached entry and view
+(see EncodedJSON.projected), so a hot preview costs no more than a full hit.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+PROJECTION_MAX_FIELDS = 40
+
+# Fee fields attached to every quote (see build_fee_fields in server.py)
+FEE_FIELDS = (
+    "cohort",
+    "feeTier",
+    "feePercent",
+    "feeUsd",
+    "amountInUsd",
+    "netAmountIn",
+    "originalAmountIn",
+    "nextTier",
+    "notes",
+    "quoteVersion",
+    "platformFee",
+    "feeRecipient"
+)
+
+# Freshness markers on stale cached quotes
+STALE_FIELDS = ("stale", "cacheAgeSeconds")
+
+PREVIEW_FIELDS = {
+    # Firm 0x quote: amounts, gas, price impact, and what the wallet needs to sign
+    "evm": (
+        "chain",
+        "chain_id",
+        "sellToken",
+        "buyToken",
+        "sellAmount",
+        "buyAmount",
+        "minBuyAmount",
+        "estimatedPriceImpact",
+        "totalNetworkFee",
+        "source",
+        "transaction",
+        "issues.allowance",
+        *FEE_FIELDS,
+        *STALE_FIELDS
+    ),
+    # Jupiter quote: amounts and price impact (routePlan left out)
+    "solana": (
+        "chain",
+        "outputAmount",
+        "quote.inAmount",
+        "quote.outAmount",
+        "quote.otherAmountThreshold",
+        "quote.slippageBps",
+        "quote.priceImpactPct",
+        *FEE_FIELDS,
+        *STALE_FIELDS
+    )
+}
+
+
+def parse_projection(kind: str, view: Optional[str] = None, fields: Optional[str] = None) -> Optional[Tuple[str, ...]]:
+    """
+    Resolve the view/fields query parameters to field paths.
+
+    Args:
+        kind: "evm" or "solana" (selects the preview field set)
+        view: "preview" or "full" (default)
+        fields: Comma-separated field paths, overrides view
+
+    Returns:
+        Tuple of field paths, or None for the full payload
+
+    Raises:
+        ValueError: unknown view, or too many / empty fields
+    """
+    if fields:
+        paths = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        if not paths:
+            raise ValueError("fields must list at least one field")
+        if len(paths) > PROJECTION_MAX_FIELDS:
+            raise ValueError(f"Too many fields (max {PROJECTION_MAX_FIELDS})")
+        return paths
+    if view is None or view == "full":
+        return None
+    if view == "preview":
+        return PREVIEW_FIELDS[kind]
+    raise ValueError(f"Unsupported view: {view} (expected preview or full)")
+
+
+def project(data: Dict[str, Any], paths: Iterable[str]) -> Dict[str, Any]:
+    """Copy of `data` with only the given (dotted) paths; missing paths are skipped."""
+    result: Dict[str, Any] = {}
+    # Deepest paths first: a shorter path covering them then replaces the
+    # partial copy instead of writing into the source object
+    for path in sorted(paths, key=lambda p: -p.count(".")):
+        parts = path.split(".")
+        value: Any = data
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = result
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return result
@@ -8,6 +8,8 @@ from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 
+from deadline import max_time_ms
+
 # MongoDB connection
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 client = AsyncIOMotorClient(MONGO_URL)
@@ -29,7 +31,7 @@ async def get_or_create_referral_code(wallet_address: str) -> dict:
     wallet_lower = wallet_address.lower()
     
     # Check if user already has a code
-    existing = await referrals_collection.find_one({'wallet': wallet_lower})
+    existing = await referrals_collection.find_one({'wallet': wallet_lower}, max_time_ms=max_time_ms())
     
     if existing:
         return {
@@ -46,7 +48,7 @@ async def get_or_create_referral_code(wallet_address: str) -> dict:
     for _ in range(max_attempts):
         candidate = generate_referral_code()
         # Check if code already exists
-        if not await referrals_collection.find_one({'code': candidate}):
+        if not await referrals_collection.find_one({'code': candidate}, max_time_ms=max_time_ms()):
             code = candidate
             break
     
@@ -78,7 +80,7 @@ async def validate_referral_code(code: str) -> Optional[dict]:
     Returns referrer info or None
     """
     code_upper = code.upper()
-    referral = await referrals_collection.find_one({'code': code_upper})
+    referral = await referrals_collection.find_one({'code': code_upper}, max_time_ms=max_time_ms())
     
     if not referral:
         return None
@@ -98,7 +100,7 @@ async def redeem_referral_code(wallet_address: str, referral_code: str) -> dict:
     code_upper = referral_code.upper()
     
     # Check if user already redeemed a code
-    user = await users_collection.find_one({'wallet': wallet_lower})
+    user = await users_collection.find_one({'wallet': wallet_lower}, max_time_ms=max_time_ms())
     
     if user and user.get('redeemed_referral'):
         return {
@@ -108,7 +110,7 @@ async def redeem_referral_code(wallet_address: str, referral_code: str) -> dict:
         }
     
     # Validate referral code exists
-    referral = await referrals_collection.find_one({'code': code_upper})
+    referral = await referrals_collection.find_one({'code': code_upper}, max_time_ms=max_time_ms())
     
     if not referral:
         return {
@@ -168,7 +170,7 @@ async def check_free_swap_eligibility(wallet_address: str) -> dict:
     """
     wallet_lower = wallet_address.lower()
     
-    user = await users_collection.find_one({'wallet': wallet_lower})
+    user = await users_collection.find_one({'wallet': wallet_lower}, max_time_ms=max_time_ms())
     
     if not user:
         return {'eligible': False, 'code_used': None}
@@ -207,7 +209,7 @@ async def get_referral_stats(wallet_address: str) -> dict:
     """
     wallet_lower = wallet_address.lower()
     
-    referral = await referrals_collection.find_one({'wallet': wallet_lower})
+    referral = await referrals_collection.find_one({'wallet': wallet_lower}, max_time_ms=max_time_ms())
     
     if not referral:
         return {
@@ -0,0 +1,233 @@
+"""
+Upstream Resilience: Circuit Breakers and Bulkheads
+===================================================
+
+Per-upstream isolation for the pooled HTTP clients, so one slow or failing
+provider (e.g. Dexscreener during /token/resolve spikes) cannot tie up the
+event loop, sockets and memory that /evm/quote needs.
+
+- Bulkhead: concurrency semaphore per upstream; callers wait at most
+  BULKHEAD_MAX_WAIT seconds for a slot, then fail fast
+- Circuit breaker: rolling window of outcomes (errors, 5xx/429 and slow calls
+  count as failures). Opens when the failure rate crosses the threshold,
+  fails fast while open, then lets a single half-open probe decide whether
+  to close again
+
+Both raise UpstreamUnavailable, which endpoints turn into a 503 (or answer
+from the last cached value). Guards are used by http_pool.UpstreamSession.
+
+ENV (defaults for every upstream):
+- CIRCUIT_WINDOW_SECONDS / CIRCUIT_MIN_REQUESTS / CIRCUIT_FAILURE_RATE
+- CIRCUIT_SLOW_CALL_SECONDS / CIRCUIT_OPEN_SECONDS
+- BULKHEAD_MAX_WAIT
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_WINDOW_SECONDS = float(os.getenv('CIRCUIT_WINDOW_SECONDS', '30'))
+CIRCUIT_MIN_REQUESTS = int(os.getenv('CIRCUIT_MIN_REQUESTS', '10'))
+CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', '0.5'))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', '5'))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '15'))
+BULKHEAD_MAX_WAIT = float(os.getenv('BULKHEAD_MAX_WAIT', '1.0'))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailable(Exception):
+    """Call rejected without reaching the upstream (circuit open or bulkhead full)."""
+
+    def __init__(self, upstream: str, reason: str, retry_after: float = 1.0):
+        super().__init__(f"{upstream} unavailable ({reason})")
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker with single-probe half-open state."""
+
+    def __init__(
+        self,
+        name: str,
+        window: float = CIRCUIT_WINDOW_SECONDS,
+        min_requests: int = CIRCUIT_MIN_REQUESTS,
+        failure_rate: float = CIRCUIT_FAILURE_RATE,
+        slow_call_seconds: float = CIRCUIT_SLOW_CALL_SECONDS,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS
+    ):
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+
+        self.state = CLOSED
+        self._outcomes: deque = deque()  # (timestamp, failed)
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Metrics
+        self.opened = 0
+        self.rejected = 0
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def allow(self) -> None:
+        """Raise UpstreamUnavailable unless a call may proceed now."""
+        if self.state == CLOSED:
+            return
+        now = time.monotonic()
+        if self.state == OPEN:
+            remaining = self._opened_at + self.open_seconds - now
+            if remaining > 0:
+                self.rejected += 1
+                raise UpstreamUnavailable(self.name, "circuit_open", retry_after=remaining)
+            self.state = HALF_OPEN
+            logger.info(f"Circuit {self.name} half-open - probing")
+        if self._probe_in_flight:
+            self.rejected += 1
+            raise UpstreamUnavailable(self.name, "circuit_half_open", retry_after=1.0)
+        self._probe_in_flight = True
+
+    def record(self, success: bool, latency: float) -> None:
+        """Record the outcome of an allowed call."""
+        failed = not success or latency > self.slow_call_seconds
+        now = time.monotonic()
+
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            if failed:
+                self._open(now)
+            else:
+                self.state = CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+                logger.info(f"Circuit {self.name} closed")
+            return
+
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        self._trim(now)
+        total = len(self._outcomes)
+        if total >= self.min_requests and self._failures / total >= self.failure_rate:
+            self._open(now)
+
+    def release_probe(self) -> None:
+        """Forget a half-open probe that ended without an outcome (e.g. cancelled)."""
+        self._probe_in_flight = False
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self.opened += 1
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds:.0f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        self._trim(time.monotonic())
+        total = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_requests": total,
+            "window_failure_rate": round(self._failures / total, 4) if total else None,
+            "opened": self.opened,
+            "rejected": self.rejected
+        }
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded wait for a slot."""
+
+    def __init__(self, name: str, max_concurrent: int, max_wait: float = BULKHEAD_MAX_WAIT):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise UpstreamUnavailable(self.name, "bulkhead_full", retry_after=self.max_wait)
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "rejected": self.rejected
+        }
+
+
+class UpstreamGuard:
+    """Bulkhead + circuit breaker for one upstream."""
+
+    def __init__(self, name: str, max_concurrent: int, breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.bulkhead = Bulkhead(name, max_concurrent)
+        self.breaker = breaker or CircuitBreaker(name)
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold a bulkhead slot for one upstream call.
+        Yields a callback `record(success)` - calls that exit without recording
+        (e.g. exceptions) count as failures; cancellation and record(None)
+        count as neither.
+        """
+        self.breaker.allow()
+        try:
+            await self.bulkhead.acquire()
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+
+        start = time.monotonic()
+        recorded = False
+
+        def record(success: Optional[bool]) -> None:
+            nonlocal recorded
+            recorded = True
+            if success is None:
+                self.breaker.release_probe()
+            else:
+                self.breaker.record(success, time.monotonic() - start)
+
+        try:
+            yield record
+        except Exception:
+            if not recorded:
+                record(False)
+            raise
+        finally:
+            self.bulkhead.release()
+            if not recorded:
+                self.breaker.release_probe()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.stats(),
+            "bulkhead": self.bulkhead.stats()
+        }
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -9,13 +9,42 @@ from slowapi.errors import RateLimitExceeded
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import httpx
 import asyncio
-import hashlib
+import json
+
+from singleflight import SingleFlight
+from latest_wins import LatestWins, Superseded, taker_scope
+from stream_hub import StreamHub
+from json_bytes import EncodedJSON, decoded
+from discovery_results import finish_result, source_skipped, stale_result
+from deadline import DeadlineMiddleware, DeadlineExceeded, detached, max_time_ms, deadline_stats
+from hot_logging import setup_logging, log_event, logging_stats
+from quote_projection import parse_projection, project
+from price_buckets import bucket_amount, scale_amount
+from write_behind import WriteBehindBuffer
+from token_pricing import TokenPricingService
+from solana_pricing import SolanaPricingService
+from ttl_cache import TTLCache, cache_stats, purge_all_expired
+from shared_cache import SharedCacheStore, TieredCache
+from resilience import UpstreamUnavailable
+from upstream_budget import PRIORITY_QUOTE, PRIORITY_PRICE, PRIORITY_DISCOVERY
+from aggregators import BestRouteQuoter, ZeroExAdapter, KyberSwapAdapter, AggregatorError
+from quote_ladder import (
+    ladder_sizes,
+    parse_sizes,
+    quote_rate,
+    interpolate_rate,
+    price_impact_pct,
+    tier_boundaries,
+    QUOTE_LADDER_MAX_SIZES,
+    QUOTE_LADDER_CONCURRENCY,
+    QUOTE_LADDER_ITEM_TIMEOUT
+)
 
 # Import tiered fee calculator
 from fee_calculator import (
@@ -30,17 +59,28 @@ from ab_testing import (
     get_user_cohort,
     get_cohort_fee_info,
     log_cohort_event,
+    wallet_hash,
     CONTROL_FEE_PERCENT
 )
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Pooled upstream HTTP clients (imported after .env so upstream URLs resolve)
+from http_pool import http_pool
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Write-behind buffers: fire-and-forget inserts are batched off the request path
+write_buffers = {
+    "ab_test_events": WriteBehindBuffer(db.ab_test_events, "ab_test_events"),
+    "swaps": WriteBehindBuffer(db.swaps, "swaps"),
+    "swap_referrals": WriteBehindBuffer(db.swap_referrals, "swap_referrals")
+}
+
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
@@ -52,10 +92,56 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Simple in-memory cache for quotes
-quote_cache = {}
+# Bounded in-memory cache for quotes (LRU; entries expire at the chain's hard TTL).
+# Expired indicative prices stay available for UPSTREAM_STALE_GRACE seconds and are
+# served (marked stale) while 0x is unavailable - firm quotes never are.
+QUOTE_CACHE_MAX_ENTRIES = int(os.getenv('QUOTE_CACHE_MAX_ENTRIES', '10000'))
+UPSTREAM_STALE_GRACE = float(os.getenv('UPSTREAM_STALE_GRACE', '600'))
+quote_cache = TTLCache("quotes", max_entries=QUOTE_CACHE_MAX_ENTRIES, stale_ttl=UPSTREAM_STALE_GRACE)
 CACHE_TTL = 10  # seconds
 
+# Optional cross-worker tier (SHARED_CACHE_URL) behind the in-process caches
+shared_cache = SharedCacheStore.from_env()
+quote_store = TieredCache(quote_cache, shared_cache)
+
+# Optional stale-while-revalidate mode: between the soft and hard TTL a cached
+# quote is served immediately (marked with its age) and refreshed once in the
+# background. Past the hard TTL the request waits for upstream as usual.
+QUOTE_CACHE_SWR_ENABLED = os.getenv('QUOTE_CACHE_SWR_ENABLED', 'false').lower() == 'true'
+QUOTE_CACHE_SOFT_TTL = float(os.getenv('QUOTE_CACHE_SOFT_TTL', str(CACHE_TTL)))
+QUOTE_CACHE_HARD_TTL = float(os.getenv('QUOTE_CACHE_HARD_TTL', '30'))
+
+# Per-chain freshness cap for executable calldata (seconds), e.g. {"ethereum": 12, "solana": 20}
+def load_quote_max_stale():
+    max_stale_json = os.getenv('QUOTE_CACHE_MAX_STALE')
+    if max_stale_json:
+        try:
+            return {chain.lower(): float(ttl) for chain, ttl in json.loads(max_stale_json).items()}
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+            print("WARNING: Invalid QUOTE_CACHE_MAX_STALE, using QUOTE_CACHE_HARD_TTL for all chains")
+    return {}
+
+QUOTE_CACHE_MAX_STALE = load_quote_max_stale()
+
+# Batch quotes: max items per call, concurrent upstream fetches per batch, per-item timeout
+BATCH_QUOTE_MAX_ITEMS = int(os.getenv('BATCH_QUOTE_MAX_ITEMS', '25'))
+BATCH_QUOTE_CONCURRENCY = int(os.getenv('BATCH_QUOTE_CONCURRENCY', '5'))
+BATCH_QUOTE_ITEM_TIMEOUT = float(os.getenv('BATCH_QUOTE_ITEM_TIMEOUT', '15'))
+
+# Live quote streams: refresh interval per subscribed key, how long a key without
+# subscribers keeps refreshing, SSE keep-alive, subscriptions per WebSocket
+QUOTE_STREAM_INTERVAL = float(os.getenv('QUOTE_STREAM_INTERVAL', '5'))
+QUOTE_STREAM_IDLE_TTL = float(os.getenv('QUOTE_STREAM_IDLE_TTL', '30'))
+QUOTE_STREAM_KEEPALIVE = 15  # seconds
+QUOTE_STREAM_MAX_PER_SOCKET = int(os.getenv('QUOTE_STREAM_MAX_PER_SOCKET', '10'))
+
+# Coalesces concurrent identical quote fetches (keyed by the quote cache key)
+quote_flight = SingleFlight("quotes", cancel_abandoned=True)
+# Newest quote request per wallet + pair; older ones waiting on upstream are cancelled
+quote_requests = LatestWins("quotes")
+# One refresh loop per streamed chain + pair + size bucket, fanned out to all subscribers
+quote_streams = StreamHub("quotes", interval=QUOTE_STREAM_INTERVAL, idle_ttl=QUOTE_STREAM_IDLE_TTL)
+
 # Chain configuration
 CHAIN_CONFIG = {
     "ethereum": {
@@ -139,6 +225,13 @@ class EVMQuoteRequest(BaseModel):
     takerAddress: str
     chain: str = "ethereum"
 
+class EVMPriceRequest(BaseModel):
+    sellToken: str
+    buyToken: str
+    sellAmount: str
+    takerAddress: Optional[str] = None  # Only used for the fee cohort, never sent upstream
+    chain: str = "ethereum"
+
 class SolanaQuoteRequest(BaseModel):
     inputMint: str
     outputMint: str
@@ -146,6 +239,24 @@ class SolanaQuoteRequest(BaseModel):
     slippageBps: int = 50
     takerPublicKey: str
 
+class BatchQuoteItem(BaseModel):
+    type: str  # "evm" or "solana"
+    params: Dict[str, Any]  # EVMQuoteRequest / SolanaQuoteRequest fields
+
+class BatchQuoteRequest(BaseModel):
+    quotes: List[BatchQuoteItem]
+    itemTimeout: Optional[float] = None  # seconds, capped at BATCH_QUOTE_ITEM_TIMEOUT
+
+class QuoteLadderRequest(BaseModel):
+    sellToken: str  # token address, or input mint on Solana
+    buyToken: str
+    chain: str = "ethereum"  # EVM chain or "solana"
+    sellAmount: Optional[str] = None  # reference size: ladder generated around the fee tiers
+    sizes: Optional[List[str]] = None  # explicit sizes (smallest unit), overrides generation
+    interpolate: Optional[List[str]] = None  # extra sizes answered by interpolation only
+    takerAddress: Optional[str] = None  # only used for the fee cohort
+    slippageBps: int = 50  # Solana only
+
 @api_router.get("/")
 async def root():
     return {
@@ -157,21 +268,45 @@ async def root():
 
 @api_router.get("/health")
 async def health_check():
+    pool_stats = http_pool.stats()
+    open_circuits = [
+        upstream for upstream, stats in pool_stats["upstreams"].items()
+        if stats["circuit"]["state"] != "closed"
+    ]
     return {
-        "status": "healthy",
+        "status": "degraded" if open_circuits else "healthy",
+        "open_circuits": open_circuits,
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "cache_size": len(quote_cache),
-        "chains_configured": list(CHAIN_CONFIG.keys())
+        "chains_configured": list(CHAIN_CONFIG.keys()),
+        "http_pool": pool_stats,
+        "quote_single_flight": quote_flight.stats(),
+        "quote_latest_wins": quote_requests.stats(),
+        "quote_streams": quote_streams.stats(),
+        "request_deadlines": deadline_stats(),
+        "logging": logging_stats(),
+        "write_behind": {name: buffer.stats() for name, buffer in write_buffers.items()},
+        "coalesced_writes": {"pump_tokens": pump_persistence_stats()},
+        "token_pricing": token_pricing.stats(),
+        "solana_pricing": solana_pricing.stats(),
+        "best_route": best_route_quoter.stats(),
+        "caches": cache_stats(),
+        "shared_cache": shared_cache.stats()
     }
 
-# Price cache for USD valuation
-price_cache = {}
-PRICE_CACHE_TTL = 60  # 1 minute
+# USD valuation for the tiered-fee path (decimals-aware, refreshed in the background)
+token_pricing = TokenPricingService(
+    db.token_metadata,
+    {chain: config["rpc"] for chain, config in CHAIN_CONFIG.items() if chain != "solana"}
+)
+
+solana_pricing = SolanaPricingService(db.token_metadata, CHAIN_CONFIG["solana"]["rpc"])
 
 async def get_token_price_usd(token_address: str, chain: str, amount_wei: str) -> Optional[float]:
     """
-    Get USD value of token amount using same price sources as swap path.
-    Returns None if price unavailable.
+    Get USD value of token amount from the in-memory price table.
+    Never waits on a price provider: returns None on a miss (fallback fee)
+    and queues the token for an asynchronous metadata/price fill.
     
     Args:
         token_address: Token contract address
@@ -181,88 +316,167 @@ async def get_token_price_usd(token_address: str, chain: str, amount_wei: str) -
     Returns:
         USD value or None
     """
-    cache_key = f"{chain}:{token_address}"
-    
-    # Check cache
-    if cache_key in price_cache:
-        cached_price, cached_time = price_cache[cache_key]
-        if (datetime.now(timezone.utc).timestamp() - cached_time) < PRICE_CACHE_TTL:
-            try:
-                amount_decimal = float(amount_wei) / (10 ** 18)  # Assume 18 decimals
-                return amount_decimal * cached_price
-            except:
-                return None
-    
     try:
-        # Use CoinGecko or similar price API
-        # For now, we'll use a simple heuristic based on common tokens
-        # In production, integrate with your existing price oracle
-        
-        # Placeholder: Try to get price from 0x price API or CoinGecko
-        # This should use the SAME oracle as your swap routing
-        
-        # For common tokens, use approximate prices (this should be replaced with real oracle)
-        common_prices = {
-            "ethereum": {
-                "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee": 3500.0,  # ETH
-                "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48": 1.0,      # USDC
-                "0xdac17f958d2ee523a2206206994597c13d831ec7": 1.0,      # USDT
-            },
-            "bsc": {
-                "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee": 670.0,   # BNB
-                "0x8ac76a51cc950d9822d68b83fe1ad97b32cd580d": 1.0,     # USDC
-            },
-            "polygon": {
-                "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee": 0.37,    # MATIC
-                "0x2791bca1f2de4661ed88a30c99a7a9449aa84174": 1.0,     # USDC
-            }
-        }
-        
-        price_usd = common_prices.get(chain, {}).get(token_address.lower())
-        
-        if price_usd:
-            price_cache[cache_key] = (price_usd, datetime.now(timezone.utc).timestamp())
-            amount_decimal = float(amount_wei) / (10 ** 18)
-            return amount_decimal * price_usd
-            
-        return None
-        
-    except Exception as e:
+        return token_pricing.value_usd(chain, token_address, amount_wei)
+    except (ValueError, TypeError) as e:
         logger.error(f"Error getting token price: {e}")
         return None
 
 
-@api_router.post("/evm/quote")
-async def get_evm_quote(request: EVMQuoteRequest):
+def get_quote_soft_ttl(chain: str) -> float:
+    """Age up to which a cached quote is served as fresh."""
+    if not QUOTE_CACHE_SWR_ENABLED:
+        return CACHE_TTL
+    return min(QUOTE_CACHE_SOFT_TTL, get_quote_hard_ttl(chain))
+
+def get_quote_hard_ttl(chain: str) -> float:
+    """Age after which a cached quote is never served (capped per chain)."""
+    if not QUOTE_CACHE_SWR_ENABLED:
+        return CACHE_TTL
+    return min(QUOTE_CACHE_HARD_TTL, QUOTE_CACHE_MAX_STALE.get(chain, QUOTE_CACHE_HARD_TTL))
+
+async def get_cached_quote(cache_key: str, chain: str) -> Optional[tuple]:
     """
-    Get swap quote for EVM chains (Ethereum, BSC, Polygon) via 0x API
+    Look up a cached quote (in-process first, then the shared tier).
     
-    NEW IN v1-tiered:
-    - Dynamic tiered fees based on trade USD value
-    - No custody: fee applied by reducing input amount
-    - Returns: feeTier, feePercent, feeUsd, netAmountIn, quoteVersion
+    Returns:
+        (quote, age_seconds) if the entry is younger than the hard TTL, else None
     """
-    chain = request.chain.lower()
-    
-    if chain not in ["ethereum", "bsc", "polygon"]:
-        raise HTTPException(status_code=400, detail=f"Unsupported EVM chain: {chain}")
+    cached = await quote_store.get_entry(cache_key)
+    if cached is not None and cached[1] < get_quote_hard_ttl(chain):
+        return cached
+    return None
+
+# Strong references to background refresh tasks (asyncio keeps only weak ones)
+_quote_refresh_tasks = set()
+
+def schedule_quote_refresh(cache_key: str, fetch) -> None:
+    """Refresh a stale quote in the background - at most one refresh per key."""
+    if quote_flight.inflight(cache_key):
+        return
     
-    chain_config = CHAIN_CONFIG[chain]
+    async def _refresh():
+        try:
+            await quote_flight.do(cache_key, detached(fetch))
+        except Exception as e:
+            logger.warning(f"Background quote refresh failed for {cache_key}: {e}")
     
-    # Step 1: Determine A/B cohort
-    cohort = get_user_cohort(request.takerAddress)
+    task = asyncio.create_task(_refresh())
+    _quote_refresh_tasks.add(task)
+    task.add_done_callback(_quote_refresh_tasks.discard)
+
+async def run_latest_quote(scope: str, cache_key: str, fetch) -> Dict[str, Any]:
+    """
+    Wait for a quote as the newest request of its wallet + pair scope.
+    A superseded request answers 409; its upstream fetch is cancelled unless
+    another request is still waiting for the same cache key.
+    """
+    try:
+        return await quote_requests.run(scope, lambda: quote_flight.do(cache_key, detached(fetch)))
+    except Superseded:
+        raise HTTPException(status_code=409, detail="Superseded by a newer quote request")
+
+def mark_stale_quote(cached_data: Any, age: float) -> Dict[str, Any]:
+    """Copy of a stale cached quote annotated with its age."""
+    return {**decoded(cached_data), "cacheAgeSeconds": round(age, 1), "stale": True}
+
+def cached_response(value: Any) -> Any:
+    """Pre-encoded cache entries go out as raw bytes; plain values through FastAPI's encoder."""
+    if isinstance(value, EncodedJSON):
+        return Response(content=value.body, media_type="application/json")
+    return value
+
+def parse_quote_view(kind: str, view: Optional[str], fields: Optional[str]) -> Optional[tuple]:
+    """Field paths selected by a quote endpoint's view/fields parameters (None = full payload)."""
+    try:
+        return parse_projection(kind, view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def projected_response(value: Any, paths: Optional[tuple]) -> Any:
+    """cached_response of a quote projected to `paths` - computed once per cached entry."""
+    if paths is None:
+        return cached_response(value)
+    if isinstance(value, EncodedJSON):
+        return cached_response(value.projected(",".join(paths), lambda data: project(data, paths)))
+    return project(value, paths)
+
+def upstream_unavailable_error(e: UpstreamUnavailable) -> HTTPException:
+    """503 for a call rejected by an upstream's circuit breaker or bulkhead."""
+    return HTTPException(
+        status_code=503,
+        detail=f"Upstream temporarily unavailable: {e}",
+        headers={"Retry-After": str(max(1, round(e.retry_after)))}
+    )
+
+async def upstream_unavailable_handler(request: Request, exc: UpstreamUnavailable) -> JSONResponse:
+    """Endpoints without their own fallback answer 503 instead of 500."""
+    error = upstream_unavailable_error(exc)
+    return JSONResponse(status_code=error.status_code, content={"detail": error.detail}, headers=error.headers)
+
+app.add_exception_handler(UpstreamUnavailable, upstream_unavailable_handler)
+
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    """The request's time budget ran out before an upstream call or query could start."""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+app.add_exception_handler(DeadlineExceeded, deadline_exceeded_handler)
+
+def serve_stale_discovery(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Last known discovery result (within UPSTREAM_STALE_GRACE) for when its upstream fails."""
+    return stale_result(discovery_store, cache_key)
+
+def get_zerox_headers() -> Dict[str, str]:
+    """Headers for 0x API v2 requests."""
+    headers = {
+        "0x-version": "v2"
+    }
+    api_key = os.environ.get('ZEROX_API_KEY')
+    if api_key:
+        headers["0x-api-key"] = api_key
+    return headers
+
+def get_evm_fee_recipient(chain: str) -> Optional[str]:
+    fee_recipient = os.environ.get('FEE_RECIPIENT_EVM')
+    if chain == "polygon":
+        fee_recipient = os.environ.get('FEE_RECIPIENT_POLY', fee_recipient)
+    return fee_recipient
+
+def build_fee_fields(cohort: str, fee_info: Dict[str, Any], net_amount_in: str, original_amount_in: str) -> Dict[str, Any]:
+    """Tiered fee fields attached to every quote/price response."""
+    return {
+        "cohort": cohort,  # A/B test cohort
+        "feeTier": fee_info["fee_tier"],
+        "feePercent": fee_info["fee_percent"],
+        "feeUsd": fee_info["fee_usd"],
+        "amountInUsd": fee_info["amount_in_usd"],
+        "netAmountIn": net_amount_in,
+        "originalAmountIn": original_amount_in,
+        "nextTier": fee_info["next_tier"],
+        "notes": fee_info["notes"],
+        "quoteVersion": fee_info["quote_version"],
+        
+        # Legacy field for backward compatibility
+        "platformFee": f"{fee_info['fee_percent']}%"
+    }
+
+async def calculate_evm_fee(chain: str, sell_token: str, sell_amount: str, cohort: str) -> tuple:
+    """
+    Calculate the platform fee for an EVM trade based on the user's cohort.
     
-    # Step 2: Calculate USD value and fee based on cohort
+    Returns:
+        (fee_info, net_amount_in) - net amount is the sell amount after fee deduction
+    """
     fee_info = None
-    net_amount_in = request.sellAmount
+    net_amount_in = sell_amount
     
     if FEE_TIERED_ENABLED:
         try:
             # Get USD value of input amount
             amount_usd = await get_token_price_usd(
-                request.sellToken,
+                sell_token,
                 chain,
-                request.sellAmount
+                sell_amount
             )
             
             if amount_usd is not None:
@@ -276,25 +490,24 @@ async def get_evm_quote(request: EVMQuoteRequest):
                     fee_info["cohort"] = "tiered"
                 
                 # Calculate net amount after fee deduction
-                net_amount_in = calculate_net_amount_in(request.sellAmount, fee_info)
+                net_amount_in = calculate_net_amount_in(sell_amount, fee_info)
                 
-                logger.info(
-                    f"A/B Test | Cohort: {cohort} | {amount_usd:.2f} USD → "
-                    f"Tier {fee_info['fee_tier']} ({fee_info['fee_percent']}%) → "
-                    f"Fee: ${fee_info['fee_usd']:.2f}"
+                log_event(
+                    logger, "quote.fee", chain=chain, cohort=cohort, amount_usd=round(amount_usd, 2),
+                    tier=fee_info["fee_tier"], fee_percent=fee_info["fee_percent"], fee_usd=fee_info["fee_usd"]
                 )
             else:
                 # Fallback if USD price unavailable
                 fee_info = get_fallback_fee("Token price not available")
                 fee_info["cohort"] = cohort
-                net_amount_in = calculate_net_amount_in(request.sellAmount, fee_info)
-                logger.warning(f"Using fallback fee for {chain}:{request.sellToken}")
+                net_amount_in = calculate_net_amount_in(sell_amount, fee_info)
+                logger.warning(f"Using fallback fee for {chain}:{sell_token}")
                 
         except Exception as e:
             logger.error(f"Error calculating tiered fee: {e}")
             fee_info = get_fallback_fee(f"Fee calculation error: {str(e)}")
             fee_info["cohort"] = cohort
-            net_amount_in = calculate_net_amount_in(request.sellAmount, fee_info)
+            net_amount_in = calculate_net_amount_in(sell_amount, fee_info)
     else:
         # Feature flag disabled: use legacy fixed fee
         fee_info = {
@@ -307,22 +520,87 @@ async def get_evm_quote(request: EVMQuoteRequest):
             "notes": "Legacy fixed fee (0.2%)",
             "quote_version": "v1-legacy"
         }
-        net_amount_in = request.sellAmount
+        net_amount_in = sell_amount
+    
+    return fee_info, net_amount_in
+
+@api_router.post("/evm/quote")
+async def get_evm_quote(
+    request: EVMQuoteRequest,
+    view: Optional[str] = Query(None, description="preview or full (default)"),
+    fields: Optional[str] = Query(None, description="Comma-separated field paths, overrides view")
+):
+    """
+    Get swap quote for EVM chains (Ethereum, BSC, Polygon) via 0x API
+    
+    NEW IN v1-tiered:
+    - Dynamic tiered fees based on trade USD value
+    - No custody: fee applied by reducing input amount
+    - Returns: feeTier, feePercent, feeUsd, netAmountIn, quoteVersion
+    
+    view=preview returns amounts, fee fields, gas, price impact, allowance
+    and the transaction only (no route fills / token metadata).
+    
+    A newer request for the same taker and pair cancels this one (409);
+    requests without a wallet (zero-address taker) are never superseded.
+    """
+    paths = parse_quote_view("evm", view, fields)
+    return projected_response(await evm_quote(request, latest_wins=True), paths)
+
+async def evm_quote(request: EVMQuoteRequest, latest_wins: bool = False) -> Any:
+    """
+    EVM quote path shared by /evm/quote and /quotes/batch.
+    Returns the cached EncodedJSON body, or a plain dict for a stale entry.
+    """
+    chain = request.chain.lower()
+    
+    if chain not in ["ethereum", "bsc", "polygon"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported EVM chain: {chain}")
+    
+    # Step 1: Determine A/B cohort
+    cohort = get_user_cohort(request.takerAddress)
+    
+    # Step 2: Calculate USD value and fee based on cohort
+    fee_info, net_amount_in = await calculate_evm_fee(chain, request.sellToken, request.sellAmount, cohort)
     
     # Step 2: Create cache key with net amount
     cache_key = f"{chain}:{request.sellToken}:{request.buyToken}:{net_amount_in}:{request.takerAddress}"
     
-    # Check cache
-    if cache_key in quote_cache:
-        cached_data, cached_time = quote_cache[cache_key]
-        if (datetime.now(timezone.utc).timestamp() - cached_time) < CACHE_TTL:
-            logger.info(f"Returning cached EVM quote for {chain}")
+    fetch = lambda: _fetch_evm_quote(request, chain, cohort, fee_info, net_amount_in, cache_key)
+    
+    # Check cache (stale entries are served while one background refresh runs)
+    cached = await get_cached_quote(cache_key, chain)
+    if cached:
+        cached_data, age = cached
+        if age < get_quote_soft_ttl(chain):
+            log_event(logger, "quote.cache", chain=chain, state="fresh")
             return cached_data
+        schedule_quote_refresh(cache_key, fetch)
+        log_event(logger, "quote.cache", chain=chain, state="stale", age=round(age, 1))
+        return mark_stale_quote(cached_data, age)
+    
+    # Step 3: Fetch from 0x - concurrent identical requests share one upstream call
+    scope = taker_scope(request.takerAddress.lower(), chain, request.sellToken.lower(), request.buyToken.lower())
+    if latest_wins and scope:
+        return await run_latest_quote(scope, cache_key, fetch)
+    return await quote_flight.do(cache_key, detached(fetch))
+
+async def _fetch_evm_quote(
+    request: EVMQuoteRequest,
+    chain: str,
+    cohort: str,
+    fee_info: Dict[str, Any],
+    net_amount_in: str,
+    cache_key: str
+) -> Dict[str, Any]:
+    """
+    Fetch a 0x v2 quote for the net amount, attach fee fields and cache it.
+    Runs once per cache key across concurrent requests (see quote_flight).
+    """
+    chain_config = CHAIN_CONFIG[chain]
     
     # Get fee configuration
-    fee_recipient = os.environ.get('FEE_RECIPIENT_EVM')
-    if chain == "polygon":
-        fee_recipient = os.environ.get('FEE_RECIPIENT_POLY', fee_recipient)
+    fee_recipient = get_evm_fee_recipient(chain)
     
     # NOTE: We no longer use buyTokenPercentageFee in 0x API
     # Instead, we reduce the input amount by our fee
@@ -337,18 +615,12 @@ async def get_evm_quote(request: EVMQuoteRequest):
         "taker": request.takerAddress
     }
     
-    headers = {
-        "0x-version": "v2"
-    }
-    api_key = os.environ.get('ZEROX_API_KEY')
-    if api_key:
-        headers["0x-api-key"] = api_key
+    headers = get_zerox_headers()
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
+        async with http_pool.session("zerox", timeout=30.0, priority=PRIORITY_QUOTE) as http_client:
             api_url = f"{chain_config['api_base']}/swap/allowance-holder/quote"
             
-            logger.info(f"Requesting 0x v2 quote: {api_url}")
             
             response = await http_client.get(
                 api_url,
@@ -356,7 +628,7 @@ async def get_evm_quote(request: EVMQuoteRequest):
                 headers=headers
             )
             
-            logger.info(f"0x API v2 response status: {response.status_code}")
+            log_event(logger, "quote.upstream", upstream="zerox", chain=chain, status=response.status_code)
             
             if response.status_code == 200:
                 quote_data = response.json()
@@ -367,19 +639,7 @@ async def get_evm_quote(request: EVMQuoteRequest):
                 quote_data["feeRecipient"] = fee_recipient
                 
                 # NEW: Add tiered fee fields (non-breaking)
-                quote_data["cohort"] = cohort  # A/B test cohort
-                quote_data["feeTier"] = fee_info["fee_tier"]
-                quote_data["feePercent"] = fee_info["fee_percent"]
-                quote_data["feeUsd"] = fee_info["fee_usd"]
-                quote_data["amountInUsd"] = fee_info["amount_in_usd"]
-                quote_data["netAmountIn"] = net_amount_in
-                quote_data["originalAmountIn"] = request.sellAmount
-                quote_data["nextTier"] = fee_info["next_tier"]
-                quote_data["notes"] = fee_info["notes"]
-                quote_data["quoteVersion"] = fee_info["quote_version"]
-                
-                # Legacy field for backward compatibility
-                quote_data["platformFee"] = f"{fee_info['fee_percent']}%"
+                quote_data.update(build_fee_fields(cohort, fee_info, net_amount_in, request.sellAmount))
                 
                 # Ensure critical fields exist
                 if not quote_data.get("transaction") or not quote_data["transaction"].get("data"):
@@ -399,24 +659,24 @@ async def get_evm_quote(request: EVMQuoteRequest):
                         fee_usd=fee_info.get("fee_usd"),
                         chain=chain
                     )
-                    await db.ab_test_events.insert_one(cohort_log)
+                    write_buffers["ab_test_events"].add(cohort_log)
                 except Exception as e:
                     logger.error(f"Failed to log cohort event: {e}")
                 
                 # Log swap for analytics (pseudonymized)
                 if request.takerAddress:
-                    wallet_hash = hashlib.sha256(request.takerAddress.encode()).hexdigest()[:16]
-                    logger.info(
-                        f"EVM Quote | Cohort: {cohort} | Wallet: {wallet_hash} | Chain: {chain} | "
-                        f"Route: {request.sellToken[:6]}→{request.buyToken[:6]} | "
-                        f"Amount: ${fee_info.get('amount_in_usd', 'N/A')} | "
-                        f"Tier: {fee_info['fee_tier']} | Fee: {fee_info['fee_percent']}% (${fee_info.get('fee_usd', 'N/A')})"
+                    log_event(
+                        logger, "quote.fetched", chain=chain, cohort=cohort,
+                        wallet=wallet_hash(request.takerAddress),
+                        sell_token=request.sellToken, buy_token=request.buyToken,
+                        amount_usd=fee_info.get("amount_in_usd"), tier=fee_info["fee_tier"],
+                        fee_percent=fee_info["fee_percent"], fee_usd=fee_info.get("fee_usd")
                     )
                 
-                # Cache the response
-                quote_cache[cache_key] = (quote_data, datetime.now(timezone.utc).timestamp())
-                logger.info(f"EVM quote fetched for {chain}: {request.sellToken} -> {request.buyToken}")
-                return quote_data
+                # Cache the response body, encoded once for every hit
+                encoded = EncodedJSON.encode(quote_data)
+                await quote_store.set(cache_key, encoded, ttl=get_quote_hard_ttl(chain))
+                return encoded
             else:
                 error_detail = response.text
                 logger.error(f"0x API v2 error on {chain}: {response.status_code} - {error_detail}")
@@ -424,41 +684,239 @@ async def get_evm_quote(request: EVMQuoteRequest):
                     status_code=response.status_code,
                     detail=f"0x API v2 error: {error_detail}"
                 )
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable_error(e)
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Request to 0x API timed out")
     except Exception as e:
         logger.error(f"Error fetching EVM quote: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching quote: {str(e)}")
 
-@api_router.post("/solana/quote")
-async def get_solana_quote(request: SolanaQuoteRequest):
+# Aggregators queried by /evm/quote/best-route (BEST_ROUTE_SOURCES, comma-separated)
+BEST_ROUTE_ADAPTERS = {
+    "0x": lambda: ZeroExAdapter(get_zerox_headers),
+    "kyberswap": lambda: KyberSwapAdapter()
+}
+best_route_quoter = BestRouteQuoter([
+    BEST_ROUTE_ADAPTERS[name.strip().lower()]()
+    for name in os.getenv('BEST_ROUTE_SOURCES', '0x,kyberswap').split(",")
+    if name.strip().lower() in BEST_ROUTE_ADAPTERS
+])
+
+@api_router.post("/evm/quote/best-route")
+async def get_evm_best_route_quote(
+    request: EVMQuoteRequest,
+    view: Optional[str] = Query(None, description="preview or full (default)"),
+    fields: Optional[str] = Query(None, description="Comma-separated field paths, overrides view")
+):
     """
-    Get swap quote for Solana via Jupiter API
+    Get the best executable EVM quote across aggregators (0x, KyberSwap)
     
-    NEW IN v1-tiered:
-    - Dynamic tiered fees based on trade USD value
-    - No custody: fee applied by reducing input amount before routing
-    - Returns: feeTier, feePercent, feeUsd, netAmountIn, quoteVersion
+    - Same fee model and 0x-shaped response as /evm/quote, from the winning source
+    - `source` names the winner; `quotes` lists every responder (BestRouteComparison)
+    - Answers once all sources responded or BEST_ROUTE_DEADLINE passed; slow sources
+      get a hedged duplicate request after their p95 latency
+    - Same view/fields projection as /evm/quote
     """
+    paths = parse_quote_view("evm", view, fields)
+    chain = request.chain.lower()
     
-    # Step 1: Determine A/B cohort
-    cohort = get_user_cohort(request.takerPublicKey)
+    if chain not in ["ethereum", "bsc", "polygon"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported EVM chain: {chain}")
     
-    # Step 2: Calculate USD value and fee based on cohort
+    cohort = get_user_cohort(request.takerAddress)
+    fee_info, net_amount_in = await calculate_evm_fee(chain, request.sellToken, request.sellAmount, cohort)
+    
+    cache_key = f"{chain}:best:{request.sellToken}:{request.buyToken}:{net_amount_in}:{request.takerAddress}"
+    
+    cached = await get_cached_quote(cache_key, chain)
+    if cached and cached[1] < get_quote_soft_ttl(chain):
+        return projected_response(cached[0], paths)
+    
+    return projected_response(await quote_flight.do(
+        cache_key,
+        detached(lambda: _fetch_evm_best_route(request, chain, cohort, fee_info, net_amount_in, cache_key))
+    ), paths)
+
+async def _fetch_evm_best_route(
+    request: EVMQuoteRequest,
+    chain: str,
+    cohort: str,
+    fee_info: Dict[str, Any],
+    net_amount_in: str,
+    cache_key: str
+) -> Dict[str, Any]:
+    """Quote all aggregators for the net amount, attach fee fields to the best one and cache it."""
+    try:
+        routes = await best_route_quoter.best_quote(
+            chain=chain,
+            chain_id=CHAIN_CONFIG[chain]["chain_id"],
+            sell_token=request.sellToken,
+            buy_token=request.buyToken,
+            sell_amount=net_amount_in,
+            taker=request.takerAddress
+        )
+    except AggregatorError as e:
+        logger.error(f"Best-route quote failed on {chain}: {e}")
+        raise HTTPException(status_code=e.status_code, detail=f"No route found: {e.detail}")
+    
+    quote_data = {
+        **routes["best"],
+        "source": routes["source"],
+        "quotes": routes["quotes"],
+        "chain": chain,
+        "chain_id": CHAIN_CONFIG[chain]["chain_id"],
+        "feeRecipient": get_evm_fee_recipient(chain),
+        **build_fee_fields(cohort, fee_info, net_amount_in, request.sellAmount)
+    }
+    
+    try:
+        write_buffers["ab_test_events"].add(log_cohort_event(
+            wallet_address=request.takerAddress,
+            cohort=cohort,
+            event_type="quote",
+            amount_usd=fee_info.get("amount_in_usd"),
+            fee_usd=fee_info.get("fee_usd"),
+            chain=chain
+        ))
+    except Exception as e:
+        logger.error(f"Failed to log cohort event: {e}")
+    
+    log_event(
+        logger, "quote.best_route", chain=chain, winner=routes["source"],
+        quotes={q["source"]: q["buyAmount"] for q in routes["quotes"]}
+    )
+    encoded = EncodedJSON.encode(quote_data)
+    await quote_store.set(cache_key, encoded, ttl=get_quote_hard_ttl(chain))
+    return encoded
+
+@api_router.post("/evm/price")
+async def get_evm_price(request: EVMPriceRequest):
+    """
+    Get indicative EVM price via 0x /price for live swap-form previews
+    
+    - Cached independent of the taker, sell amounts bucketed (PRICE_BUCKET_SIG_DIGITS)
+    - Same fee fields as /evm/quote; buyAmount scaled from the bucket to the net amount
+    - No transaction data: call /evm/quote once the user clicks swap
+    """
+    chain = request.chain.lower()
+    
+    if chain not in ["ethereum", "bsc", "polygon"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported EVM chain: {chain}")
+    if not request.sellAmount.isdigit():
+        raise HTTPException(status_code=400, detail="sellAmount must be an integer amount in the token's smallest unit")
+    
+    cohort = get_user_cohort(request.takerAddress or "")
+    fee_info, net_amount_in = await calculate_evm_fee(chain, request.sellToken, request.sellAmount, cohort)
+    
+    # Taker-independent key: every user quoting this pair and size shares the entry
+    sell_token = request.sellToken.lower()
+    buy_token = request.buyToken.lower()
+    bucket = bucket_amount(net_amount_in)
+    cache_key = f"{chain}:price:{sell_token}:{buy_token}:{bucket}"
+    
+    fetch = lambda: _fetch_evm_price(chain, sell_token, buy_token, bucket, cache_key)
+    
+    stale_age = None
+    cached = await get_cached_quote(cache_key, chain)
+    if cached:
+        price_data, age = cached
+        if age >= get_quote_soft_ttl(chain):
+            schedule_quote_refresh(cache_key, fetch)
+            stale_age = age
+    else:
+        try:
+            price_data = await quote_flight.do(cache_key, detached(fetch))
+        except UpstreamUnavailable as e:
+            stale = quote_cache.get_stale(cache_key)
+            if stale is None:
+                raise upstream_unavailable_error(e)
+            price_data, stale_age = stale
+            logger.warning(f"0x unavailable ({e.reason}) - serving last cached price for {chain} ({stale_age:.0f}s old)")
+    
+    return build_evm_price_result(chain, price_data, bucket, cohort, fee_info, net_amount_in, request.sellAmount, stale_age)
+
+def build_evm_price_result(
+    chain: str,
+    price_data: Dict[str, Any],
+    bucket: str,
+    cohort: str,
+    fee_info: Dict[str, Any],
+    net_amount_in: str,
+    sell_amount: str,
+    stale_age: Optional[float] = None
+) -> Dict[str, Any]:
+    """/evm/price response: a bucket's cached price scaled to one user's net amount, with fee fields."""
+    result = {
+        **price_data,
+        "chain": chain,
+        "chain_id": CHAIN_CONFIG[chain]["chain_id"],
+        "indicative": True,
+        "sellAmount": net_amount_in,
+        "buyAmount": scale_amount(price_data.get("buyAmount"), net_amount_in, bucket),
+        "minBuyAmount": scale_amount(price_data.get("minBuyAmount"), net_amount_in, bucket),
+        "priceBucket": {
+            "sellAmount": bucket,
+            "buyAmount": price_data.get("buyAmount")
+        },
+        "feeRecipient": get_evm_fee_recipient(chain),
+        **build_fee_fields(cohort, fee_info, net_amount_in, sell_amount)
+    }
+    if stale_age is not None:
+        result["cacheAgeSeconds"] = round(stale_age, 1)
+        result["stale"] = True
+    return result
+
+async def _fetch_evm_price(chain: str, sell_token: str, buy_token: str, sell_amount: str, cache_key: str) -> Dict[str, Any]:
+    """Fetch a 0x v2 indicative price for a bucketed size and cache the raw response."""
+    chain_config = CHAIN_CONFIG[chain]
+    params = {
+        "chainId": str(chain_config["chain_id"]),
+        "sellToken": sell_token,
+        "buyToken": buy_token,
+        "sellAmount": sell_amount
+    }
+    
+    try:
+        async with http_pool.session("zerox", timeout=10.0, priority=PRIORITY_PRICE) as http_client:
+            response = await http_client.get(
+                f"{chain_config['api_base']}/swap/allowance-holder/price",
+                params=params,
+                headers=get_zerox_headers()
+            )
+    except UpstreamUnavailable:
+        raise  # answered from the last cached price by get_evm_price
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Request to 0x API timed out")
+    except Exception as e:
+        logger.error(f"Error fetching EVM price: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching price: {str(e)}")
+    
+    if response.status_code != 200:
+        logger.error(f"0x API v2 price error on {chain}: {response.status_code} - {response.text}")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"0x API v2 error: {response.text}"
+        )
+    
+    price_data = response.json()
+    await quote_store.set(cache_key, price_data, ttl=get_quote_hard_ttl(chain))
+    return price_data
+
+async def calculate_solana_fee(input_mint: str, amount: str, cohort: str) -> tuple:
+    """
+    Calculate the platform fee for a Solana trade based on the user's cohort.
+    
+    Returns:
+        (fee_info, net_amount_in) - net amount is the input amount after fee deduction
+    """
     fee_info = None
-    net_amount_in = request.amount
+    net_amount_in = amount
     
     if FEE_TIERED_ENABLED:
         try:
-            # Get USD value of input amount
-            # For Solana, we need to use Jupiter or similar price oracle
-            # Placeholder: Approximate SOL price (should use real oracle)
-            sol_price_usd = 180.0  # This should come from real price feed
-            
-            # Assume input is SOL or convert using price API
-            # For now, use simple heuristic
-            amount_decimal = float(request.amount) / (10 ** 9)  # SOL has 9 decimals
-            amount_usd = amount_decimal * sol_price_usd
+            # Get USD value of input amount (in-memory, decimals-aware per mint)
+            amount_usd = solana_pricing.value_usd("solana", input_mint, amount)
             
             if amount_usd is not None and amount_usd > 0:
                 # Apply cohort-specific fee logic
@@ -471,25 +929,24 @@ async def get_solana_quote(request: SolanaQuoteRequest):
                     fee_info["cohort"] = "tiered"
                 
                 # Calculate net amount after fee deduction
-                net_amount_in = calculate_net_amount_in(request.amount, fee_info)
+                net_amount_in = calculate_net_amount_in(amount, fee_info)
                 
-                logger.info(
-                    f"A/B Test (Solana) | Cohort: {cohort} | {amount_usd:.2f} USD → "
-                    f"Tier {fee_info['fee_tier']} ({fee_info['fee_percent']}%) → "
-                    f"Fee: ${fee_info['fee_usd']:.2f}"
+                log_event(
+                    logger, "quote.fee", chain="solana", cohort=cohort, amount_usd=round(amount_usd, 2),
+                    tier=fee_info["fee_tier"], fee_percent=fee_info["fee_percent"], fee_usd=fee_info["fee_usd"]
                 )
             else:
                 # Fallback if USD price unavailable
-                fee_info = get_fallback_fee("SOL price not available")
+                fee_info = get_fallback_fee("Token price not available")
                 fee_info["cohort"] = cohort
-                net_amount_in = calculate_net_amount_in(request.amount, fee_info)
-                logger.warning(f"Using fallback fee for Solana")
+                net_amount_in = calculate_net_amount_in(amount, fee_info)
+                logger.warning(f"Using fallback fee for solana:{input_mint}")
                 
         except Exception as e:
             logger.error(f"Error calculating tiered fee (Solana): {e}")
             fee_info = get_fallback_fee(f"Fee calculation error: {str(e)}")
             fee_info["cohort"] = cohort
-            net_amount_in = calculate_net_amount_in(request.amount, fee_info)
+            net_amount_in = calculate_net_amount_in(amount, fee_info)
     else:
         # Feature flag disabled: use legacy fixed fee
         fee_info = {
@@ -502,18 +959,78 @@ async def get_solana_quote(request: SolanaQuoteRequest):
             "notes": "Legacy fixed fee (0.2%)",
             "quote_version": "v1-legacy"
         }
-        net_amount_in = request.amount
+        net_amount_in = amount
+    
+    return fee_info, net_amount_in
+
+@api_router.post("/solana/quote")
+async def get_solana_quote(
+    request: SolanaQuoteRequest,
+    view: Optional[str] = Query(None, description="preview or full (default)"),
+    fields: Optional[str] = Query(None, description="Comma-separated field paths, overrides view")
+):
+    """
+    Get swap quote for Solana via Jupiter API
+    
+    NEW IN v1-tiered:
+    - Dynamic tiered fees based on trade USD value
+    - No custody: fee applied by reducing input amount before routing
+    - Returns: feeTier, feePercent, feeUsd, netAmountIn, quoteVersion
+    
+    view=preview returns amounts, price impact and fee fields only (no
+    routePlan) - request the full quote to build the swap transaction.
+    
+    A newer request for the same taker and pair cancels this one (409);
+    requests without a wallet (zero-address taker) are never superseded.
+    """
+    paths = parse_quote_view("solana", view, fields)
+    return projected_response(await solana_quote(request, latest_wins=True), paths)
+
+async def solana_quote(request: SolanaQuoteRequest, latest_wins: bool = False) -> Any:
+    """
+    Solana quote path shared by /solana/quote and /quotes/batch.
+    Returns the cached EncodedJSON body, or a plain dict for a stale entry.
+    """
+    
+    # Step 1: Determine A/B cohort
+    cohort = get_user_cohort(request.takerPublicKey)
+    
+    # Step 2: Calculate USD value and fee based on cohort
+    fee_info, net_amount_in = await calculate_solana_fee(request.inputMint, request.amount, cohort)
     
     # Step 2: Create cache key with net amount
     cache_key = f"solana:{request.inputMint}:{request.outputMint}:{net_amount_in}"
     
-    # Check cache
-    if cache_key in quote_cache:
-        cached_data, cached_time = quote_cache[cache_key]
-        if (datetime.now(timezone.utc).timestamp() - cached_time) < CACHE_TTL:
-            logger.info("Returning cached Solana quote")
-            return cached_data
+    fetch = lambda: _fetch_solana_quote(request, cohort, fee_info, net_amount_in, cache_key)
     
+    # Check cache (stale entries are served while one background refresh runs)
+    cached = await get_cached_quote(cache_key, "solana")
+    if cached:
+        cached_data, age = cached
+        if age < get_quote_soft_ttl("solana"):
+            log_event(logger, "quote.cache", chain="solana", state="fresh")
+            return cached_data
+        schedule_quote_refresh(cache_key, fetch)
+        log_event(logger, "quote.cache", chain="solana", state="stale", age=round(age, 1))
+        return mark_stale_quote(cached_data, age)
+    
+    # Step 3: Fetch from Jupiter - concurrent identical requests share one upstream call
+    scope = taker_scope(request.takerPublicKey, "solana", request.inputMint, request.outputMint)
+    if latest_wins and scope:
+        return await run_latest_quote(scope, cache_key, fetch)
+    return await quote_flight.do(cache_key, detached(fetch))
+
+async def _fetch_solana_quote(
+    request: SolanaQuoteRequest,
+    cohort: str,
+    fee_info: Dict[str, Any],
+    net_amount_in: str,
+    cache_key: str
+) -> Dict[str, Any]:
+    """
+    Fetch a Jupiter quote for the net amount, attach fee fields and cache it.
+    Runs once per cache key across concurrent requests (see quote_flight).
+    """
     jupiter_api = os.environ.get('JUPITER_API_URL')
     fee_recipient = os.environ.get('FEE_RECIPIENT_SOL')
     
@@ -526,7 +1043,7 @@ async def get_solana_quote(request: SolanaQuoteRequest):
     }
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
+        async with http_pool.session("jupiter", timeout=30.0, priority=PRIORITY_QUOTE) as http_client:
             # Get quote
             quote_response = await http_client.get(
                 f"{jupiter_api}/quote",
@@ -582,31 +1099,486 @@ async def get_solana_quote(request: SolanaQuoteRequest):
                     fee_usd=fee_info.get("fee_usd"),
                     chain="solana"
                 )
-                await db.ab_test_events.insert_one(cohort_log)
+                write_buffers["ab_test_events"].add(cohort_log)
             except Exception as e:
                 logger.error(f"Failed to log cohort event: {e}")
             
             # Log swap for analytics (pseudonymized)
             if request.takerPublicKey:
-                wallet_hash = hashlib.sha256(request.takerPublicKey.encode()).hexdigest()[:16]
-                logger.info(
-                    f"Solana Quote | Cohort: {cohort} | Wallet: {wallet_hash} | "
-                    f"Route: {request.inputMint[:6]}→{request.outputMint[:6]} | "
-                    f"Amount: ${fee_info.get('amount_in_usd', 'N/A')} | "
-                    f"Tier: {fee_info['fee_tier']} | Fee: {fee_info['fee_percent']}% (${fee_info.get('fee_usd', 'N/A')})"
+                log_event(
+                    logger, "quote.fetched", chain="solana", cohort=cohort,
+                    wallet=wallet_hash(request.takerPublicKey),
+                    sell_token=request.inputMint, buy_token=request.outputMint,
+                    amount_usd=fee_info.get("amount_in_usd"), tier=fee_info["fee_tier"],
+                    fee_percent=fee_info["fee_percent"], fee_usd=fee_info.get("fee_usd")
                 )
             
-            # Cache the response
-            quote_cache[cache_key] = (result, datetime.now(timezone.utc).timestamp())
-            logger.info(f"Solana quote fetched: {request.inputMint} -> {request.outputMint}")
-            return result
+            # Cache the response body, encoded once for every hit
+            encoded = EncodedJSON.encode(result)
+            await quote_store.set(cache_key, encoded, ttl=get_quote_hard_ttl("solana"))
+            return encoded
             
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable_error(e)
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Request to Jupiter API timed out")
     except Exception as e:
         logger.error(f"Error fetching Solana quote: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching quote: {str(e)}")
 
+@api_router.post("/quotes/batch")
+async def get_batch_quotes(batch: BatchQuoteRequest):
+    """
+    Get many EVM and Solana quotes in one round-trip
+    
+    Items run concurrently (max BATCH_QUOTE_CONCURRENCY per batch) through the
+    regular quote path, so they share the quote cache and single-flight.
+    Results come back in request order; a failing item returns its error
+    instead of failing the whole batch.
+    """
+    if not batch.quotes:
+        raise HTTPException(status_code=400, detail="At least one quote required")
+    if len(batch.quotes) > BATCH_QUOTE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many quotes in batch (max {BATCH_QUOTE_MAX_ITEMS})"
+        )
+    
+    item_timeout = BATCH_QUOTE_ITEM_TIMEOUT
+    if batch.itemTimeout and batch.itemTimeout > 0:
+        item_timeout = min(batch.itemTimeout, BATCH_QUOTE_ITEM_TIMEOUT)
+    
+    semaphore = asyncio.Semaphore(BATCH_QUOTE_CONCURRENCY)
+    
+    async def run_item(index: int, item: BatchQuoteItem) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                quote_type = item.type.lower()
+                if quote_type == "evm":
+                    quote = evm_quote(EVMQuoteRequest(**item.params))
+                elif quote_type == "solana":
+                    quote = solana_quote(SolanaQuoteRequest(**item.params))
+                else:
+                    raise HTTPException(status_code=400, detail=f"Unsupported quote type: {item.type}")
+                
+                data = await asyncio.wait_for(quote, timeout=item_timeout)
+                return {"index": index, "success": True, "data": decoded(data)}
+                
+            except ValidationError as e:
+                error = {"status": 422, "detail": e.errors(include_url=False)}
+            except HTTPException as e:
+                error = {"status": e.status_code, "detail": e.detail}
+            except asyncio.TimeoutError:
+                error = {"status": 504, "detail": f"Quote timed out after {item_timeout}s"}
+            except Exception as e:
+                logger.error(f"Batch quote item {index} failed: {e}")
+                error = {"status": 500, "detail": f"Error fetching quote: {str(e)}"}
+            
+            return {"index": index, "success": False, "error": error}
+    
+    results = await asyncio.gather(*(run_item(i, item) for i, item in enumerate(batch.quotes)))
+    succeeded = sum(1 for r in results if r["success"])
+    
+    return {
+        "results": results,
+        "count": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded
+    }
+
+async def ladder_reference_usd(chain: str, sell_token: str, amount: str) -> Optional[float]:
+    """USD value of the ladder's reference size from the in-memory price tables."""
+    if chain == "solana":
+        try:
+            return solana_pricing.value_usd("solana", sell_token, amount)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Error getting Solana token price: {e}")
+            return None
+    return await get_token_price_usd(sell_token, chain, amount)
+
+def ladder_rung(sell_amount: str, data: Dict[str, Any], buy_amount: Optional[str]) -> Dict[str, Any]:
+    """One ladder rung from a quote/price response (fee fields as in build_fee_fields)."""
+    return {
+        "sellAmount": sell_amount,
+        "netAmountIn": data["netAmountIn"],
+        "buyAmount": buy_amount,
+        "feeTier": data["feeTier"],
+        "feePercent": data["feePercent"],
+        "feeUsd": data["feeUsd"],
+        "amountInUsd": data["amountInUsd"],
+        "nextTier": data["nextTier"],
+        "quoted": True,
+        "stale": data.get("stale", False)
+    }
+
+@api_router.post("/quote/ladder")
+async def get_quote_ladder(request: QuoteLadderRequest):
+    """
+    Quote one pair at several sizes for price-impact curves and fee tier hints
+
+    - Sizes: `sizes`, or generated around the fee tier boundaries from `sellAmount`
+    - Rungs use the indicative price paths (/evm/price, the Solana price
+      bucket of /quote/stream) - shared cache, single-flight and HTTP pool,
+      and no A/B quote events
+    - Each rung: net output, fee tier/percent/USD, price impact against the
+      smallest size, and the combined cost (fee + impact)
+    - `interpolate` sizes and failed rungs get an output interpolated between
+      their quoted neighbours (`interpolated: true`)
+    """
+    chain = request.chain.lower()
+
+    if chain not in CHAIN_CONFIG:
+        raise HTTPException(status_code=400, detail=f"Unsupported chain: {chain}")
+
+    try:
+        if request.sizes:
+            sizes = parse_sizes(request.sizes)
+        elif request.sellAmount:
+            reference = parse_sizes([request.sellAmount])[0]
+            reference_usd = await ladder_reference_usd(chain, request.sellToken, str(reference))
+            sizes = ladder_sizes(reference, reference_usd)
+        else:
+            raise HTTPException(status_code=400, detail="Either sizes or sellAmount is required")
+        extra_sizes = [size for size in parse_sizes(request.interpolate or []) if size not in sizes]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(sizes) + len(extra_sizes) > QUOTE_LADDER_MAX_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many ladder sizes (max {QUOTE_LADDER_MAX_SIZES})"
+        )
+
+    taker = request.takerAddress or ""
+    semaphore = asyncio.Semaphore(QUOTE_LADDER_CONCURRENCY)
+
+    async def quote_rung(size: int) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                if chain == "solana":
+                    # Indicative price path, like EVM: a rung is not a quote
+                    # shown to the user, so no A/B quote event is logged
+                    data = await asyncio.wait_for(solana_price(QuoteStreamParams(
+                        sellToken=request.sellToken,
+                        buyToken=request.buyToken,
+                        sellAmount=str(size),
+                        chain="solana",
+                        takerAddress=taker,
+                        slippageBps=request.slippageBps
+                    )), timeout=QUOTE_LADDER_ITEM_TIMEOUT)
+                    return ladder_rung(str(size), data, data.get("outputAmount"))
+
+                data = await asyncio.wait_for(get_evm_price(EVMPriceRequest(
+                    sellToken=request.sellToken,
+                    buyToken=request.buyToken,
+                    sellAmount=str(size),
+                    takerAddress=taker,
+                    chain=chain
+                )), timeout=QUOTE_LADDER_ITEM_TIMEOUT)
+                return ladder_rung(str(size), data, data.get("buyAmount"))
+
+            except HTTPException as e:
+                error = {"status": e.status_code, "detail": e.detail}
+            except asyncio.TimeoutError:
+                error = {"status": 504, "detail": f"Quote timed out after {QUOTE_LADDER_ITEM_TIMEOUT}s"}
+            except Exception as e:
+                logger.error(f"Ladder quote for {chain}:{request.sellToken} at {size} failed: {e}")
+                error = {"status": 500, "detail": f"Error fetching quote: {str(e)}"}
+
+            return {"sellAmount": str(size), "quoted": False, "error": error}
+
+    rungs = list(await asyncio.gather(*(quote_rung(size) for size in sizes)))
+
+    points = sorted(
+        (int(r["netAmountIn"]), rate)
+        for r in rungs if r["quoted"]
+        for rate in [quote_rate(r["netAmountIn"], r["buyAmount"])] if rate is not None
+    )
+    if not points:
+        error = next((r["error"] for r in rungs if "error" in r), {"status": 502, "detail": "No liquidity at any ladder size"})
+        raise HTTPException(status_code=error["status"], detail=error["detail"])
+    reference_rate = points[0][1]
+
+    # Failed rungs and interpolate-only sizes: real fee, interpolated market rate
+    cohort = get_user_cohort(taker)
+    for index, rung in enumerate(rungs + [{"sellAmount": str(size), "quoted": False} for size in extra_sizes]):
+        if rung["quoted"]:
+            continue
+        if chain == "solana":
+            fee_info, net_amount_in = await calculate_solana_fee(request.sellToken, rung["sellAmount"], cohort)
+        else:
+            fee_info, net_amount_in = await calculate_evm_fee(chain, request.sellToken, rung["sellAmount"], cohort)
+        rate = interpolate_rate(points, int(net_amount_in))
+        rung.update({
+            **ladder_rung(
+                rung["sellAmount"],
+                build_fee_fields(cohort, fee_info, net_amount_in, rung["sellAmount"]),
+                str(int(int(net_amount_in) * rate)) if rate is not None else None
+            ),
+            "quoted": False,
+            "interpolated": rate is not None
+        })
+        if index >= len(rungs):
+            rungs.append(rung)
+
+    for rung in rungs:
+        rate = quote_rate(rung["netAmountIn"], rung["buyAmount"])
+        rung["priceImpactPct"] = price_impact_pct(rate, reference_rate) if rate is not None else None
+        # Fee and price impact together, against the smallest size's rate
+        rung["effectiveCostPct"] = (
+            price_impact_pct(int(rung["buyAmount"]) / int(rung["sellAmount"]), reference_rate)
+            if rate is not None else None
+        )
+
+    rungs.sort(key=lambda r: int(r["sellAmount"]))
+    quoted = sum(1 for r in rungs if r["quoted"])
+
+    return {
+        "chain": chain,
+        "sellToken": request.sellToken,
+        "buyToken": request.buyToken,
+        "indicative": True,
+        "referenceRate": reference_rate,
+        "tierBoundariesUsd": tier_boundaries(),
+        "rungs": rungs,
+        "count": len(rungs),
+        "quoted": quoted,
+        "interpolated": sum(1 for r in rungs if r.get("interpolated"))
+    }
+
+# ========== LIVE QUOTE STREAMS ==========
+
+class QuoteStreamParams(BaseModel):
+    sellToken: str  # token address, or input mint on Solana
+    buyToken: str
+    sellAmount: str  # smallest unit
+    chain: str = "ethereum"  # EVM chain or "solana"
+    takerAddress: Optional[str] = None  # only used for the fee cohort
+    slippageBps: int = 50  # Solana only
+
+async def prepare_quote_stream(params: QuoteStreamParams) -> tuple:
+    """
+    Resolve a subscription to its shared stream.
+
+    The fee and net amount are computed once per subscription; the stream key is
+    the indicative price cache key (chain + pair + net size bucket), so every
+    subscriber of a key - and every /evm/price poller - shares one refresh.
+
+    Returns:
+        (key, refresh, render) - refresh() produces the bucket's price,
+        render(price) turns it into this subscriber's response
+    """
+    chain = params.chain.lower()
+
+    if chain not in CHAIN_CONFIG:
+        raise HTTPException(status_code=400, detail=f"Unsupported chain: {chain}")
+    if not params.sellAmount.isdigit():
+        raise HTTPException(status_code=400, detail="sellAmount must be an integer amount in the token's smallest unit")
+
+    cohort = get_user_cohort(params.takerAddress or "")
+
+    if chain == "solana":
+        fee_info, net_amount_in = await calculate_solana_fee(params.sellToken, params.sellAmount, cohort)
+        bucket = bucket_amount(net_amount_in)
+        cache_key = f"solana:price:{params.sellToken}:{params.buyToken}:{bucket}:{params.slippageBps}"
+        fetch = lambda: _fetch_solana_price(params.sellToken, params.buyToken, bucket, params.slippageBps, cache_key)
+        render = lambda price_data: build_solana_price_result(price_data, bucket, cohort, fee_info, net_amount_in, params.sellAmount)
+    else:
+        fee_info, net_amount_in = await calculate_evm_fee(chain, params.sellToken, params.sellAmount, cohort)
+        sell_token = params.sellToken.lower()
+        buy_token = params.buyToken.lower()
+        bucket = bucket_amount(net_amount_in)
+        cache_key = f"{chain}:price:{sell_token}:{buy_token}:{bucket}"
+        fetch = lambda: _fetch_evm_price(chain, sell_token, buy_token, bucket, cache_key)
+        render = lambda price_data: build_evm_price_result(chain, price_data, bucket, cohort, fee_info, net_amount_in, params.sellAmount)
+
+    async def refresh() -> Dict[str, Any]:
+        cached = await get_cached_quote(cache_key, chain)
+        if cached and cached[1] < get_quote_soft_ttl(chain):
+            return cached[0]
+        return await quote_flight.do(cache_key, detached(fetch))
+
+    return cache_key, refresh, render
+
+async def solana_price(params: QuoteStreamParams) -> Dict[str, Any]:
+    """Indicative Solana price for one size (bucketed Jupiter quote, no A/B quote event)."""
+    _, refresh, render = await prepare_quote_stream(params)
+    return render(await refresh())
+
+async def _fetch_solana_price(input_mint: str, output_mint: str, amount: str, slippage_bps: int, cache_key: str) -> Dict[str, Any]:
+    """Fetch a Jupiter quote for a bucketed size and cache the raw response (indicative, no fee fields)."""
+    params = {
+        "inputMint": input_mint,
+        "outputMint": output_mint,
+        "amount": amount,
+        "slippageBps": slippage_bps
+    }
+
+    try:
+        async with http_pool.session("jupiter", timeout=10.0, priority=PRIORITY_PRICE) as http_client:
+            response = await http_client.get(f"{os.environ.get('JUPITER_API_URL')}/quote", params=params)
+    except UpstreamUnavailable as e:
+        raise upstream_unavailable_error(e)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Request to Jupiter API timed out")
+    except Exception as e:
+        logger.error(f"Error fetching Solana price: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching price: {str(e)}")
+
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Jupiter API error: {response.text}"
+        )
+
+    price_data = response.json()
+    await quote_store.set(cache_key, price_data, ttl=get_quote_hard_ttl("solana"))
+    return price_data
+
+def build_solana_price_result(
+    price_data: Dict[str, Any],
+    bucket: str,
+    cohort: str,
+    fee_info: Dict[str, Any],
+    net_amount_in: str,
+    amount: str
+) -> Dict[str, Any]:
+    """Streamed Solana price: a bucket's Jupiter quote scaled to one user's net amount, with fee fields."""
+    return {
+        "chain": "solana",
+        "indicative": True,
+        "quote": price_data,
+        "outputAmount": scale_amount(price_data.get("outAmount"), net_amount_in, bucket),
+        "priceBucket": {
+            "amount": bucket,
+            "outAmount": price_data.get("outAmount")
+        },
+        "feeRecipient": os.environ.get('FEE_RECIPIENT_SOL'),
+        **build_fee_fields(cohort, fee_info, net_amount_in, amount)
+    }
+
+@api_router.get("/quote/stream")
+async def stream_quote(
+    request: Request,
+    sellToken: str = Query(...),
+    buyToken: str = Query(...),
+    sellAmount: str = Query(...),
+    chain: str = Query("ethereum"),
+    takerAddress: Optional[str] = Query(None),
+    slippageBps: int = Query(50)
+):
+    """
+    Live indicative quotes for one pair and size over Server-Sent Events
+
+    Replaces polling /evm/price or /solana/quote: the server refreshes each
+    chain + pair + size bucket once per QUOTE_STREAM_INTERVAL, however many
+    clients subscribe, and pushes `event: quote` with the same body as
+    /evm/price (EVM) or the indicative Jupiter quote (Solana).
+    Call /evm/quote or /solana/quote for the firm quote when the user swaps.
+    """
+    key, refresh, render = await prepare_quote_stream(QuoteStreamParams(
+        sellToken=sellToken,
+        buyToken=buyToken,
+        sellAmount=sellAmount,
+        chain=chain,
+        takerAddress=takerAddress,
+        slippageBps=slippageBps
+    ))
+
+    async def events():
+        subscription = quote_streams.subscribe(key, refresh)
+        try:
+            while not await request.is_disconnected():
+                try:
+                    price_data = await asyncio.wait_for(subscription.next(), timeout=QUOTE_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: quote\ndata: {json.dumps(render(price_data))}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/quote/ws")
+async def quote_stream_socket(websocket: WebSocket):
+    """
+    Live indicative quotes for several pairs over one WebSocket
+
+    Client messages:
+        {"action": "subscribe", "id": "...", sellToken, buyToken, sellAmount, chain, takerAddress, slippageBps}
+        {"action": "unsubscribe", "id": "..."}
+    Subscribing with an existing id replaces that subscription (e.g. amount edit).
+
+    Server messages:
+        {"type": "quote", "id": "...", "data": {...}}  (same body as /quote/stream)
+        {"type": "error", "id": "...", "status": int, "detail": ...}
+    """
+    await websocket.accept()
+    forwarders: Dict[str, asyncio.Task] = {}
+
+    async def send_error(sub_id: Optional[str], status: int, detail: Any) -> None:
+        await websocket.send_json({"type": "error", "id": sub_id, "status": status, "detail": detail})
+
+    async def forward(sub_id: str, subscription, render) -> None:
+        try:
+            while True:
+                price_data = await subscription.next()
+                await websocket.send_json({"type": "quote", "id": sub_id, "data": render(price_data)})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Quote stream socket closed while sending: {e}")
+        finally:
+            subscription.close()
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                action = message.get("action")
+                sub_id = str(message.get("id", ""))
+            except (ValueError, AttributeError):
+                await send_error(None, 400, "Messages must be JSON objects")
+                continue
+
+            if action == "unsubscribe":
+                task = forwarders.pop(sub_id, None)
+                if task:
+                    task.cancel()
+                continue
+            if action != "subscribe":
+                await send_error(sub_id, 400, f"Unsupported action: {action}")
+                continue
+            if sub_id not in forwarders and len(forwarders) >= QUOTE_STREAM_MAX_PER_SOCKET:
+                await send_error(sub_id, 400, f"Too many subscriptions (max {QUOTE_STREAM_MAX_PER_SOCKET})")
+                continue
+
+            try:
+                key, refresh, render = await prepare_quote_stream(QuoteStreamParams(
+                    **{k: v for k, v in message.items() if k not in ("action", "id")}
+                ))
+            except ValidationError as e:
+                await send_error(sub_id, 422, e.errors(include_url=False))
+                continue
+            except HTTPException as e:
+                await send_error(sub_id, e.status_code, e.detail)
+                continue
+
+            previous = forwarders.pop(sub_id, None)
+            if previous:
+                previous.cancel()
+            forwarders[sub_id] = asyncio.create_task(forward(sub_id, quote_streams.subscribe(key, refresh), render))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in forwarders.values():
+            task.cancel()
+
 @api_router.post("/swaps", response_model=SwapLog)
 async def log_swap(swap_data: SwapLogCreate):
     """
@@ -618,7 +1590,9 @@ async def log_swap(swap_data: SwapLogCreate):
     doc = swap_obj.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.swaps.insert_one(doc)
+    # Buffered write; fall back to a direct insert if the buffer is full
+    if not write_buffers["swaps"].add(doc):
+        _ = await db.swaps.insert_one(doc)
     logger.info(f"Swap logged: {swap_obj.chain} - {swap_obj.tx_hash}")
     return swap_obj
 
@@ -636,7 +1610,7 @@ async def get_swaps(
     if chain:
         query['chain'] = chain.lower()
     
-    swaps = await db.swaps.find(query, {"_id": 0}).sort("timestamp", -1).to_list(100)
+    swaps = await db.swaps.find(query, {"_id": 0}).sort("timestamp", -1).max_time_ms(max_time_ms()).to_list(100)
     
     # Convert ISO string timestamps back to datetime objects
     for swap in swaps:
@@ -675,7 +1649,7 @@ async def test_quote_endpoint(
         headers["0x-api-key"] = api_key
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as http_client:
+        async with http_pool.session("zerox", timeout=30.0) as http_client:
             # Try v2 price endpoint
             url_v2 = f"{chain_config['api_base']}/swap/allowance-holder/price"
             response_v2 = await http_client.get(url_v2, params=params, headers=headers)
@@ -730,7 +1704,9 @@ async def log_referral(referral_data: ReferralLogCreate):
     doc = referral_obj.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
     
-    _ = await db.swap_referrals.insert_one(doc)
+    # Buffered write; fall back to a direct insert if the buffer is full
+    if not write_buffers["swap_referrals"].add(doc):
+        _ = await db.swap_referrals.insert_one(doc)
     logger.info(f"Referral logged: {referral_obj.referrer_wallet} -> {referral_obj.trader_wallet}")
     return referral_obj
 
@@ -742,7 +1718,7 @@ async def get_legacy_referral_stats(wallet_address: str):
     referrals = await db.swap_referrals.find(
         {"referrer_wallet": wallet_address},
         {"_id": 0}
-    ).to_list(1000)
+    ).max_time_ms(max_time_ms()).to_list(1000)
     
     total_referrals = len(referrals)
     chains_used = {}
@@ -795,8 +1771,10 @@ async def get_coin_price(symbol: str):
 # TOKEN DISCOVERY ENDPOINTS
 # ==============================================
 
-# Cache for token discovery data
-discovery_cache = {}
+# Cache for token discovery data (bounded: resolve/pairs keys come from user queries)
+DISCOVERY_CACHE_MAX_ENTRIES = int(os.getenv('DISCOVERY_CACHE_MAX_ENTRIES', '2000'))
+discovery_cache = TTLCache("discovery", max_entries=DISCOVERY_CACHE_MAX_ENTRIES, stale_ttl=UPSTREAM_STALE_GRACE)
+discovery_store = TieredCache(discovery_cache, shared_cache)
 DISCOVERY_CACHE_TTL = 60  # 60 seconds for trending/discovery data
 
 @api_router.get("/trending/categories")
@@ -808,14 +1786,12 @@ async def get_trending_categories(category: str = Query("top", regex="^(top|gain
     Losers = Top losers by 24h price change
     """
     cache_key = f"trending_{category}"
-    current_time = datetime.now(timezone.utc).timestamp()
     
     # Check cache
-    if cache_key in discovery_cache:
-        cached_data, cached_time = discovery_cache[cache_key]
-        if current_time - cached_time < (DISCOVERY_CACHE_TTL * 6):  # 6 min cache
-            logger.info(f"Returning cached trending {category}")
-            return cached_data
+    cached_data = await discovery_store.get(cache_key)
+    if cached_data is not None:
+        logger.info(f"Returning cached trending {category}")
+        return cached_response(cached_data)
     
     try:
         # Get data from CoinMarketCap
@@ -823,7 +1799,7 @@ async def get_trending_categories(category: str = Query("top", regex="^(top|gain
         
         if not tokens:
             logger.warning(f"No data from CoinMarketCap for category: {category}")
-            return {"category": category, "tokens": [], "error": "No data"}
+            return serve_stale_discovery(cache_key) or {"category": category, "tokens": [], "error": "No data"}
         
         # Process tokens
         processed_tokens = []
@@ -848,14 +1824,15 @@ async def get_trending_categories(category: str = Query("top", regex="^(top|gain
         }
         
         # Cache result
-        discovery_cache[cache_key] = (result, current_time)
+        encoded = EncodedJSON.encode(result)
+        await discovery_store.set(cache_key, encoded, ttl=DISCOVERY_CACHE_TTL * 6)  # 6 min cache
         logger.info(f"Successfully fetched {len(processed_tokens)} tokens for {category}")
         
-        return result
+        return cached_response(encoded)
         
     except Exception as e:
         logger.error(f"Error in trending categories: {str(e)}")
-        return {"category": category, "tokens": [], "error": str(e)}
+        return serve_stale_discovery(cache_key) or {"category": category, "tokens": [], "error": str(e)}
 
 
 @api_router.get("/dex/new-listings")
@@ -865,16 +1842,14 @@ async def get_new_dex_listings(chain: Optional[str] = Query(None)):
     Uses latest profile endpoint with age filter
     """
     cache_key = f"new_listings_{chain or 'all'}"
-    current_time = datetime.now(timezone.utc).timestamp()
     
     # Check cache (5 min for new listings)
-    if cache_key in discovery_cache:
-        cached_data, cached_time = discovery_cache[cache_key]
-        if current_time - cached_time < 300:
-            return cached_data
+    cached_data = await discovery_store.get(cache_key)
+    if cached_data is not None:
+        return cached_response(cached_data)
     
     try:
-        async with httpx.AsyncClient(timeout=15.0) as http_client:
+        async with http_pool.session("dexscreener", timeout=15.0) as http_client:
             # Use Dexscreener latest profile endpoint - shows newest tokens
             response = await http_client.get(
                 "https://api.dexscreener.com/token-profiles/latest/v1",
@@ -883,7 +1858,7 @@ async def get_new_dex_listings(chain: Optional[str] = Query(None)):
             
             if response.status_code == 429:
                 logger.warning("Dexscreener rate limit for new listings")
-                return {"pairs": [], "note": "Rate limited, try again later"}
+                return serve_stale_discovery(cache_key) or {"pairs": [], "note": "Rate limited, try again later"}
             
             if response.status_code != 200:
                 logger.warning(f"Dexscreener API error: {response.status_code}")
@@ -945,12 +1920,13 @@ async def get_new_dex_listings(chain: Optional[str] = Query(None)):
                 "count": len(pairs[:15])
             }
             
-            discovery_cache[cache_key] = (result, current_time)
-            return result
+            encoded = EncodedJSON.encode(result)
+            await discovery_store.set(cache_key, encoded, ttl=300)
+            return cached_response(encoded)
             
     except Exception as e:
         logger.error(f"Error fetching new listings: {str(e)}")
-        return {"pairs": [], "note": "DEX data unavailable"}
+        return serve_stale_discovery(cache_key) or {"pairs": [], "note": "DEX data unavailable"}
 
 
 @api_router.get("/token/resolve")
@@ -962,13 +1938,11 @@ async def resolve_token(query: str = Query(..., min_length=1), chainId: Optional
     Prioritizes tokens from the specified chainId if provided
     """
     cache_key = f"resolve_{query.lower()}_{chainId if chainId else 'all'}"
-    current_time = datetime.now(timezone.utc).timestamp()
     
     # Check cache
-    if cache_key in discovery_cache:
-        cached_data, cached_time = discovery_cache[cache_key]
-        if current_time - cached_time < DISCOVERY_CACHE_TTL:
-            return cached_data
+    cached_data = await discovery_store.get(cache_key)
+    if cached_data is not None:
+        return cached_response(cached_data)
     
     results = []
     prioritized_results = []  # Results from the selected chain
@@ -1143,8 +2117,9 @@ async def resolve_token(query: str = Query(..., min_length=1), chainId: Optional
     is_solana_mint = len(query) >= 32 and not query.startswith("0x")
     is_contract_address = query.startswith("0x") and len(query) == 42
     
+    skipped = False  # a source was skipped (deadline, timeout, open circuit, shed budget)
     try:
-        async with httpx.AsyncClient(timeout=10.0) as http_client:
+        async with http_pool.session("dexscreener", timeout=10.0) as http_client:
             
             # Search Dexscreener (EVM + Solana) - prioritize if it's a contract address
             try:
@@ -1238,12 +2213,15 @@ async def resolve_token(query: str = Query(..., min_length=1), chainId: Optional
                                 results.append(token_data)
             except Exception as e:
                 logger.warning(f"Dexscreener search failed: {str(e)}")
+                skipped = source_skipped(e)
             
             # For Solana, also check Jupiter Token Registry
             if is_solana_mint or (not results and len(query) >= 32) or query.lower() in ['sol', 'solana']:
                 try:
                     # Fetch Jupiter token list (should be cached)
-                    jupiter_response = await http_client.get("https://token.jup.ag/all")
+                    jupiter_response = await http_pool.session("jupiter_tokens", timeout=10.0).get(
+                        "https://token.jup.ag/all"
+                    )
                     
                     if jupiter_response.status_code == 200:
                         jupiter_tokens = jupiter_response.json()
@@ -1273,6 +2251,7 @@ async def resolve_token(query: str = Query(..., min_length=1), chainId: Optional
                                     break
                 except Exception as e:
                     logger.warning(f"Jupiter search failed: {str(e)}")
+                    skipped = skipped or source_skipped(e)
             
             # Return top 15 results with native tokens first, then prioritized chain tokens, then others
             combined_results = native_token_results + prioritized_results + results
@@ -1283,12 +2262,15 @@ async def resolve_token(query: str = Query(..., min_length=1), chainId: Optional
                 "prioritized_chain": selected_chain
             }
             
-            discovery_cache[cache_key] = (result, current_time)
-            return result
+            # A skipped source leaves the list incomplete: serve the last known
+            # result (or this one, marked partial) without caching it
+            return cached_response(
+                await finish_result(discovery_store, cache_key, result, skipped, DISCOVERY_CACHE_TTL)
+            )
             
     except Exception as e:
         logger.error(f"Error resolving token: {str(e)}")
-        return {"query": query, "results": [], "count": 0, "error": str(e)}
+        return serve_stale_discovery(cache_key) or {"query": query, "results": [], "count": 0, "error": str(e)}
 
 
 @api_router.get("/dex/pairs")
@@ -1298,16 +2280,14 @@ async def get_dex_pairs(query: str = Query(..., min_length=1)):
     Returns pairs with both base and quote tokens for quick selection
     """
     cache_key = f"pairs_{query.lower()}"
-    current_time = datetime.now(timezone.utc).timestamp()
     
     # Check cache
-    if cache_key in discovery_cache:
-        cached_data, cached_time = discovery_cache[cache_key]
-        if current_time - cached_time < DISCOVERY_CACHE_TTL:
-            return cached_data
+    cached_data = await discovery_store.get(cache_key)
+    if cached_data is not None:
+        return cached_response(cached_data)
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as http_client:
+        async with http_pool.session("dexscreener", timeout=10.0) as http_client:
             dex_response = await http_client.get(
                 f"https://api.dexscreener.com/latest/dex/search?q={query}",
                 headers={"Accept": "application/json"}
@@ -1353,35 +2333,47 @@ async def get_dex_pairs(query: str = Query(..., min_length=1)):
                     "count": len(formatted_pairs)
                 }
                 
-                discovery_cache[cache_key] = (result, current_time)
-                return result
+                encoded = EncodedJSON.encode(result)
+                await discovery_store.set(cache_key, encoded, ttl=DISCOVERY_CACHE_TTL)
+                return cached_response(encoded)
             else:
                 return {"query": query, "pairs": [], "count": 0}
                 
     except Exception as e:
         logger.error(f"Error fetching pairs: {str(e)}")
-        return {"query": query, "pairs": [], "count": 0, "error": str(e)}
+        return serve_stale_discovery(cache_key) or {"query": query, "pairs": [], "count": 0, "error": str(e)}
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Flush buffered writes before the connection goes away
+    for buffer in write_buffers.values():
+        await buffer.stop()
+    await stop_watcher()
     client.close()
 
+@app.on_event("shutdown")
+async def shutdown_http_pool():
+    await token_pricing.stop()
+    await solana_pricing.stop()
+    await quote_streams.close()
+    await http_pool.close()
+    await shared_cache.close()
+
 # Background task to clean cache
 async def clean_cache():
     while True:
         await asyncio.sleep(60)  # Clean every minute
-        current_time = datetime.now(timezone.utc).timestamp()
-        expired_keys = [
-            k for k, (_, t) in quote_cache.items()
-            if current_time - t > CACHE_TTL
-        ]
-        for k in expired_keys:
-            del quote_cache[k]
-        if expired_keys:
-            logger.info(f"Cleaned {len(expired_keys)} expired cache entries")
+        expired = purge_all_expired()
+        if expired:
+            logger.info(f"Cleaned {expired} expired cache entries")
 
 @app.on_event("startup")
 async def startup_event():
+    await http_pool.start()
+    for buffer in write_buffers.values():
+        await buffer.start()
+    await token_pricing.start()
+    await solana_pricing.start()
     asyncio.create_task(clean_cache())
     # Initialize ad slots
     from ad_management import init_ad_slots
@@ -1627,7 +2619,7 @@ async def get_ab_stats(
 
 
 # Crypto price cache
-crypto_price_cache = {}
+crypto_price_cache = TTLCache("crypto_prices", max_entries=16, stale_ttl=UPSTREAM_STALE_GRACE)
 CRYPTO_PRICE_CACHE_TTL = 300  # 5 minutes
 
 @api_router.get("/crypto/price/{coin_id}")
@@ -1643,7 +2635,7 @@ async def get_token_price(coin_id: str):
             "vs_currencies": "usd,eur,gbp"
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_pool.session("coingecko", timeout=10.0) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
             data = response.json()
@@ -1671,14 +2663,11 @@ async def get_crypto_prices():
     Cache: 5 minutes
     """
     try:
-        current_time = datetime.now(timezone.utc).timestamp()
-        
         # Check cache
-        if "prices" in crypto_price_cache:
-            cached_data, cached_time = crypto_price_cache["prices"]
-            if current_time - cached_time < CRYPTO_PRICE_CACHE_TTL:
-                logger.info("Returning cached crypto prices")
-                return cached_data
+        cached_data = crypto_price_cache.get("prices")
+        if cached_data is not None:
+            logger.info("Returning cached crypto prices")
+            return cached_response(cached_data)
         
         # Fetch from CoinGecko API (free, no API key needed)
         url = "https://api.coingecko.com/api/v3/simple/price"
@@ -1687,7 +2676,7 @@ async def get_crypto_prices():
             "vs_currencies": "usd,eur,gbp"
         }
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with http_pool.session("coingecko", timeout=10.0, priority=PRIORITY_DISCOVERY) as client:
             response = await client.get(url, params=params)
             response.raise_for_status()
             data = response.json()
@@ -1724,14 +2713,17 @@ async def get_crypto_prices():
         }
         
         # Update cache
-        crypto_price_cache["prices"] = (result, current_time)
+        crypto_price_cache.set("prices", EncodedJSON.encode(result), ttl=CRYPTO_PRICE_CACHE_TTL)
         
         logger.info(f"Fetched live crypto prices: ETH=${result['ETH']['usd']}/€{result['ETH']['eur']}, SOL=${result['SOL']['usd']}/€{result['SOL']['eur']}")
         return result
         
-    except httpx.HTTPError as e:
+    except (httpx.HTTPError, UpstreamUnavailable) as e:
         logger.error(f"Error fetching crypto prices from CoinGecko: {e}")
-        # Return fallback prices
+        # Last known prices first, then static fallback prices
+        stale = crypto_price_cache.get_stale("prices")
+        if stale is not None:
+            return mark_stale_quote(*stale)
         return {
             "ETH": 3100,
             "BNB": 620,
@@ -1748,7 +2740,9 @@ async def get_crypto_prices():
 
 
 # ====== Pump.fun Launch Tracking (Non-Custodial) ======
-from pump_watcher import get_watcher
+from pump_watcher import get_watcher, stop_watcher, persistence_stats as pump_persistence_stats
+
+PUMP_STREAM_MAX_PER_SOCKET = int(os.getenv('PUMP_STREAM_MAX_PER_SOCKET', '20'))
 
 @api_router.post("/pump/track")
 @limiter.limit("10/minute")
@@ -1764,6 +2758,10 @@ async def track_pump_token(request: Request, mint: str = Query(..., description=
         # Check if already exists
         existing = await db.pump_tokens.find_one({"mint": mint})
         if existing:
+            # Seen on the new-token stream but not tracked by anyone yet
+            if not existing.get("user_initiated"):
+                await db.pump_tokens.update_one({"mint": mint}, {"$set": {"user_initiated": True}})
+            watcher.track(mint, token=existing)
             return {
                 "success": True,
                 "message": "Token already being tracked",
@@ -1771,13 +2769,15 @@ async def track_pump_token(request: Request, mint: str = Query(..., description=
             }
         
         # Create tracking entry
-        await db.pump_tokens.insert_one({
+        token = {
             "mint": mint,
             "stage": "created",
             "created_at": datetime.now(timezone.utc),
             "migrated": False,
             "user_initiated": True
-        })
+        }
+        await db.pump_tokens.insert_one(token)
+        watcher.track(mint, token=token)
         
         logger.info(f"Started tracking pump.fun token: {mint}")
         
@@ -1793,12 +2793,15 @@ async def track_pump_token(request: Request, mint: str = Query(..., description=
 
 
 @api_router.get("/pump/status/{mint}")
-@limiter.limit("30/minute")
+@limiter.limit("120/minute")
 async def get_pump_status(request: Request, mint: str):
     """
     Get current status of a pump.fun token
     Returns: stage, bonding_progress, pair_address (if migrated)
-    Rate limit: 30 requests per minute
+    Served from the watcher's in-memory status of tracked tokens (lookups of
+    untracked or unknown mints are cached for PUMP_UNTRACKED_STATUS_TTL); for
+    live updates use /pump/stream/{mint} or /pump/ws instead of polling.
+    Rate limit: 120 requests per minute
     """
     try:
         watcher = await get_watcher(db)
@@ -1820,6 +2823,109 @@ async def get_pump_status(request: Request, mint: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@api_router.get("/pump/stream/{mint}")
+async def stream_pump_status(request: Request, mint: str):
+    """
+    Live status of a tracked pump.fun token over Server-Sent Events
+
+    Sends `event: status` with the /pump/status body (without "found") on
+    connect and after every stage or bonding-progress change. A slow client
+    skips to the newest status.
+    """
+    watcher = await get_watcher(db)
+    await watcher.get_token_status(mint)  # loads a tracked token not yet in memory
+    subscription = watcher.subscribe_status(mint)
+    if subscription is None:
+        raise HTTPException(status_code=404, detail="Token not tracked. Start tracking first.")
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    status = await asyncio.wait_for(subscription.next(), timeout=QUOTE_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@api_router.websocket("/pump/ws")
+async def pump_status_socket(websocket: WebSocket):
+    """
+    Live status of several tracked pump.fun tokens over one WebSocket
+
+    Client messages:
+        {"action": "subscribe", "mint": "..."}
+        {"action": "unsubscribe", "mint": "..."}
+
+    Server messages:
+        {"type": "status", "mint": "...", "data": {...}}  (same body as /pump/stream/{mint})
+        {"type": "error", "mint": "...", "status": int, "detail": ...}
+    """
+    await websocket.accept()
+    watcher = await get_watcher(db)
+    forwarders: Dict[str, asyncio.Task] = {}
+
+    async def send_error(mint: Optional[str], status: int, detail: Any) -> None:
+        await websocket.send_json({"type": "error", "mint": mint, "status": status, "detail": detail})
+
+    async def forward(mint: str, subscription) -> None:
+        try:
+            while True:
+                status = await subscription.next()
+                await websocket.send_json({"type": "status", "mint": mint, "data": status})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.debug(f"Pump status socket closed while sending: {e}")
+        finally:
+            subscription.close()
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                action = message.get("action")
+                mint = str(message.get("mint", ""))
+            except (ValueError, AttributeError):
+                await send_error(None, 400, "Messages must be JSON objects")
+                continue
+
+            if action == "unsubscribe":
+                task = forwarders.pop(mint, None)
+                if task:
+                    task.cancel()
+                continue
+            if action != "subscribe":
+                await send_error(mint, 400, f"Unsupported action: {action}")
+                continue
+            if mint in forwarders:
+                continue
+            if len(forwarders) >= PUMP_STREAM_MAX_PER_SOCKET:
+                await send_error(mint, 400, f"Too many subscriptions (max {PUMP_STREAM_MAX_PER_SOCKET})")
+                continue
+
+            await watcher.get_token_status(mint)
+            subscription = watcher.subscribe_status(mint)
+            if subscription is None:
+                await send_error(mint, 404, "Token not tracked. Start tracking first.")
+                continue
+            forwarders[mint] = asyncio.create_task(forward(mint, subscription))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in forwarders.values():
+            task.cancel()
+
+
 @api_router.post("/pump/mark-stage")
 async def mark_user_action_complete(
     mint: str = Query(...),
@@ -1845,6 +2951,9 @@ async def mark_user_action_complete(
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Token not found")
         
+        watcher = await get_watcher(db)
+        watcher.update_status(mint, {"stage": stage})
+        
         logger.info(f"User marked {mint} as {stage}")
         
         return {
@@ -1890,6 +2999,10 @@ async def manual_pair_override(
             upsert=True
         )
         
+        watcher = await get_watcher(db)
+        watcher.untrack(mint)
+        watcher.update_status(mint, {"pair_address": pair, "stage": "migrated", "migrated": True})
+        
         logger.info(f"Manual override: {mint} -> {pair}")
         
         return {
@@ -1919,7 +3032,12 @@ async def pump_watcher_health():
             "running": watcher.running,
             "reconnect_attempts": watcher.reconnect_attempts,
             "last_heartbeat": watcher.last_heartbeat.isoformat() if watcher.last_heartbeat else None,
-            "tracked_tokens_count": len(watcher.tracked_tokens)
+            "tracked_tokens_count": len(watcher.tracked_tokens),
+            "ingest": watcher.ingest_stats(),
+            "subscriptions": watcher.subscriptions.stats(),
+            "statuses": len(watcher.statuses),
+            "status_streams": watcher.status_updates.stats(),
+            "persistence": watcher.progress_writer.stats()
         }
         
     except Exception as e:
@@ -2147,19 +3265,19 @@ app.include_router(ad_router, prefix="/api")
 app.include_router(referral_router, prefix="/api")
 app.include_router(nft_router, prefix="/api")
 
+# Per-request deadline + cancellation on disconnect (inside CORS so a 504 still carries CORS headers)
+app.add_middleware(DeadlineMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # TODO: Replace with specific frontend domain in production
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "X-Request-Timeout-Ms"],
     max_age=600,  # Cache preflight for 10 minutes
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued handler, sampled hot-path events - see hot_logging)
+setup_logging()
 logger = logging.getLogger(__name__)
 
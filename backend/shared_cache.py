@@ -0,0 +1,261 @@
+"""
+Shared Cache Tier
+=================
+
+Optional second cache tier shared by all uvicorn workers and nodes, behind the
+in-process TTLCache. Without it every worker fetches (and pays for) the same
+0x/Jupiter quote and Dexscreener lookup on its own, so upstream calls grow with
+the worker count.
+
+- Read-through: local miss -> shared store -> local copy (keeps original age)
+- Write-through: fresh upstream results go to both tiers
+- Compact values: orjson (json fallback), zlib above a size threshold,
+  small binary header with fetch time and TTL so age/SWR semantics survive
+  the hop; pre-encoded EncodedJSON bodies are stored as-is and come back
+  as EncodedJSON
+- Fallback: store errors or timeouts switch the tier off for a back-off
+  period; requests keep running on the local tier only
+
+Any Redis-protocol server works (Redis, Valkey, KeyDB, Dragonfly). Requires
+the optional `redis` package; InMemoryStore is a local stand-in with the same
+get/set surface for tests and single-process development.
+
+ENV:
+- SHARED_CACHE_URL: e.g. redis://cache:6379/0 (unset = local tier only)
+- SHARED_CACHE_PREFIX / SHARED_CACHE_TIMEOUT / SHARED_CACHE_RETRY_INTERVAL
+- SHARED_CACHE_COMPRESS_MIN_BYTES
+"""
+
+import os
+import time
+import zlib
+import struct
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from ttl_cache import TTLCache
+from json_bytes import EncodedJSON, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+
+SHARED_CACHE_URL = os.getenv('SHARED_CACHE_URL')
+SHARED_CACHE_PREFIX = os.getenv('SHARED_CACHE_PREFIX', 'swaplaunch')
+SHARED_CACHE_TIMEOUT = float(os.getenv('SHARED_CACHE_TIMEOUT', '0.05'))  # seconds per store call
+SHARED_CACHE_RETRY_INTERVAL = float(os.getenv('SHARED_CACHE_RETRY_INTERVAL', '30'))  # back-off after errors
+SHARED_CACHE_COMPRESS_MIN_BYTES = int(os.getenv('SHARED_CACHE_COMPRESS_MIN_BYTES', '1024'))
+
+# Value layout: flags (1 byte) | stored_at unix time (double) | ttl seconds (float) | payload
+_HEADER = struct.Struct("!Bdf")
+_FLAG_ZLIB = 0x01
+_FLAG_ENCODED = 0x02  # payload is an EncodedJSON body
+
+
+def encode_value(value: Any, stored_at: float, ttl: float) -> bytes:
+    """Serialize a JSON-compatible value with its fetch time and TTL, compressing large payloads."""
+    if isinstance(value, EncodedJSON):
+        payload = value.body
+        flags = _FLAG_ENCODED
+    else:
+        payload = dumps(value)
+        flags = 0
+    if len(payload) >= SHARED_CACHE_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, 1)
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= _FLAG_ZLIB
+    return _HEADER.pack(flags, stored_at, ttl) + payload
+
+
+def decode_value(raw: bytes) -> Tuple[Any, float, float]:
+    """Inverse of encode_value. Returns (value, stored_at, ttl)."""
+    flags, stored_at, ttl = _HEADER.unpack_from(raw)
+    payload = raw[_HEADER.size:]
+    if flags & _FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    if flags & _FLAG_ENCODED:
+        return EncodedJSON(payload), stored_at, ttl
+    return loads(payload), stored_at, ttl
+
+
+class InMemoryStore:
+    """
+    Local stand-in for a Redis-protocol store (get/set with PX expiry),
+    e.g. for tests that simulate several workers sharing one store.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, px: Optional[int] = None) -> bool:
+        self._data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    async def aclose(self) -> None:
+        self._data.clear()
+
+
+class SharedCacheStore:
+    """Connection to the shared store with timeouts and local-only fallback."""
+
+    def __init__(self, client=None, prefix: str = SHARED_CACHE_PREFIX, timeout: float = SHARED_CACHE_TIMEOUT):
+        self.client = client
+        self.prefix = prefix
+        self.timeout = timeout
+        self._disabled_until = 0.0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+        self.bytes_written = 0
+
+    @classmethod
+    def from_env(cls) -> "SharedCacheStore":
+        """Store from SHARED_CACHE_URL; disabled (client=None) if unset or redis is missing."""
+        if not SHARED_CACHE_URL:
+            return cls()
+        if not REDIS_AVAILABLE:
+            logger.warning("SHARED_CACHE_URL set but redis not installed - using local cache only. Install with: pip install redis")
+            return cls()
+        return cls(redis_asyncio.from_url(SHARED_CACHE_URL))
+
+    @property
+    def enabled(self) -> bool:
+        return self.client is not None
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._disabled_until
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _fail(self, op: str, e: Exception) -> None:
+        self.errors += 1
+        self._disabled_until = time.monotonic() + SHARED_CACHE_RETRY_INTERVAL
+        logger.warning(
+            f"Shared cache {op} failed ({type(e).__name__}: {e}) - "
+            f"local cache only for {SHARED_CACHE_RETRY_INTERVAL:.0f}s"
+        )
+
+    async def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float, float]]:
+        """
+        Read an entry from the shared store.
+
+        Returns:
+            (value, age_seconds, ttl), or None on a miss or while the store is unavailable
+        """
+        if not self.available:
+            return None
+        try:
+            raw = await asyncio.wait_for(self.client.get(self._key(namespace, key)), self.timeout)
+        except Exception as e:
+            self._fail("get", e)
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        try:
+            value, stored_at, ttl = decode_value(raw)
+        except Exception as e:
+            logger.warning(f"Dropping undecodable shared cache entry {namespace}:{key}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value, max(0.0, time.time() - stored_at), ttl
+
+    async def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """Write an entry that expires after `ttl` seconds. Errors are logged, never raised."""
+        if not self.available:
+            return
+        try:
+            raw = encode_value(value, time.time(), ttl)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not caching unserializable value {namespace}:{key}: {e}")
+            return
+        try:
+            await asyncio.wait_for(
+                self.client.set(self._key(namespace, key), raw, px=max(1, int(ttl * 1000))),
+                self.timeout
+            )
+        except Exception as e:
+            self._fail("set", e)
+            return
+        self.writes += 1
+        self.bytes_written += len(raw)
+
+    async def close(self) -> None:
+        if self.client is not None:
+            try:
+                await self.client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing shared cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "available": self.available,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "writes": self.writes,
+            "bytes_written": self.bytes_written,
+            "errors": self.errors
+        }
+
+
+class TieredCache:
+    """In-process TTLCache in front of a SharedCacheStore namespace."""
+
+    def __init__(self, local: TTLCache, store: SharedCacheStore):
+        self.local = local
+        self.store = store
+        self.namespace = local.namespace
+
+    async def get_entry(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Read-through lookup.
+
+        Returns:
+            (value, age_seconds), or None if neither tier has a live entry
+        """
+        cached = self.local.get_entry(key)
+        if cached is not None or not self.store.available:
+            return cached
+
+        shared = await self.store.get(self.namespace, key)
+        if shared is None:
+            return None
+        value, age, ttl = shared
+        # Back-dated local copy: expires together with the shared entry
+        self.local.set(key, value, ttl=ttl, age=age)
+        return value, age
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        cached = await self.get_entry(key)
+        return default if cached is None else cached[0]
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """Write-through: local tier immediately, then the shared store."""
+        self.local.set(key, value, ttl=ttl)
+        await self.store.set(self.namespace, key, value, ttl)
@@ -0,0 +1,96 @@
+"""
+Single-Flight Request Coalescing
+================================
+
+Collapses concurrent identical upstream fetches into one.
+
+The first caller for a key starts the fetch; every concurrent caller with the
+same key awaits that same task. The result (or exception) is delivered to all
+waiters, and the key is released as soon as the fetch finishes so the next
+call after that goes through the normal cache path again.
+
+The fetch runs as its own task and waiters await it shielded, so a client
+that disconnects does not cancel the fetch for everyone else. With
+cancel_abandoned=True the fetch is cancelled once its last waiter is gone
+(e.g. superseded quote requests, see latest_wins), freeing the upstream
+connection for other users.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Per-key coalescing of concurrent async calls."""
+
+    def __init__(self, name: str, cancel_abandoned: bool = False):
+        self.name = name
+        self.cancel_abandoned = cancel_abandoned
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}  # fetch task -> callers still awaiting it
+        self.leaders = 0     # calls that started an upstream fetch
+        self.merged = 0      # calls that joined an in-flight fetch
+        self.errors = 0      # fetches that raised
+        self.abandoned = 0   # fetches cancelled after their last waiter left
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() once per key across concurrent callers.
+
+        Args:
+            key: Coalescing key (use the same key as the response cache)
+            fn: Zero-arg coroutine factory performing the fetch
+
+        Returns:
+            The fetch result, shared by all waiters
+
+        Raises:
+            Whatever fn() raised - propagated to every waiter
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._release(key, t))
+            self.leaders += 1
+        else:
+            self.merged += 1
+            logger.debug(f"SingleFlight[{self.name}] merged request for {key}")
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            remaining = self._waiters.pop(task) - 1
+            if remaining:
+                self._waiters[task] = remaining
+            elif self.cancel_abandoned and not task.done():
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]  # the next caller starts a fresh fetch
+                task.cancel()
+                self.abandoned += 1
+                logger.debug(f"SingleFlight[{self.name}] cancelled abandoned fetch for {key}")
+
+    def _release(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inflight": len(self._inflight),
+            "leaders": self.leaders,
+            "merged": self.merged,
+            "errors": self.errors,
+            "abandoned": self.abandoned
+        }
@@ -0,0 +1,117 @@
+"""
+Solana Token USD Valuation Service
+==================================
+
+Decimals-aware USD valuation for arbitrary Solana input mints, replacing the
+"everything is SOL at $180 with 9 decimals" placeholder in the quote path.
+
+- Mint decimals resolved in batches via RPC getMultipleAccounts (jsonParsed)
+  and persisted in MongoDB (`token_metadata`, chain="solana")
+- USD prices fetched from the Jupiter Price API, many mints per call
+- In-memory table with TTL and background refresh (pricing_service, shared
+  with token_pricing) under the single chain "solana"
+
+Like token_pricing, the quote handler only reads memory: a miss returns None
+(fallback fee) and queues the mint for an asynchronous fill.
+"""
+
+import os
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from http_pool import http_pool
+from pricing_service import PricingService
+
+logger = logging.getLogger(__name__)
+
+JUPITER_PRICE_API_URL = os.getenv('JUPITER_PRICE_API_URL', 'https://lite-api.jup.ag/price/v3')
+SOLANA_PRICE_BATCH_SIZE = int(os.getenv('SOLANA_PRICE_BATCH_SIZE', '50'))  # mints per price call
+SOLANA_RPC_BATCH_SIZE = 100  # getMultipleAccounts limit
+
+SOLANA = "solana"
+SOL_MINT = "So11111111111111111111111111111111111111112"
+
+# Well-known mints (no RPC round-trip needed)
+SEED_METADATA = {
+    SOL_MINT: {"decimals": 9, "symbol": "SOL"},
+    "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v": {"decimals": 6, "symbol": "USDC"},
+    "Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB": {"decimals": 6, "symbol": "USDT"},
+}
+
+
+def parse_jupiter_prices(payload: Dict[str, Any]) -> Dict[str, Tuple[float, Optional[int]]]:
+    """
+    Parse a Jupiter Price API response into {mint: (usd_price, decimals)}.
+    Accepts both v3 ({mint: {usdPrice, decimals}}) and v2 ({data: {mint: {price}}}).
+    """
+    entries = payload.get("data", payload) if isinstance(payload, dict) else {}
+    prices = {}
+    for mint, data in entries.items():
+        if not isinstance(data, dict):
+            continue
+        price = data.get("usdPrice", data.get("price"))
+        if price is None:
+            continue
+        prices[mint] = (float(price), data.get("decimals"))
+    return prices
+
+
+class SolanaPricingService(PricingService):
+    """In-memory USD valuation for Solana mints with background fill and refresh."""
+
+    name = "Solana pricing"
+
+    def __init__(self, metadata_collection, rpc_url: Optional[str]):
+        super().__init__(metadata_collection, (SOLANA,), {SOLANA: SEED_METADATA})
+        self.rpc_url = rpc_url
+
+    # ---------- Upstream fills ----------
+
+    async def _fill(self, chain: str, mints: List[str]) -> None:
+        """Prices first: Jupiter also reports decimals, sparing most RPC lookups."""
+        await self._refresh_prices(chain, mints)
+        await self._fill_metadata(chain, mints)
+
+    async def _refresh_prices(self, chain: str, mints: List[str]) -> None:
+        """Fetch USD prices for many mints per Jupiter Price API call."""
+        now = time.time()
+        prices = self._prices[chain]
+        metadata = self._metadata[chain]
+        async with http_pool.session("jupiter_price", timeout=10.0) as http_client:
+            for start in range(0, len(mints), SOLANA_PRICE_BATCH_SIZE):
+                batch = mints[start:start + SOLANA_PRICE_BATCH_SIZE]
+                response = await http_client.get(JUPITER_PRICE_API_URL, params={"ids": ",".join(batch)})
+                if response.status_code != 200:
+                    logger.warning(f"Jupiter Price API error: {response.status_code}")
+                    self.refresh_errors += 1
+                    continue
+                for mint, (price, decimals) in parse_jupiter_prices(response.json()).items():
+                    prices[mint] = (price, now)
+                    if decimals is not None and mint not in metadata:
+                        await self._store_metadata(chain, mint, {"decimals": int(decimals), "symbol": None})
+        self.refreshes += 1
+
+    async def _fill_metadata(self, chain: str, mints: List[str]) -> None:
+        """Resolve decimals for unknown mints via batched getMultipleAccounts (jsonParsed)."""
+        missing = [m for m in mints if m not in self._metadata[chain]]
+        if not missing or not self.rpc_url:
+            return
+
+        async with http_pool.session("solana_rpc", timeout=10.0) as http_client:
+            for start in range(0, len(missing), SOLANA_RPC_BATCH_SIZE):
+                batch = missing[start:start + SOLANA_RPC_BATCH_SIZE]
+                response = await http_client.post(self.rpc_url, json={
+                    "jsonrpc": "2.0",
+                    "id": 1,
+                    "method": "getMultipleAccounts",
+                    "params": [batch, {"encoding": "jsonParsed"}]
+                })
+                response.raise_for_status()
+                accounts = response.json().get("result", {}).get("value", [])
+                for mint, account in zip(batch, accounts):
+                    try:
+                        decimals = account["data"]["parsed"]["info"]["decimals"]
+                    except (TypeError, KeyError):
+                        continue  # not a mint account - retried on the next miss
+                    await self._store_metadata(chain, mint, {"decimals": int(decimals), "symbol": None})
@@ -0,0 +1,192 @@
+"""
+Shared Refresh Loops for Streaming Subscriptions
+================================================
+
+Clients that keep a swap form open used to poll for fresh quotes, so upstream
+load grew with the number of open forms. A StreamHub runs ONE refresh loop
+per subscription key (chain + pair + size bucket) and fans every update out
+to all subscribers of that key, so load grows with the number of distinct
+keys instead.
+
+- Each subscriber holds only the newest update: a slow consumer skips
+  intermediate updates instead of buffering them
+- New subscribers receive the key's last update immediately
+- A key without subscribers keeps refreshing for `idle_ttl` seconds (page
+  reloads resubscribe to a warm loop), then its loop stops and the key is
+  dropped
+- A failed refresh is logged and skipped; subscribers keep the last update
+
+PushHub is the same fan-out for data that changes by events rather than by
+polling (pump.fun token status): the producer calls publish(key, update)
+and there is no refresh loop.
+"""
+
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One consumer of a stream key; holds at most the newest undelivered update."""
+
+    def __init__(self, hub: Any, key: str):
+        self.hub = hub
+        self.key = key
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.skipped = 0  # updates replaced before the consumer read them
+
+    def _offer(self, update: Any) -> None:
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.skipped += 1
+        self._queue.put_nowait(update)
+
+    async def next(self) -> Any:
+        """Wait for the next update."""
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self.hub._unsubscribe(self)
+
+
+class _Stream:
+    def __init__(self, fetch: Callable[[], Awaitable[Any]]):
+        self.fetch = fetch
+        self.subscribers: Set[Subscription] = set()
+        self.latest: Any = None
+        self.idle_since: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class StreamHub:
+    """Per-key refresh loops with fan-out to subscribers."""
+
+    def __init__(self, name: str, interval: float, idle_ttl: float = 30.0):
+        self.name = name
+        self.interval = interval
+        self.idle_ttl = idle_ttl
+        self._streams: Dict[str, _Stream] = {}
+        self.updates = 0   # successful refreshes
+        self.errors = 0    # failed refreshes
+        self.dropped = 0   # loops stopped after idle_ttl without subscribers
+
+    def subscribe(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Subscription:
+        """
+        Subscribe to `key`, starting its refresh loop if none runs yet.
+
+        Args:
+            key: Stream key - subscribers with the same key share one loop
+            fetch: Zero-arg coroutine factory producing an update (only used
+                   when this call starts the loop)
+        """
+        stream = self._streams.get(key)
+        if stream is None:
+            stream = _Stream(fetch)
+            self._streams[key] = stream
+            stream.task = asyncio.create_task(self._run(key, stream))
+
+        subscription = Subscription(self, key)
+        stream.subscribers.add(subscription)
+        stream.idle_since = None
+        if stream.latest is not None:
+            subscription._offer(stream.latest)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        stream = self._streams.get(subscription.key)
+        if stream is None or subscription not in stream.subscribers:
+            return
+        stream.subscribers.discard(subscription)
+        if not stream.subscribers:
+            stream.idle_since = time.monotonic()
+
+    async def _run(self, key: str, stream: _Stream) -> None:
+        try:
+            while True:
+                if stream.idle_since is not None and time.monotonic() - stream.idle_since >= self.idle_ttl:
+                    self.dropped += 1
+                    logger.debug(f"StreamHub[{self.name}] dropped idle key {key}")
+                    return
+                try:
+                    update = await stream.fetch()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.errors += 1
+                    logger.warning(f"StreamHub[{self.name}] refresh failed for {key}: {e}")
+                else:
+                    self.updates += 1
+                    stream.latest = update
+                    for subscription in list(stream.subscribers):
+                        subscription._offer(update)
+                await asyncio.sleep(self.interval)
+        finally:
+            # No await between the idle check and here: a concurrent subscribe
+            # either sees the running loop or starts a fresh one
+            if self._streams.get(key) is stream:
+                del self._streams[key]
+
+    async def close(self) -> None:
+        """Stop every refresh loop (shutdown)."""
+        tasks = [stream.task for stream in self._streams.values() if stream.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._streams),
+            "subscribers": sum(len(s.subscribers) for s in self._streams.values()),
+            "interval_seconds": self.interval,
+            "updates": self.updates,
+            "errors": self.errors,
+            "dropped": self.dropped
+        }
+
+
+class PushHub:
+    """Per-key fan-out of published updates."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.published = 0  # publish() calls with at least one subscriber
+        self.delivered = 0  # updates offered to subscribers
+
+    def subscribe(self, key: str, initial: Any = None) -> Subscription:
+        """Subscribe to `key`; `initial` (the current value) is delivered first."""
+        subscription = Subscription(self, key)
+        self._subscribers.setdefault(key, set()).add(subscription)
+        if initial is not None:
+            subscription._offer(initial)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.key]
+
+    def publish(self, key: str, update: Any) -> int:
+        """Offer an update to every subscriber of `key`; returns how many."""
+        subscribers = self._subscribers.get(key)
+        if not subscribers:
+            return 0
+        for subscription in subscribers:
+            subscription._offer(update)
+        self.published += 1
+        self.delivered += len(subscribers)
+        return len(subscribers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "published": self.published,
+            "delivered": self.delivered
+        }
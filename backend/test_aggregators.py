@@ -0,0 +1,98 @@
+"""
+Unit Tests for Best-Route Quoting
+=================================
+
+Tests best-output selection, deadlines and hedged requests with local
+stand-in adapters.
+"""
+
+import asyncio
+import pytest
+
+pytest.importorskip("httpx")
+
+import aggregators
+from aggregators import AggregatorAdapter, AggregatorError, BestRouteQuoter
+
+PARAMS = {
+    "chain": "ethereum",
+    "chain_id": 1,
+    "sell_token": "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee",
+    "buy_token": "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",
+    "sell_amount": "1000000000000000000",
+    "taker": "0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb0"
+}
+
+
+class StandInAdapter(AggregatorAdapter):
+    """Adapter answering with a fixed buyAmount after a list of per-call delays."""
+
+    def __init__(self, name, buy_amount, delays=(0.0,), error=None):
+        self.name = name
+        self.buy_amount = buy_amount
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+
+    async def quote(self, **params):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if self.error:
+            raise AggregatorError(self.name, self.error)
+        return {"buyAmount": str(self.buy_amount), "minBuyAmount": str(self.buy_amount - 1), "transaction": {"data": "0x"}}
+
+
+class TestBestQuote:
+    """Test selection across adapters."""
+
+    def test_best_output_wins(self):
+        quoter = BestRouteQuoter([StandInAdapter("0x", 100), StandInAdapter("KyberSwap", 105)])
+        result = asyncio.run(quoter.best_quote(**PARAMS))
+        assert result["source"] == "KyberSwap"
+        assert result["best"]["buyAmount"] == "105"
+        assert [q["source"] for q in result["quotes"]] == ["KyberSwap", "0x"]
+
+    def test_failed_adapter_is_skipped(self):
+        quoter = BestRouteQuoter([StandInAdapter("0x", 100), StandInAdapter("KyberSwap", 105, error="no route")])
+        result = asyncio.run(quoter.best_quote(**PARAMS))
+        assert result["source"] == "0x"
+        assert quoter.errors["KyberSwap"] == 1
+
+    def test_deadline_drops_slow_adapter(self):
+        quoter = BestRouteQuoter(
+            [StandInAdapter("0x", 100), StandInAdapter("KyberSwap", 105, delays=(1.0,))],
+            deadline=0.05
+        )
+        result = asyncio.run(quoter.best_quote(**PARAMS))
+        assert result["source"] == "0x"
+        assert quoter.late["KyberSwap"] == 1
+
+    def test_all_failing_raises(self):
+        quoter = BestRouteQuoter([StandInAdapter("0x", 100, error="down")])
+        with pytest.raises(AggregatorError):
+            asyncio.run(quoter.best_quote(**PARAMS))
+
+
+class TestHedging:
+    """Test the hedged duplicate request."""
+
+    def test_slow_primary_is_hedged(self, monkeypatch):
+        monkeypatch.setattr(aggregators, "HEDGE_MIN_DELAY", 0.01)
+        adapter = StandInAdapter("0x", 100, delays=(1.0, 0.0))
+        quoter = BestRouteQuoter([adapter], deadline=0.5)
+        for _ in range(aggregators.HEDGE_MIN_SAMPLES):
+            quoter._latency["0x"].record(0.01)
+
+        result = asyncio.run(quoter.best_quote(**PARAMS))
+        assert result["quotes"][0]["hedged"] is True
+        assert adapter.calls == 2
+        assert quoter.hedges["0x"] == 1
+        assert quoter.hedge_wins["0x"] == 1
+
+    def test_no_hedge_without_latency_history(self):
+        adapter = StandInAdapter("0x", 100, delays=(0.05,))
+        quoter = BestRouteQuoter([adapter])
+        asyncio.run(quoter.best_quote(**PARAMS))
+        assert adapter.calls == 1
+        assert quoter.hedges["0x"] == 0
@@ -0,0 +1,186 @@
+"""
+Unit Tests for Per-Request Deadlines
+====================================
+
+Tests deadline resolution, timeout capping, detached work and the ASGI
+middleware's 504 / disconnect handling.
+"""
+
+import asyncio
+import pytest
+
+import deadline
+from deadline import (
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    deadline_scope,
+    detached,
+    max_time_ms,
+    remaining,
+    request_deadline,
+    timeout_for
+)
+
+
+class TestTimeouts:
+    """Test timeouts derived from the remaining budget."""
+
+    def test_no_deadline_keeps_default(self):
+        assert remaining() is None
+        assert timeout_for(10.0) == 10.0
+
+    def test_timeout_capped_by_remaining(self):
+        with deadline_scope(2.0):
+            assert timeout_for(10.0) <= 2.0
+            assert timeout_for(1.0) == 1.0
+            assert max_time_ms(10.0) <= 2000
+
+    def test_spent_budget_raises(self):
+        with deadline_scope(0.0):
+            with pytest.raises(DeadlineExceeded):
+                timeout_for(10.0)
+
+    def test_scope_restores_previous_deadline(self):
+        with deadline_scope(5.0):
+            with deadline_scope(None):
+                assert remaining() is None
+            assert remaining() is not None
+        assert remaining() is None
+
+    def test_detached_runs_without_deadline(self):
+        async def scenario():
+            async def fetch():
+                return remaining()
+
+            with deadline_scope(1.0):
+                assert await detached(fetch)() is None
+                assert await fetch() is not None
+
+        asyncio.run(scenario())
+
+
+class TestRequestDeadline:
+    """Test endpoint defaults and the client header."""
+
+    def test_endpoint_default(self):
+        assert request_deadline("/api/evm/price", None) == deadline.ENDPOINT_DEADLINES["/api/evm/price"]
+        assert request_deadline("/api/unknown", None) == deadline.REQUEST_DEADLINE_DEFAULT
+
+    def test_header_shortens_but_never_extends(self):
+        assert request_deadline("/api/evm/quote", "3000") == 3.0
+        default = deadline.ENDPOINT_DEADLINES["/api/evm/quote"]
+        assert request_deadline("/api/evm/quote", "600000") == default
+
+    def test_invalid_header_ignored(self):
+        default = deadline.ENDPOINT_DEADLINES["/api/evm/quote"]
+        assert request_deadline("/api/evm/quote", "soon") == default
+        assert request_deadline("/api/evm/quote", "-5") == default
+
+    def test_streaming_endpoints_have_no_deadline(self):
+        assert request_deadline("/api/quote/stream", "1000") is None
+        assert request_deadline("/api/pump/stream/So11111111111111111111111111111111111111112", None) is None
+
+
+def http_scope(path="/api/evm/quote", timeout_ms=None):
+    headers = [(b"x-request-timeout-ms", str(timeout_ms).encode())] if timeout_ms else []
+    return {"type": "http", "method": "GET", "path": path, "headers": headers}
+
+
+class TestDeadlineMiddleware:
+    """Test cancellation on deadline expiry and client disconnect."""
+
+    def test_fast_handler_passes_through(self):
+        async def scenario():
+            sent = []
+
+            async def app(scope, receive, send):
+                assert remaining() is not None
+                await send({"type": "http.response.start", "status": 200, "headers": []})
+                await send({"type": "http.response.body", "body": b"ok"})
+
+            async def receive():
+                await asyncio.sleep(10)
+
+            async def send(message):
+                sent.append(message)
+
+            await DeadlineMiddleware(app)(http_scope(), receive, send)
+            assert sent[0]["status"] == 200
+
+        asyncio.run(scenario())
+
+    def test_slow_handler_gets_504_and_is_cancelled(self):
+        async def scenario():
+            sent = []
+            cancelled = asyncio.Event()
+
+            async def app(scope, receive, send):
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+
+            async def receive():
+                await asyncio.sleep(10)
+
+            async def send(message):
+                sent.append(message)
+
+            exceeded = deadline._counters["exceeded"]
+            await DeadlineMiddleware(app)(http_scope(timeout_ms=50), receive, send)
+            assert cancelled.is_set()
+            assert sent[0]["status"] == 504
+            assert deadline._counters["exceeded"] == exceeded + 1
+
+        asyncio.run(scenario())
+
+    def test_disconnect_cancels_handler(self):
+        async def scenario():
+            sent = []
+            cancelled = asyncio.Event()
+
+            async def app(scope, receive, send):
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.set()
+                    raise
+
+            async def receive():
+                await asyncio.sleep(0.02)
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+
+            await DeadlineMiddleware(app)(http_scope(), receive, send)
+            assert cancelled.is_set()
+            assert sent == []
+
+        asyncio.run(scenario())
+
+    def test_request_body_relayed_to_app(self):
+        async def scenario():
+            sent = []
+            chunks = [
+                {"type": "http.request", "body": b'{"a":1}', "more_body": False},
+            ]
+
+            async def app(scope, receive, send):
+                message = await receive()
+                await send({"type": "http.response.start", "status": 200, "headers": []})
+                await send({"type": "http.response.body", "body": message["body"]})
+
+            async def receive():
+                if chunks:
+                    return chunks.pop(0)
+                await asyncio.sleep(10)
+
+            async def send(message):
+                sent.append(message)
+
+            await DeadlineMiddleware(app)(http_scope(), receive, send)
+            assert sent[1]["body"] == b'{"a":1}'
+
+        asyncio.run(scenario())
@@ -0,0 +1,98 @@
+"""
+Unit Tests for Merged Discovery Results
+=======================================
+
+Tests that a result missing a skipped source (open circuit, shed budget,
+deadline) falls back to the last known result instead of replacing it in
+the cache.
+"""
+
+import asyncio
+import pytest
+
+pytest.importorskip("httpx")
+
+from deadline import DeadlineExceeded
+from discovery_results import finish_result, source_skipped
+from json_bytes import decoded
+from resilience import CircuitBreaker, UpstreamGuard, UpstreamUnavailable
+from shared_cache import InMemoryStore, SharedCacheStore, TieredCache
+from ttl_cache import TTLCache
+from upstream_budget import BudgetExhausted
+
+
+def make_cache(name: str) -> TieredCache:
+    return TieredCache(TTLCache(name, max_entries=100, stale_ttl=600), SharedCacheStore(InMemoryStore()))
+
+
+def open_guard() -> UpstreamGuard:
+    breaker = CircuitBreaker("dexscreener", min_requests=2, failure_rate=0.5)
+    for _ in range(2):
+        breaker.allow()
+        breaker.record(False, 0.1)
+    assert breaker.state == "open"
+    return UpstreamGuard("dexscreener", max_concurrent=4, breaker=breaker)
+
+
+class TestSourceSkipped:
+    """Test which failures mean a source was skipped."""
+
+    def test_skipped_errors(self):
+        assert source_skipped(UpstreamUnavailable("dexscreener", "circuit_open"))
+        assert source_skipped(BudgetExhausted("dexscreener", retry_after=1.0))
+        assert source_skipped(DeadlineExceeded("dexscreener request"))
+
+    def test_other_errors_are_answers(self):
+        assert not source_skipped(ValueError("bad json"))
+
+
+class TestFinishResult:
+    """Test caching and fallback of merged results."""
+
+    def test_complete_result_cached(self):
+        async def scenario():
+            cache = make_cache("test_discovery_complete")
+            result = {"query": "pepe", "results": [{"symbol": "PEPE"}], "count": 1}
+            returned = await finish_result(cache, "resolve_pepe_all", result, False, ttl=60)
+            return decoded(returned), decoded(await cache.get("resolve_pepe_all"))
+
+        returned, cached = asyncio.run(scenario())
+        assert returned == cached
+        assert cached["count"] == 1
+
+    def test_open_circuit_serves_stale_entry(self):
+        """Dexscreener's guard is open: the previous result is served and kept"""
+        async def scenario():
+            cache = make_cache("test_discovery_stale")
+            good = {"query": "pepe", "results": [{"symbol": "PEPE"}], "count": 1}
+            await finish_result(cache, "resolve_pepe_all", good, False, ttl=0.01)
+            await asyncio.sleep(0.02)  # expired, within the stale grace
+
+            skipped = False
+            try:
+                async with open_guard().slot():
+                    pass
+            except Exception as e:
+                skipped = source_skipped(e)
+
+            blank = {"query": "pepe", "results": [], "count": 0}
+            returned = await finish_result(cache, "resolve_pepe_all", blank, skipped, ttl=60)
+            return skipped, returned, cache
+
+        skipped, returned, cache = asyncio.run(scenario())
+        assert skipped is True
+        assert returned["stale"] is True
+        assert returned["results"] == [{"symbol": "PEPE"}]
+        # the blank list was not cached over the good entry
+        assert decoded(cache.local.get_stale("resolve_pepe_all")[0])["count"] == 1
+
+    def test_skipped_without_stale_entry_is_partial(self):
+        async def scenario():
+            cache = make_cache("test_discovery_partial")
+            result = {"query": "pepe", "results": [{"symbol": "PEPE"}], "count": 1}
+            returned = await finish_result(cache, "resolve_pepe_all", result, True, ttl=60)
+            return returned, await cache.get("resolve_pepe_all")
+
+        returned, cached = asyncio.run(scenario())
+        assert returned["partial"] is True
+        assert cached is None
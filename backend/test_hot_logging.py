@@ -0,0 +1,139 @@
+"""
+Unit Tests for Hot-Path Logging
+===============================
+
+Tests event sampling, lazy rendering, the JSON formatter and the
+non-blocking queue handler.
+"""
+
+import io
+import json
+import queue
+import logging
+
+import hot_logging
+from hot_logging import (
+    DroppingQueueHandler,
+    Event,
+    JSONFormatter,
+    log_event,
+    parse_sample_rates,
+    setup_logging
+)
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def capture_logger(name):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = CaptureHandler()
+    logger.handlers = [handler]
+    return logger, handler
+
+
+class TestSampling:
+    """Test per-event sample rates."""
+
+    def test_parse_sample_rates(self):
+        rates = parse_sample_rates("quote.cache=0.5, quote.fee=2,bad=x,")
+        assert rates == {"quote.cache": 0.5, "quote.fee": 1.0}
+
+    def test_unlisted_event_always_logged(self):
+        logger, handler = capture_logger("test.hot.unlisted")
+        for _ in range(5):
+            log_event(logger, "test.always", value=1)
+        assert len(handler.records) == 5
+
+    def test_zero_rate_drops_and_counts(self, monkeypatch):
+        monkeypatch.setitem(hot_logging.SAMPLE_RATES, "test.never", 0.0)
+        logger, handler = capture_logger("test.hot.never")
+        before = hot_logging._sampled_out["test.never"]
+        for _ in range(3):
+            log_event(logger, "test.never", value=1)
+        assert handler.records == []
+        assert hot_logging._sampled_out["test.never"] == before + 3
+
+    def test_sampled_record_carries_rate(self, monkeypatch):
+        monkeypatch.setitem(hot_logging.SAMPLE_RATES, "test.half", 0.5)
+        monkeypatch.setattr(hot_logging.random, "random", lambda: 0.1)
+        logger, handler = capture_logger("test.hot.half")
+        log_event(logger, "test.half", value=1)
+        assert handler.records[0].msg.fields["sample_rate"] == 0.5
+
+    def test_disabled_level_skips_event(self):
+        logger, handler = capture_logger("test.hot.level")
+        log_event(logger, "test.debug", level=logging.DEBUG, value=1)
+        assert handler.records == []
+
+
+class TestFormatting:
+    """Test lazy event rendering and structured output."""
+
+    def test_event_renders_on_demand(self):
+        class Counting:
+            renders = 0
+
+            def __str__(self):
+                Counting.renders += 1
+                return "x"
+
+        event = Event("quote.fetched", {"chain": "ethereum", "token": Counting()})
+        assert Counting.renders == 0
+        assert str(event) == "quote.fetched chain=ethereum token=x"
+        assert Counting.renders == 1
+
+    def test_json_formatter_event_fields(self):
+        record = logging.LogRecord("server", logging.INFO, __file__, 1, Event("quote.cache", {"chain": "bsc", "age": 1.5, "obj": object()}), None, None)
+        entry = json.loads(JSONFormatter().format(record))
+        assert entry["event"] == "quote.cache"
+        assert entry["chain"] == "bsc"
+        assert entry["age"] == 1.5
+        assert isinstance(entry["obj"], str)
+
+    def test_json_formatter_plain_message(self):
+        record = logging.LogRecord("server", logging.WARNING, __file__, 1, "Using fallback fee for %s", ("bsc",), None)
+        entry = json.loads(JSONFormatter().format(record))
+        assert entry["msg"] == "Using fallback fee for bsc"
+        assert entry["level"] == "WARNING"
+
+
+class TestQueueHandler:
+    """Test the non-blocking handler and listener setup."""
+
+    def test_full_queue_drops_record(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        record = logging.LogRecord("server", logging.INFO, __file__, 1, "msg %s", ("a",), None)
+        handler.handle(record)
+        handler.handle(record)
+        assert handler.dropped == 1
+
+    def test_record_enqueued_unformatted(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        event = Event("quote.cache", {"chain": "bsc"})
+        handler.handle(logging.LogRecord("server", logging.INFO, __file__, 1, event, None, None))
+        assert handler.queue.get_nowait().msg is event
+
+    def test_listener_writes_records(self):
+        root = logging.getLogger()
+        saved_handlers, saved_level = list(root.handlers), root.level
+        stream = io.StringIO()
+        try:
+            listener = setup_logging(level="INFO", fmt="json", use_queue=True, stream=stream)
+            log_event(logging.getLogger("test.hot.listener"), "test.listener", chain="polygon")
+            listener.stop()
+            entry = json.loads(stream.getvalue().strip().splitlines()[-1])
+            assert entry["event"] == "test.listener"
+            assert entry["chain"] == "polygon"
+        finally:
+            root.handlers = saved_handlers
+            root.setLevel(saved_level)
+            hot_logging._state["handler"] = None
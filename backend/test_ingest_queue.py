@@ -0,0 +1,123 @@
+"""
+Unit Tests for Bounded Ingest Queue
+===================================
+
+Tests FIFO delivery, merging at capacity and lag bookkeeping.
+"""
+
+import json
+import time
+import asyncio
+
+from ingest_queue import IngestQueue
+
+
+def mint_key(message):
+    data = json.loads(message)
+    return data, data.get("mint") if data.get("type") == "trade" else None
+
+
+def trade(mint, mcap):
+    return json.dumps({"type": "trade", "mint": mint, "marketCapSol": mcap})
+
+
+class TestIngestQueue:
+    """Test queueing and merging."""
+
+    def test_fifo_below_capacity_keeps_raw_messages(self):
+        async def scenario():
+            queue = IngestQueue("test", 10, mint_key)
+            queue.put(trade("A", 1))
+            queue.put(trade("A", 2))
+            return [(await queue.get()).message for _ in range(2)]
+
+        assert asyncio.run(scenario()) == [trade("A", 1), trade("A", 2)]
+
+    def test_trades_merge_per_key_at_capacity(self):
+        async def scenario():
+            queue = IngestQueue("test", 1, mint_key)
+            queue.put(trade("A", 1))            # below capacity
+            queue.put(trade("A", 2))            # over: new slot for A
+            queue.put(trade("A", 3))            # merged into the slot
+            queue.put(trade("B", 1))            # over: new slot for B
+            queue.put(trade("A", 4))            # merged
+            items = [await queue.get() for _ in range(len(queue))]
+            return queue, items
+
+        queue, items = asyncio.run(scenario())
+        assert [item.message for item in items] == [
+            trade("A", 1),
+            {"type": "trade", "mint": "A", "marketCapSol": 4},
+            {"type": "trade", "mint": "B", "marketCapSol": 1}
+        ]
+        assert items[1].merged == 2
+        stats = queue.stats()
+        assert stats["merged"] == 2
+        assert stats["over_capacity"] == 2
+        assert stats["enqueued"] == 5
+
+    def test_unkeyed_messages_not_dropped_below_hard_limit(self):
+        async def scenario():
+            queue = IngestQueue("test", 1, mint_key)
+            for i in range(3):
+                queue.put(json.dumps({"type": "newToken", "mint": f"M{i}"}))
+            return len(queue)
+
+        assert asyncio.run(scenario()) == 3
+
+    def test_distinct_key_burst_bounded_by_hard_limit(self):
+        async def scenario():
+            queue = IngestQueue("test", 2, mint_key, hard_limit=5)
+            accepted = [queue.put(trade(f"M{i}", 1)) for i in range(100)]
+            merged = queue.put(trade("M3", 2))      # still merges into its slot
+            event = queue.put(json.dumps({"type": "newToken", "mint": "N"}))
+            return queue, accepted, merged, event
+
+        queue, accepted, merged, event = asyncio.run(scenario())
+        assert len(queue) == 5
+        assert accepted.count(True) == 5
+        assert merged is True
+        assert event is False
+        stats = queue.stats()
+        assert stats["dropped"] == 96
+        assert stats["max_depth"] == 5
+
+    def test_slot_released_after_get(self):
+        """A trade arriving after its slot was taken starts a new item"""
+        async def scenario():
+            queue = IngestQueue("test", 0, mint_key, hard_limit=10)
+            queue.put(trade("A", 1))
+            first = await queue.get()
+            queue.put(trade("A", 2))
+            second = await queue.get()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first.message["marketCapSol"] == 1
+        assert second.message["marketCapSol"] == 2
+        assert second.merged == 0
+
+    def test_merged_item_keeps_first_receive_time(self):
+        async def scenario():
+            queue = IngestQueue("test", 0, mint_key, hard_limit=10)
+            queue.put(trade("A", 1))
+            await asyncio.sleep(0.01)
+            queue.put(trade("A", 2))
+            item = await queue.get()
+            return item, time.monotonic() - item.received_at
+
+        item, age = asyncio.run(scenario())
+        assert item.message["marketCapSol"] == 2
+        assert item.merged == 1
+        assert age >= 0.01
+
+    def test_get_waits_for_put(self):
+        async def scenario():
+            queue = IngestQueue("test", 10, mint_key)
+            waiter = asyncio.create_task(queue.get())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            queue.put(trade("A", 1))
+            return (await waiter).message
+
+        assert asyncio.run(scenario()) == trade("A", 1)
@@ -0,0 +1,46 @@
+"""
+Unit Tests for Pre-Encoded JSON Cache Values
+============================================
+
+Tests encoding once, on-demand decoding and plain-value passthrough.
+"""
+
+import pytest
+
+from json_bytes import EncodedJSON, decoded
+
+
+class TestEncodedJSON:
+    """Test the pre-encoded cache value."""
+
+    def test_body_is_compact_json(self):
+        encoded = EncodedJSON.encode({"buyAmount": "100", "route": [1, 2]})
+        assert encoded.body == b'{"buyAmount":"100","route":[1,2]}'
+        assert len(encoded) == len(encoded.body)
+
+    def test_data_is_a_fresh_copy(self):
+        encoded = EncodedJSON.encode({"buyAmount": "100"})
+        data = encoded.data
+        data["buyAmount"] = "0"
+        assert encoded.data == {"buyAmount": "100"}
+
+    def test_unserializable_value_raises(self):
+        with pytest.raises(TypeError):
+            EncodedJSON.encode({"value": object()})
+
+    def test_projection_is_computed_once(self):
+        encoded = EncodedJSON.encode({"buyAmount": "100", "route": [1, 2]})
+        calls = []
+
+        def slim(data):
+            calls.append(1)
+            return {"buyAmount": data["buyAmount"]}
+
+        first = encoded.projected("preview", slim)
+        assert encoded.projected("preview", slim) is first
+        assert first.body == b'{"buyAmount":"100"}'
+        assert len(calls) == 1
+
+    def test_decoded_passes_plain_values_through(self):
+        assert decoded({"a": 1}) == {"a": 1}
+        assert decoded(EncodedJSON.encode({"a": 1})) == {"a": 1}
@@ -0,0 +1,100 @@
+"""
+Unit Tests for Latest-Wins Request Scopes
+=========================================
+
+Tests that a newer request for the same wallet and pair supersedes the older
+one and frees its upstream fetch.
+"""
+
+import asyncio
+import pytest
+
+from latest_wins import LatestWins, Superseded, taker_scope
+from singleflight import SingleFlight
+
+
+class TestLatestWins:
+    """Test per-scope supersession."""
+
+    def test_newer_request_supersedes_older(self):
+        async def scenario():
+            latest = LatestWins("test")
+
+            async def fetch(value):
+                await asyncio.sleep(0.02)
+                return value
+
+            older = asyncio.create_task(latest.run("wallet:eth:usdc", lambda: fetch("old")))
+            await asyncio.sleep(0)
+            newer = await latest.run("wallet:eth:usdc", lambda: fetch("new"))
+            with pytest.raises(Superseded):
+                await older
+            return latest, newer
+
+        latest, newer = asyncio.run(scenario())
+        assert newer == "new"
+        assert latest.superseded == 1
+        assert latest.stats()["inflight"] == 0
+
+    def test_other_scopes_are_independent(self):
+        async def scenario():
+            latest = LatestWins("test")
+
+            async def fetch(value):
+                await asyncio.sleep(0.01)
+                return value
+
+            return await asyncio.gather(
+                latest.run("wallet-a:eth:usdc", lambda: fetch("a")),
+                latest.run("wallet-b:eth:usdc", lambda: fetch("b"))
+            )
+
+        assert asyncio.run(scenario()) == ["a", "b"]
+
+    def test_superseded_fetch_is_freed(self):
+        """The older request's upstream fetch is cancelled when nobody else waits for it"""
+        async def scenario():
+            latest = LatestWins("test")
+            flight = SingleFlight("test", cancel_abandoned=True)
+            completed = []
+
+            async def fetch(amount):
+                await asyncio.sleep(0.05)
+                completed.append(amount)
+                return amount
+
+            older = asyncio.create_task(latest.run("w:eth:usdc", lambda: flight.do("100", lambda: fetch("100"))))
+            await asyncio.sleep(0.01)  # older fetch is in flight
+            await latest.run("w:eth:usdc", lambda: flight.do("200", lambda: fetch("200")))
+            with pytest.raises(Superseded):
+                await older
+            return flight, completed
+
+        flight, completed = asyncio.run(scenario())
+        assert completed == ["200"]
+        assert flight.abandoned == 1
+
+    def test_caller_cancellation_is_not_superseded(self):
+        async def scenario():
+            latest = LatestWins("test")
+            task = asyncio.create_task(latest.run("w:eth:usdc", lambda: asyncio.sleep(1)))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return latest
+
+        assert asyncio.run(scenario()).superseded == 0
+
+
+class TestTakerScope:
+    """Test scopes derived from the taker."""
+
+    def test_wallet_scope(self):
+        assert taker_scope("0xabc", "ethereum", "0xsell", "0xbuy") == "0xabc:ethereum:0xsell:0xbuy"
+
+    def test_anonymous_takers_have_no_scope(self):
+        assert taker_scope("", "solana", "A", "B") is None
+        assert taker_scope(None, "solana", "A", "B") is None
+        assert taker_scope("0x0000000000000000000000000000000000000000", "ethereum", "a", "b") is None
+        assert taker_scope("11111111111111111111111111111111", "solana", "A", "B") is None
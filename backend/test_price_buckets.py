@@ -0,0 +1,44 @@
+"""
+Unit Tests for Price Size Buckets
+=================================
+
+Tests rounding sell amounts to size buckets and scaling a bucket's output
+back to the actual size.
+"""
+
+from price_buckets import bucket_amount, scale_amount
+
+
+class TestBucketAmount:
+    """Test rounding to significant digits."""
+
+    def test_rounds_to_sig_digits(self):
+        assert bucket_amount("123456", sig_digits=3) == "123000"
+        assert bucket_amount("123500", sig_digits=3) == "124000"
+        assert bucket_amount("999600", sig_digits=3) == "1000000"
+
+    def test_short_amounts_unchanged(self):
+        assert bucket_amount("123", sig_digits=3) == "123"
+        assert bucket_amount("7", sig_digits=3) == "7"
+
+    def test_zero_unchanged(self):
+        assert bucket_amount("0") == "0"
+
+    def test_nearby_sizes_share_bucket(self):
+        assert bucket_amount("1000400000000000000") == bucket_amount("999900000000000000")
+
+
+class TestScaleAmount:
+    """Test scaling a bucket's output to the actual size."""
+
+    def test_scales_proportionally(self):
+        assert scale_amount("1000", "1230", "1200") == "1025"
+
+    def test_rounds_down(self):
+        assert scale_amount("10", "1", "3") == "3"
+
+    def test_zero_denominator_returns_amount(self):
+        assert scale_amount("1000", "5", "0") == "1000"
+
+    def test_missing_amount(self):
+        assert scale_amount(None, "5", "2") is None
@@ -0,0 +1,68 @@
+"""
+Unit Tests for Typed PumpPortal Events
+======================================
+
+Tests decoding of newToken, trade and migration messages into typed events
+(with whichever decoder is installed).
+"""
+
+import json
+import pytest
+
+from pump_events import decode_event, NewTokenEvent, TradeEvent, MigrationEvent, EVENT_NAMES
+
+
+class TestDecodeEvent:
+    """Test message decoding and type dispatch."""
+
+    def test_trade_extracts_used_fields(self):
+        event = decode_event(json.dumps({
+            "type": "trade",
+            "mint": "MintA",
+            "marketCapSol": 42,
+            "traderPublicKey": "Trader",
+            "tokenAmount": 1000
+        }))
+        assert isinstance(event, TradeEvent)
+        assert event.mint == "MintA"
+        assert event.market_cap_sol == 42.0
+        assert not hasattr(event, "traderPublicKey")
+
+    def test_new_token(self):
+        event = decode_event(json.dumps({
+            "type": "newToken",
+            "mint": "MintB",
+            "name": "Token",
+            "symbol": "TKN",
+            "uri": "https://example.com/meta.json",
+            "initialBuy": 5
+        }).encode())
+        assert isinstance(event, NewTokenEvent)
+        assert (event.mint, event.name, event.symbol, event.uri) == ("MintB", "Token", "TKN", "https://example.com/meta.json")
+
+    def test_migration(self):
+        event = decode_event('{"type": "migration", "mint": "MintC", "pair": "PairC"}')
+        assert isinstance(event, MigrationEvent)
+        assert (event.mint, event.pair) == ("MintC", "PairC")
+
+    def test_missing_fields_default(self):
+        event = decode_event('{"type": "trade"}')
+        assert event.mint is None
+        assert event.market_cap_sol == 0.0
+
+    def test_unknown_messages_ignored(self):
+        assert decode_event('{"message": "Successfully subscribed"}') is None
+        assert decode_event('{"type": "accountTrade", "mint": "MintA"}') is None
+        assert decode_event('[1, 2]') is None
+
+    def test_malformed_json_raises(self):
+        with pytest.raises(ValueError):
+            decode_event('{"type": "trade", ')
+
+    def test_event_names(self):
+        assert EVENT_NAMES[TradeEvent] == "trade"
+        assert EVENT_NAMES[NewTokenEvent] == "newToken"
+        assert EVENT_NAMES[MigrationEvent] == "migration"
+
+    def test_events_have_no_instance_dict(self):
+        assert not hasattr(decode_event('{"type": "trade", "mint": "A"}'), "__dict__")
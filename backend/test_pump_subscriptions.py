@@ -0,0 +1,78 @@
+"""
+Unit Tests for Key-Scoped Trade Subscriptions
+=============================================
+
+Tests batching of subscribe/unsubscribe changes, resubscription after a
+reconnect and idle expiry.
+"""
+
+from pump_subscriptions import TradeSubscriptions, SUBSCRIBE, UNSUBSCRIBE
+
+
+class TestTradeSubscriptions:
+    """Test subscription bookkeeping."""
+
+    def test_tracked_mints_batched(self):
+        subs = TradeSubscriptions(batch_max=2)
+        for mint in ("A", "B", "C"):
+            assert subs.track(mint) is True
+        assert subs.track("A") is False
+        assert subs.changed.is_set()
+
+        messages = subs.pending_messages()
+        assert messages == [
+            {"method": SUBSCRIBE, "keys": ["A", "B"]},
+            {"method": SUBSCRIBE, "keys": ["C"]}
+        ]
+        assert not subs.changed.is_set()
+        assert subs.pending_messages() == []
+
+    def test_untrack_sends_unsubscribe(self):
+        subs = TradeSubscriptions()
+        subs.track("A")
+        subs.pending_messages()
+        assert subs.untrack("A") is True
+        assert subs.untrack("A") is False
+        assert subs.pending_messages() == [{"method": UNSUBSCRIBE, "keys": ["A"]}]
+
+    def test_track_then_untrack_before_send_cancels(self):
+        subs = TradeSubscriptions()
+        subs.track("A")
+        subs.untrack("A")
+        assert subs.pending_messages() == []
+
+        subs.track("B")
+        subs.pending_messages()
+        subs.untrack("B")
+        subs.track("B")  # still subscribed upstream: nothing to send
+        assert subs.pending_messages() == []
+
+    def test_full_messages_resubscribe_everything(self):
+        subs = TradeSubscriptions(batch_max=10)
+        subs.track("B")
+        subs.track("A")
+        subs.pending_messages()
+        subs.track("C")
+        messages = subs.full_messages()
+        assert messages == [{"method": SUBSCRIBE, "keys": ["A", "B", "C"]}]
+        assert subs.pending_messages() == []
+        assert subs.stats()["resubscribes"] == 1
+
+    def test_idle_mints_expire(self):
+        subs = TradeSubscriptions(idle_ttl=60)
+        subs.track("A")
+        subs.track("B")
+        subs.pending_messages()
+        subs._last_seen["A"] -= 120
+        subs.touch("B")
+
+        assert subs.expire_idle() == ["A"]
+        assert subs.keys == {"B"}
+        assert subs.pending_messages() == [{"method": UNSUBSCRIBE, "keys": ["A"]}]
+        assert subs.stats()["expired"] == 1
+
+    def test_touch_ignores_untracked(self):
+        subs = TradeSubscriptions()
+        subs.touch("A")
+        assert subs.expire_idle() == []
+        assert subs.keys == set()
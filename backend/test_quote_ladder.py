@@ -0,0 +1,73 @@
+"""
+Unit Tests for the Quote Ladder
+===============================
+
+Tests size generation around fee tier boundaries, interpolation and price
+impact.
+"""
+
+import pytest
+
+from quote_ladder import (
+    ladder_sizes,
+    parse_sizes,
+    quote_rate,
+    interpolate_rate,
+    price_impact_pct,
+    tier_boundaries
+)
+
+
+class TestLadderSizes:
+    """Test generated and client-supplied sizes."""
+
+    def test_sizes_bracket_each_boundary(self):
+        # 1 unit = $0.01 -> a $1,000 threshold is 100,000 units
+        sizes = ladder_sizes(50_000, 500.0, boundaries=[1000, 5000])
+        assert sizes == [50_000, 99_000, 100_000, 495_000, 500_000]
+
+    def test_default_boundaries_follow_fee_tiers(self):
+        assert tier_boundaries() == [1000, 5000, 10000, 50000, 100000]
+        sizes = ladder_sizes(1_000_000, 1000.0)
+        assert 100_000_000 in sizes  # $100k tier threshold
+        assert 1_000_000 in sizes
+
+    def test_unpriced_reference_uses_multiples(self):
+        assert ladder_sizes(1000, None) == [100, 250, 500, 1000, 2000, 5000, 10000]
+
+    def test_max_sizes_keeps_closest_to_reference(self):
+        sizes = ladder_sizes(1000, None, max_sizes=3)
+        assert sizes == [500, 1000, 2000]
+
+    def test_parse_sizes_rejects_invalid(self):
+        assert parse_sizes(["300", "100", "300"]) == [100, 300]
+        with pytest.raises(ValueError):
+            parse_sizes(["0"])
+        with pytest.raises(ValueError):
+            parse_sizes(["1.5"])
+
+
+class TestInterpolation:
+    """Test rate interpolation and price impact."""
+
+    POINTS = [(100, 2.0), (200, 1.8), (400, 1.4)]
+
+    def test_exact_point(self):
+        assert interpolate_rate(self.POINTS, 200) == 1.8
+
+    def test_between_points(self):
+        assert interpolate_rate(self.POINTS, 300) == pytest.approx(1.6)
+
+    def test_no_extrapolation(self):
+        assert interpolate_rate(self.POINTS, 50) is None
+        assert interpolate_rate(self.POINTS, 500) is None
+        assert interpolate_rate([], 100) is None
+
+    def test_quote_rate(self):
+        assert quote_rate("1000", "1500") == 1.5
+        assert quote_rate("1000", None) is None
+        assert quote_rate("1000", "0") is None
+
+    def test_price_impact(self):
+        assert price_impact_pct(1.8, 2.0) == 10.0
+        assert price_impact_pct(2.0, 2.0) == 0.0
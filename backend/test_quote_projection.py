@@ -0,0 +1,64 @@
+"""
+Unit Tests for Quote Payload Projection
+=======================================
+
+Tests view/fields parsing and nested field selection.
+"""
+
+import pytest
+
+from quote_projection import parse_projection, project, PREVIEW_FIELDS
+
+QUOTE = {
+    "buyAmount": "1000",
+    "minBuyAmount": "990",
+    "route": {"fills": [{"source": "Uniswap_V3"}]},
+    "tokenMetadata": {"buyToken": {"buyTaxBps": "0"}},
+    "issues": {"allowance": {"spender": "0xspender"}, "balance": None},
+    "transaction": {"to": "0xrouter", "data": "0xabcdef", "gas": "150000"},
+    "feeTier": "T1_0_1k",
+    "feePercent": 0.35
+}
+
+
+class TestParseProjection:
+    """Test the view and fields parameters."""
+
+    def test_full_is_default(self):
+        assert parse_projection("evm") is None
+        assert parse_projection("evm", view="full") is None
+
+    def test_preview_view(self):
+        assert parse_projection("evm", view="preview") == PREVIEW_FIELDS["evm"]
+
+    def test_fields_override_view(self):
+        assert parse_projection("evm", view="preview", fields="buyAmount, transaction.gas,buyAmount") == (
+            "buyAmount",
+            "transaction.gas"
+        )
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            parse_projection("evm", view="compact")
+        with pytest.raises(ValueError):
+            parse_projection("evm", fields=" , ")
+
+
+class TestProject:
+    """Test field selection."""
+
+    def test_preview_drops_route_and_metadata(self):
+        preview = project(QUOTE, PREVIEW_FIELDS["evm"])
+        assert "route" not in preview
+        assert "tokenMetadata" not in preview
+        assert preview["transaction"] == QUOTE["transaction"]
+        assert preview["issues"] == {"allowance": {"spender": "0xspender"}}
+        assert preview["feeTier"] == "T1_0_1k"
+
+    def test_missing_paths_are_skipped(self):
+        assert project(QUOTE, ("buyAmount", "estimatedPriceImpact", "transaction.value")) == {"buyAmount": "1000"}
+
+    def test_overlapping_paths_do_not_touch_source(self):
+        result = project(QUOTE, ("issues", "issues.allowance"))
+        assert result["issues"] == QUOTE["issues"]
+        assert QUOTE["issues"] == {"allowance": {"spender": "0xspender"}, "balance": None}
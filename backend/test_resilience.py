@@ -0,0 +1,141 @@
+"""
+Unit Tests for Circuit Breakers and Bulkheads
+=============================================
+
+Tests breaker state transitions, half-open probing and bulkhead fail-fast.
+"""
+
+import asyncio
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, Bulkhead, UpstreamGuard, UpstreamUnavailable
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock."""
+    now = [1000.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    return now
+
+
+def make_breaker() -> CircuitBreaker:
+    return CircuitBreaker("test", window=30, min_requests=4, failure_rate=0.5, slow_call_seconds=5, open_seconds=10)
+
+
+class TestCircuitBreaker:
+    """Test state transitions."""
+
+    def test_opens_on_failure_rate(self, clock):
+        breaker = make_breaker()
+        for success in (True, True, False, False):
+            breaker.allow()
+            breaker.record(success, 0.1)
+        assert breaker.state == "open"
+        with pytest.raises(UpstreamUnavailable) as exc:
+            breaker.allow()
+        assert exc.value.reason == "circuit_open"
+        assert exc.value.retry_after == pytest.approx(10)
+
+    def test_slow_calls_count_as_failures(self, clock):
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.record(True, 6.0)
+        assert breaker.state == "open"
+
+    def test_needs_min_requests(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record(False, 0.1)
+        assert breaker.state == "closed"
+
+    def test_old_outcomes_leave_the_window(self, clock):
+        breaker = make_breaker()
+        for _ in range(3):
+            breaker.record(False, 0.1)
+        clock[0] += 31
+        breaker.record(False, 0.1)
+        assert breaker.state == "closed"
+
+    def test_half_open_single_probe(self, clock):
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        clock[0] += 11
+        breaker.allow()  # probe
+        assert breaker.state == "half_open"
+        with pytest.raises(UpstreamUnavailable):
+            breaker.allow()  # second caller fails fast while probing
+        breaker.record(True, 0.1)
+        assert breaker.state == "closed"
+
+    def test_failed_probe_reopens(self, clock):
+        breaker = make_breaker()
+        for _ in range(4):
+            breaker.record(False, 0.1)
+        clock[0] += 11
+        breaker.allow()
+        breaker.record(False, 0.1)
+        assert breaker.state == "open"
+        assert breaker.opened == 2
+
+
+class TestBulkhead:
+    """Test concurrency isolation."""
+
+    def test_full_bulkhead_fails_fast(self):
+        async def scenario():
+            bulkhead = Bulkhead("test", max_concurrent=1, max_wait=0.01)
+            await bulkhead.acquire()
+            with pytest.raises(UpstreamUnavailable) as exc:
+                await bulkhead.acquire()
+            assert exc.value.reason == "bulkhead_full"
+            bulkhead.release()
+            await bulkhead.acquire()
+            return bulkhead
+
+        assert asyncio.run(scenario()).rejected == 1
+
+
+class TestUpstreamGuard:
+    """Test the combined guard used by http_pool."""
+
+    def test_exception_counts_as_failure(self):
+        async def scenario():
+            guard = UpstreamGuard("test", max_concurrent=2, breaker=make_breaker())
+            for _ in range(4):
+                with pytest.raises(ConnectionError):
+                    async with guard.slot():
+                        raise ConnectionError("reset")
+            return guard
+
+        guard = asyncio.run(scenario())
+        assert guard.breaker.state == "open"
+        assert guard.bulkhead.active == 0
+
+    def test_recorded_success(self):
+        async def scenario():
+            guard = UpstreamGuard("test", max_concurrent=2, breaker=make_breaker())
+            async with guard.slot() as record:
+                record(True)
+            return guard.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["circuit"]["state"] == "closed"
+        assert stats["circuit"]["window_requests"] == 1
+        assert stats["bulkhead"]["active"] == 0
+
+    def test_unrecorded_outcome_is_not_a_failure(self):
+        async def scenario():
+            guard = UpstreamGuard("test", max_concurrent=2, breaker=make_breaker())
+            for _ in range(4):
+                with pytest.raises(TimeoutError):
+                    async with guard.slot() as record:
+                        record(None)  # e.g. cut short by the request deadline
+                        raise TimeoutError()
+            return guard.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["circuit"]["state"] == "closed"
+        assert stats["circuit"]["window_requests"] == 0
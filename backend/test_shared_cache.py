@@ -0,0 +1,121 @@
+"""
+Unit Tests for the Shared Cache Tier
+====================================
+
+Tests read-/write-through across simulated workers, serialization and
+local-only fallback when the store is unreachable.
+"""
+
+import asyncio
+import pytest
+
+from ttl_cache import TTLCache
+from shared_cache import SharedCacheStore, TieredCache, InMemoryStore, encode_value, decode_value
+from json_bytes import EncodedJSON
+
+
+class FailingStore:
+    """Store whose every call fails (connection refused)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+    async def set(self, key, value, px=None):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+
+def make_worker(store: SharedCacheStore, name: str) -> TieredCache:
+    return TieredCache(TTLCache(name, max_entries=100), store)
+
+
+class TestSerialization:
+    """Test the compact value format."""
+
+    def test_round_trip(self):
+        value = {"buyAmount": "123", "route": [1, 2, 3]}
+        assert decode_value(encode_value(value, 1000.0, 10.0)) == (value, 1000.0, 10.0)
+
+    def test_large_values_are_compressed(self):
+        value = {"tokens": ["0x" + "ab" * 20] * 200}
+        raw = encode_value(value, 1000.0, 10.0)
+        assert raw[0] & 0x01
+        assert len(raw) < len(str(value))
+        assert decode_value(raw)[0] == value
+
+    def test_encoded_bodies_are_stored_as_is(self):
+        encoded = EncodedJSON.encode({"transaction": {"data": "0x" + "ab" * 2000}})
+        value, _, _ = decode_value(encode_value(encoded, 1000.0, 10.0))
+        assert isinstance(value, EncodedJSON)
+        assert value.body == encoded.body
+
+
+class TestTiers:
+    """Test read-/write-through between workers."""
+
+    def test_write_through_read_through(self):
+        async def scenario():
+            store = SharedCacheStore(InMemoryStore())
+            worker_a = make_worker(store, "test_shared_quotes")
+            worker_b = make_worker(store, "test_shared_quotes")
+
+            await worker_a.set("ethereum:quote", {"buyAmount": "1"}, ttl=30)
+            cached = await worker_b.get_entry("ethereum:quote")
+            assert cached[0] == {"buyAmount": "1"}
+            # Copied into worker B's local tier, keeping its age
+            assert worker_b.local.get("ethereum:quote") == {"buyAmount": "1"}
+            assert store.hits == 1
+
+        asyncio.run(scenario())
+
+    def test_shared_miss(self):
+        async def scenario():
+            store = SharedCacheStore(InMemoryStore())
+            assert await make_worker(store, "test_shared_miss").get("missing") is None
+            assert store.misses == 1
+
+        asyncio.run(scenario())
+
+    def test_disabled_store_is_local_only(self):
+        async def scenario():
+            cache = make_worker(SharedCacheStore(), "test_shared_disabled")
+            await cache.set("k", 1, ttl=30)
+            assert await cache.get("k") == 1
+            assert cache.store.stats()["enabled"] is False
+
+        asyncio.run(scenario())
+
+
+class TestFallback:
+    """Test local-only fallback when the store is unreachable."""
+
+    def test_errors_back_off(self):
+        async def scenario():
+            failing = FailingStore()
+            store = SharedCacheStore(failing)
+            cache = make_worker(store, "test_shared_failing")
+
+            await cache.set("k", 1, ttl=30)  # local write still succeeds
+            assert await cache.get("k") == 1
+            assert await cache.get("other") is None
+            assert failing.calls == 1  # tier switched off after the first error
+            assert store.errors == 1
+            assert store.available is False
+
+        asyncio.run(scenario())
+
+    def test_slow_store_times_out(self):
+        class SlowStore(InMemoryStore):
+            async def get(self, key):
+                await asyncio.sleep(1)
+
+        async def scenario():
+            store = SharedCacheStore(SlowStore(), timeout=0.01)
+            assert await make_worker(store, "test_shared_slow").get("k") is None
+            assert store.errors == 1
+
+        asyncio.run(scenario())
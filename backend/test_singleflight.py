@@ -0,0 +1,151 @@
+"""
+Unit Tests for Single-Flight Coalescing
+=======================================
+
+Tests that concurrent identical fetches share one upstream call.
+"""
+
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test request coalescing per key."""
+
+    def test_concurrent_calls_share_one_fetch(self):
+        """Concurrent calls with the same key run the fetch once"""
+        async def scenario():
+            group = SingleFlight("test")
+            calls = 0
+
+            async def fetch():
+                nonlocal calls
+                calls += 1
+                await asyncio.sleep(0.01)
+                return {"buyAmount": "42"}
+
+            results = await asyncio.gather(*(group.do("k", fetch) for _ in range(10)))
+            return group, calls, results
+
+        group, calls, results = asyncio.run(scenario())
+        assert calls == 1
+        assert all(r == {"buyAmount": "42"} for r in results)
+        assert group.leaders == 1
+        assert group.merged == 9
+
+    def test_different_keys_not_merged(self):
+        """Different keys each run their own fetch"""
+        async def scenario():
+            group = SingleFlight("test")
+
+            async def fetch(value):
+                await asyncio.sleep(0.01)
+                return value
+
+            return await asyncio.gather(
+                group.do("a", lambda: fetch("a")),
+                group.do("b", lambda: fetch("b"))
+            )
+
+        assert asyncio.run(scenario()) == ["a", "b"]
+
+    def test_error_propagates_to_all_waiters(self):
+        """An upstream error is raised in every waiter"""
+        async def scenario():
+            group = SingleFlight("test")
+
+            async def fetch():
+                await asyncio.sleep(0.01)
+                raise ValueError("upstream down")
+
+            results = await asyncio.gather(
+                *(group.do("k", fetch) for _ in range(3)),
+                return_exceptions=True
+            )
+            return group, results
+
+        group, results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+        assert group.errors == 1
+
+    def test_key_released_after_completion(self):
+        """A call after completion starts a new fetch"""
+        async def scenario():
+            group = SingleFlight("test")
+            calls = 0
+
+            async def fetch():
+                nonlocal calls
+                calls += 1
+                return calls
+
+            first = await group.do("k", fetch)
+            second = await group.do("k", fetch)
+            return group, first, second
+
+        group, first, second = asyncio.run(scenario())
+        assert (first, second) == (1, 2)
+        assert group.stats()["inflight"] == 0
+
+    def test_waiter_cancellation_does_not_cancel_fetch(self):
+        """Cancelling one waiter leaves the fetch running for the others"""
+        async def scenario():
+            group = SingleFlight("test")
+
+            async def fetch():
+                await asyncio.sleep(0.02)
+                return "ok"
+
+            first = asyncio.create_task(group.do("k", fetch))
+            second = asyncio.create_task(group.do("k", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(scenario()) == "ok"
+
+    def test_abandoned_fetch_is_cancelled(self):
+        """With cancel_abandoned, the fetch stops once its last waiter is cancelled"""
+        async def scenario():
+            group = SingleFlight("test", cancel_abandoned=True)
+            finished = False
+
+            async def fetch():
+                nonlocal finished
+                await asyncio.sleep(0.05)
+                finished = True
+
+            waiter = asyncio.create_task(group.do("k", fetch))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            await asyncio.sleep(0.06)
+            return group, finished
+
+        group, finished = asyncio.run(scenario())
+        assert finished is False
+        assert group.abandoned == 1
+        assert not group.inflight("k")
+
+    def test_shared_fetch_survives_one_abandoned_waiter(self):
+        """With cancel_abandoned, the fetch keeps running while another waiter needs it"""
+        async def scenario():
+            group = SingleFlight("test", cancel_abandoned=True)
+
+            async def fetch():
+                await asyncio.sleep(0.02)
+                return "ok"
+
+            first = asyncio.create_task(group.do("k", fetch))
+            second = asyncio.create_task(group.do("k", fetch))
+            await asyncio.sleep(0)
+            first.cancel()
+            return group, await second
+
+        group, result = asyncio.run(scenario())
+        assert result == "ok"
+        assert group.abandoned == 0
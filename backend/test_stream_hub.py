@@ -0,0 +1,165 @@
+"""
+Unit Tests for Streaming Subscriptions
+======================================
+
+Tests shared refresh loops, fan-out, newest-only delivery and idle drop,
+and push-based fan-out.
+"""
+
+import asyncio
+
+from stream_hub import StreamHub, PushHub
+
+
+class CountingFetch:
+    """Refresh stand-in returning an increasing counter."""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return self.calls
+
+
+class TestFanOut:
+    """Test one loop per key shared by all subscribers."""
+
+    def test_one_loop_per_key(self):
+        async def scenario():
+            hub = StreamHub("test", interval=0.05)
+            fetch = CountingFetch()
+            subscriptions = [hub.subscribe("eth:a:b:100", fetch) for _ in range(50)]
+            first = [await s.next() for s in subscriptions]
+            stats = hub.stats()
+            await hub.close()
+            return fetch, first, stats
+
+        fetch, first, stats = asyncio.run(scenario())
+        assert first == [1] * 50
+        assert fetch.calls == 1
+        assert stats["keys"] == 1
+        assert stats["subscribers"] == 50
+
+    def test_late_subscriber_gets_latest_immediately(self):
+        async def scenario():
+            hub = StreamHub("test", interval=10)
+            fetch = CountingFetch()
+            first = hub.subscribe("k", fetch)
+            await first.next()
+            late = hub.subscribe("k", fetch)
+            value = await asyncio.wait_for(late.next(), timeout=0.1)
+            await hub.close()
+            return value, fetch.calls
+
+        assert asyncio.run(scenario()) == (1, 1)
+
+    def test_slow_subscriber_gets_newest_only(self):
+        async def scenario():
+            hub = StreamHub("test", interval=0.01)
+            subscription = hub.subscribe("k", CountingFetch())
+            await asyncio.sleep(0.1)
+            value = await subscription.next()
+            await hub.close()
+            return value, subscription.skipped
+
+        value, skipped = asyncio.run(scenario())
+        assert value > 2
+        assert skipped > 0
+
+    def test_failed_refresh_keeps_loop_running(self):
+        async def scenario():
+            hub = StreamHub("test", interval=0.01)
+            fetch = CountingFetch(fail=True)
+            hub.subscribe("k", fetch)
+            await asyncio.sleep(0.05)
+            stats = hub.stats()
+            await hub.close()
+            return stats, fetch.calls
+
+        stats, calls = asyncio.run(scenario())
+        assert stats["errors"] == calls > 1
+        assert stats["updates"] == 0
+
+
+class TestIdleDrop:
+    """Test that keys without subscribers are dropped."""
+
+    def test_idle_key_is_dropped(self):
+        async def scenario():
+            hub = StreamHub("test", interval=0.01, idle_ttl=0.03)
+            subscription = hub.subscribe("k", CountingFetch())
+            await subscription.next()
+            subscription.close()
+            await asyncio.sleep(0.1)
+            return hub.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["keys"] == 0
+        assert stats["dropped"] == 1
+
+    def test_resubscribe_within_idle_ttl_reuses_loop(self):
+        async def scenario():
+            hub = StreamHub("test", interval=0.01, idle_ttl=1.0)
+            fetch = CountingFetch()
+            subscription = hub.subscribe("k", fetch)
+            await subscription.next()
+            subscription.close()
+            await asyncio.sleep(0.03)
+            again = hub.subscribe("k", CountingFetch())
+            value = await again.next()
+            await hub.close()
+            return value, hub.dropped
+
+        value, dropped = asyncio.run(scenario())
+        assert value > 1  # served by the original, still-running loop
+        assert dropped == 0
+
+
+class TestPushHub:
+    """Test published updates fanned out per key."""
+
+    def test_publish_reaches_key_subscribers_only(self):
+        async def scenario():
+            hub = PushHub("test")
+            a1 = hub.subscribe("mintA")
+            a2 = hub.subscribe("mintA")
+            b = hub.subscribe("mintB")
+            assert hub.publish("mintA", {"stage": "bonding"}) == 2
+            assert hub.publish("mintC", {"stage": "bonding"}) == 0
+            return await a1.next(), await a2.next(), b._queue.empty(), hub.stats()
+
+        first, second, b_empty, stats = asyncio.run(scenario())
+        assert first == second == {"stage": "bonding"}
+        assert b_empty
+        assert stats["published"] == 1
+        assert stats["delivered"] == 2
+
+    def test_initial_value_then_newest_only(self):
+        async def scenario():
+            hub = PushHub("test")
+            subscription = hub.subscribe("mintA", initial={"progress": 0.1})
+            initial = await subscription.next()
+            for progress in (0.2, 0.3, 0.4):
+                hub.publish("mintA", {"progress": progress})
+            return initial, await subscription.next(), subscription.skipped
+
+        initial, latest, skipped = asyncio.run(scenario())
+        assert initial == {"progress": 0.1}
+        assert latest == {"progress": 0.4}
+        assert skipped == 2
+
+    def test_close_removes_key(self):
+        async def scenario():
+            hub = PushHub("test")
+            subscription = hub.subscribe("mintA")
+            subscription.close()
+            subscription.close()
+            return hub.publish("mintA", 1), hub.stats()
+
+        delivered, stats = asyncio.run(scenario())
+        assert delivered == 0
+        assert stats["keys"] == 0
@@ -0,0 +1,165 @@
+"""
+Unit Tests for Token USD Valuation
+==================================
+
+Tests decimals-aware valuation from the in-memory tables and miss handling.
+"""
+
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("httpx")
+
+import pricing_service
+from pricing_service import PricingService
+from token_pricing import TokenPricingService, decode_abi_string, NATIVE_TOKEN_ADDRESS
+
+USDC_ETH = "0xA0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+
+
+def make_service() -> TokenPricingService:
+    return TokenPricingService(metadata_collection=None, rpc_urls={})
+
+
+class TestValuation:
+    """Test USD valuation from memory."""
+
+    def test_usdc_uses_6_decimals(self):
+        """1,000 USDC (6 decimals) is valued at $1,000, not $0.000000001"""
+        service = make_service()
+        service._prices["ethereum"][USDC_ETH.lower()] = (1.0, time.time())
+        value = service.value_usd("ethereum", USDC_ETH, "1000000000")
+        assert value == pytest.approx(1000.0)
+
+    def test_native_token_uses_18_decimals(self):
+        """1 ETH at $3,500 is valued at $3,500"""
+        service = make_service()
+        service._prices["ethereum"][NATIVE_TOKEN_ADDRESS] = (3500.0, time.time())
+        value = service.value_usd("ethereum", NATIVE_TOKEN_ADDRESS, "1000000000000000000")
+        assert value == pytest.approx(3500.0)
+
+    def test_unknown_token_miss_is_queued(self):
+        """Unknown tokens return None and are queued for async fill"""
+        service = make_service()
+        token = "0x1111111111111111111111111111111111111111"
+        assert service.value_usd("ethereum", token, "1000") is None
+        assert token in service._pending["ethereum"]
+        assert service.misses == 1
+
+    def test_stale_price_is_a_miss(self):
+        """Prices older than TOKEN_PRICE_MAX_AGE are not used"""
+        service = make_service()
+        service._prices["ethereum"][USDC_ETH.lower()] = (1.0, time.time() - 10 ** 6)
+        assert service.value_usd("ethereum", USDC_ETH, "1000000") is None
+
+    def test_unsupported_chain(self):
+        """Chains without a price table return None"""
+        assert make_service().value_usd("solana", USDC_ETH, "1") is None
+
+
+class TestSymbolDecoding:
+    """Test eth_call symbol() decoding."""
+
+    def test_abi_string(self):
+        """Dynamic ABI string"""
+        result = "0x" + (
+            "0000000000000000000000000000000000000000000000000000000000000020"
+            "0000000000000000000000000000000000000000000000000000000000000004"
+            "5553444300000000000000000000000000000000000000000000000000000000"
+        )
+        assert decode_abi_string(result) == "USDC"
+
+    def test_bytes32_symbol(self):
+        """Legacy bytes32 symbol (e.g. MKR)"""
+        result = "0x" + "4d4b52".ljust(64, "0")
+        assert decode_abi_string(result) == "MKR"
+
+    def test_empty_result(self):
+        assert decode_abi_string("0x") is None
+
+
+class TestSolanaValuation:
+    """Test Solana mint valuation and Jupiter price parsing."""
+
+    def test_usdc_mint_uses_6_decimals(self):
+        """1,000,000 USDC units is $1, not 0.001 SOL worth of $180"""
+        from solana_pricing import SolanaPricingService
+        service = SolanaPricingService(metadata_collection=None, rpc_url=None)
+        usdc = "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+        service._prices["solana"][usdc] = (1.0, time.time())
+        assert service.value_usd("solana", usdc, "1000000") == pytest.approx(1.0)
+
+    def test_unknown_mint_miss_is_queued(self):
+        from solana_pricing import SolanaPricingService
+        service = SolanaPricingService(metadata_collection=None, rpc_url=None)
+        mint = "7GCihgDB8fe6KNjn2MYtkzZcRjQy3t9GHdC8uHYmW2hr"
+        assert service.value_usd("solana", mint, "1000") is None
+        assert mint in service._pending["solana"]  # base58 case kept (EVM addresses are lowercased)
+
+    def test_parse_price_v3_and_v2(self):
+        """Both Jupiter Price API response shapes are accepted"""
+        from solana_pricing import parse_jupiter_prices
+        v3 = {"So11111111111111111111111111111111111111112": {"usdPrice": 150.5, "decimals": 9}}
+        v2 = {"data": {"So11111111111111111111111111111111111111112": {"price": "150.5"}}}
+        assert parse_jupiter_prices(v3) == {"So11111111111111111111111111111111111111112": (150.5, 9)}
+        assert parse_jupiter_prices(v2) == {"So11111111111111111111111111111111111111112": (150.5, None)}
+
+
+class FakeMetadataCollection:
+    """Minimal Motor collection: empty find(), records upserts."""
+
+    def __init__(self):
+        self.upserts = []
+
+    async def _empty(self):
+        return
+        yield
+
+    def find(self, *args, **kwargs):
+        return self._empty()
+
+    async def update_one(self, filter, update, upsert=False):
+        self.upserts.append(filter)
+
+
+class StubPricingService(PricingService):
+    """Resolves every miss with fixed metadata and price."""
+
+    def __init__(self, collection):
+        super().__init__(collection, ("testchain",))
+        self.calls = []
+
+    async def _fill_metadata(self, chain, addresses):
+        self.calls.append(("metadata", sorted(addresses)))
+        for address in addresses:
+            await self._store_metadata(chain, address, {"decimals": 6, "symbol": None})
+
+    async def _refresh_prices(self, chain, addresses):
+        self.calls.append(("prices", sorted(addresses)))
+        for address in addresses:
+            self._prices[chain][address] = (2.0, time.time())
+
+
+class TestPricingServiceLoops:
+    """Test the shared fill loop."""
+
+    def test_misses_filled_in_one_batch(self, monkeypatch):
+        monkeypatch.setattr(pricing_service, "TOKEN_PRICE_FILL_DELAY", 0.01)
+
+        async def scenario():
+            collection = FakeMetadataCollection()
+            service = StubPricingService(collection)
+            await service.start()
+            assert service.value_usd("testchain", "A", "1000000") is None
+            assert service.value_usd("testchain", "B", "1000000") is None
+            await asyncio.sleep(0.05)
+            value = service.value_usd("testchain", "A", "1000000")
+            await service.stop()
+            return service, collection, value
+
+        service, collection, value = asyncio.run(scenario())
+        assert value == pytest.approx(2.0)
+        assert ("metadata", ["A", "B"]) in service.calls
+        assert len(collection.upserts) == 2
+        assert service.stats()["pending"] == {"testchain": 0}
@@ -0,0 +1,99 @@
+"""
+Unit Tests for the Bounded LRU/TTL Cache
+========================================
+
+Tests LRU eviction, per-entry expiry, byte budgets and stats.
+"""
+
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache, cache_stats
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock."""
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestEviction:
+    """Test size bounds."""
+
+    def test_lru_entry_is_evicted(self):
+        cache = TTLCache("test_lru", max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # a is now most recently used
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+
+    def test_byte_budget(self):
+        cache = TTLCache("test_bytes", max_bytes=10, sizeof=len)
+        cache.set("a", "xxxxxx")
+        cache.set("b", "yyyyyy")
+        assert "a" not in cache
+        assert cache.stats()["bytes"] == 6
+
+    def test_overwrite_does_not_double_count(self):
+        cache = TTLCache("test_overwrite", max_bytes=10, sizeof=len)
+        cache.set("a", "xxxxxx")
+        cache.set("a", "yyyyyy")
+        assert cache.get("a") == "yyyyyy"
+        assert cache.evictions == 0
+
+    def test_max_bytes_requires_sizeof(self):
+        with pytest.raises(ValueError):
+            TTLCache("test_invalid", max_bytes=10)
+
+
+class TestExpiry:
+    """Test per-entry TTL."""
+
+    def test_entry_expires(self, clock):
+        cache = TTLCache("test_expiry")
+        cache.set("a", 1, ttl=10)
+        clock[0] += 5
+        assert cache.get_entry("a") == (1, 5.0)
+        clock[0] += 5
+        assert cache.get("a") is None
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_default_ttl_and_getitem(self, clock):
+        cache = TTLCache("test_default_ttl", default_ttl=60)
+        cache["job"] = {"status": "queued"}
+        cache["job"]["status"] = "processing"
+        assert cache["job"]["status"] == "processing"
+        clock[0] += 61
+        with pytest.raises(KeyError):
+            cache["job"]
+
+    def test_purge_expired(self, clock):
+        cache = TTLCache("test_purge")
+        cache.set("short", 1, ttl=1)
+        cache.set("long", 2, ttl=100)
+        cache.set("forever", 3)
+        clock[0] += 10
+        assert cache.purge_expired() == 1
+        assert len(cache) == 2
+
+
+class TestStats:
+    """Test per-namespace metrics."""
+
+    def test_hits_and_misses(self):
+        cache = TTLCache("test_stats", max_entries=10)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        stats = cache_stats()["test_stats"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 1
@@ -0,0 +1,102 @@
+"""
+Unit Tests for Upstream Request Budgets
+=======================================
+
+Tests token-bucket limits, priority ordering, shedding and 429 back-off.
+"""
+
+import asyncio
+import pytest
+
+from upstream_budget import (
+    UpstreamBudget,
+    BudgetExhausted,
+    parse_retry_after,
+    PRIORITY_QUOTE,
+    PRIORITY_PRICE,
+    PRIORITY_DISCOVERY,
+    PRIORITY_BACKGROUND
+)
+
+
+class TestTokenBucket:
+    """Test immediate grants and shedding."""
+
+    def test_burst_is_granted_immediately(self):
+        async def scenario():
+            budget = UpstreamBudget("test", rate=1.0, burst=3, reserve_fraction=0)
+            for _ in range(3):
+                await budget.acquire(PRIORITY_QUOTE)
+            return budget
+
+        assert asyncio.run(scenario()).granted["quote"] == 3
+
+    def test_discovery_is_shed_below_reserve(self):
+        async def scenario():
+            budget = UpstreamBudget("test", rate=0.001, burst=10, reserve_fraction=0.5)
+            for _ in range(5):
+                await budget.acquire(PRIORITY_DISCOVERY)
+            with pytest.raises(BudgetExhausted) as exc:
+                await budget.acquire(PRIORITY_DISCOVERY)
+            # The reserve is still available to firm quotes
+            await budget.acquire(PRIORITY_QUOTE)
+            return budget, exc.value
+
+        budget, error = asyncio.run(scenario())
+        assert error.reason == "budget_exhausted"
+        assert budget.shed["discovery"] == 1
+        assert budget.granted["quote"] == 1
+
+
+class TestPriorityQueue:
+    """Test that waiting callers are served by priority."""
+
+    def test_quotes_go_first(self):
+        async def scenario():
+            budget = UpstreamBudget("test", rate=50.0, burst=1, reserve_fraction=0)
+            await budget.acquire(PRIORITY_QUOTE)  # empty the bucket
+            order = []
+
+            async def call(priority, name):
+                await budget.acquire(priority)
+                order.append(name)
+
+            background = asyncio.create_task(call(PRIORITY_BACKGROUND, "background"))
+            price = asyncio.create_task(call(PRIORITY_PRICE, "price"))
+            await asyncio.sleep(0)
+            quote = asyncio.create_task(call(PRIORITY_QUOTE, "quote"))
+            await asyncio.gather(background, price, quote)
+            return order
+
+        assert asyncio.run(scenario()) == ["quote", "price", "background"]
+
+    def test_wait_times_out(self, monkeypatch):
+        import upstream_budget
+        monkeypatch.setitem(upstream_budget.BUDGET_MAX_WAIT, PRIORITY_PRICE, 0.01)
+
+        async def scenario():
+            budget = UpstreamBudget("test", rate=0.001, burst=1, reserve_fraction=0)
+            await budget.acquire(PRIORITY_PRICE)
+            with pytest.raises(BudgetExhausted):
+                await budget.acquire(PRIORITY_PRICE)
+            return budget.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["shed"]["price"] == 1
+        assert stats["queued"] == 0
+
+
+class TestRateLimited:
+    """Test back-off after a provider 429."""
+
+    def test_throttle_empties_and_pauses(self):
+        budget = UpstreamBudget("test", rate=100.0, burst=10)
+        budget.throttle(retry_after=60)
+        stats = budget.stats()
+        assert stats["tokens"] == 0
+        assert stats["rate_limited"] == 1
+
+    def test_parse_retry_after(self):
+        assert parse_retry_after("5") == 5.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
@@ -0,0 +1,382 @@
+"""
+Unit Tests for Write-Behind Buffer
+==================================
+
+Tests batching, bounded queue and shutdown flush against an in-memory collection,
+and per-key coalescing of updates.
+"""
+
+import asyncio
+from write_behind import WriteBehindBuffer, CoalescingWriter
+
+
+class FakeCollection:
+    """Records insert_many calls like a Motor collection."""
+
+    def __init__(self, fail: bool = False, gate: asyncio.Event = None):
+        self.batches = []
+        self.fail = fail
+        self.gate = gate  # when set, writes block until the gate opens
+        self.in_flight = 0
+
+    async def _wait_gate(self):
+        if self.gate is not None:
+            self.in_flight += 1
+            await self.gate.wait()
+            self.in_flight -= 1
+
+    async def insert_many(self, docs, ordered=True):
+        await self._wait_gate()
+        if self.fail:
+            raise RuntimeError("mongo unavailable")
+        assert ordered is False
+        self.batches.append(list(docs))
+
+    async def bulk_write(self, ops, ordered=True):
+        await self._wait_gate()
+        if self.fail:
+            raise RuntimeError("mongo unavailable")
+        assert ordered is False
+        self.batches.append([(op._filter, op._doc) for op in ops])
+
+
+class TestWriteBehindBuffer:
+    """Test buffered insert behaviour."""
+
+    def test_flush_by_size(self):
+        """Reaching batch_size triggers a flush without waiting for the interval"""
+        async def scenario():
+            collection = FakeCollection()
+            buffer = WriteBehindBuffer(collection, "test", batch_size=3, flush_interval=60)
+            await buffer.start()
+            for i in range(3):
+                buffer.add({"i": i})
+            await asyncio.sleep(0.01)
+            await buffer.stop()
+            return collection, buffer
+
+        collection, buffer = asyncio.run(scenario())
+        assert collection.batches == [[{"i": 0}, {"i": 1}, {"i": 2}]]
+        assert buffer.stats()["inserted"] == 3
+
+    def test_flush_by_interval(self):
+        """Documents below batch_size are written after flush_interval"""
+        async def scenario():
+            collection = FakeCollection()
+            buffer = WriteBehindBuffer(collection, "test", batch_size=100, flush_interval=0.01)
+            await buffer.start()
+            buffer.add({"i": 1})
+            await asyncio.sleep(0.05)
+            flushed = list(collection.batches)
+            await buffer.stop()
+            return flushed
+
+        assert asyncio.run(scenario()) == [[{"i": 1}]]
+
+    def test_full_queue_drops(self):
+        """add() refuses documents once max_queue is reached"""
+        buffer = WriteBehindBuffer(FakeCollection(), "test", max_queue=2)
+        assert buffer.add({"i": 1}) is True
+        assert buffer.add({"i": 2}) is True
+        assert buffer.add({"i": 3}) is False
+        assert buffer.stats()["dropped"] == 1
+        assert buffer.stats()["queued"] == 2
+
+    def test_stop_flushes_remaining(self):
+        """stop() writes everything still queued, split into batches"""
+        async def scenario():
+            collection = FakeCollection()
+            buffer = WriteBehindBuffer(collection, "test", batch_size=2, flush_interval=60)
+            for i in range(5):
+                buffer.add({"i": i})
+            await buffer.stop()
+            return collection
+
+        collection = asyncio.run(scenario())
+        assert [len(b) for b in collection.batches] == [2, 2, 1]
+
+    def test_failed_flush_counted(self):
+        """Insert errors are counted, not raised"""
+        async def scenario():
+            buffer = WriteBehindBuffer(FakeCollection(fail=True), "test")
+            buffer.add({"i": 1})
+            await buffer.flush()
+            return buffer.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["failed"] == 1
+        assert stats["inserted"] == 0
+        assert stats["queued"] == 0
+
+    def test_stop_waits_for_in_flight_insert(self):
+        """stop() during an insert lets it finish, then writes the rest"""
+        async def scenario():
+            gate = asyncio.Event()
+            collection = FakeCollection(gate=gate)
+            buffer = WriteBehindBuffer(collection, "test", batch_size=2, flush_interval=60)
+            await buffer.start()
+            buffer.add({"i": 0})
+            buffer.add({"i": 1})
+            await asyncio.sleep(0.01)
+            assert collection.in_flight == 1
+            buffer.add({"i": 2})
+
+            stopping = asyncio.create_task(buffer.stop())
+            await asyncio.sleep(0.01)
+            assert not stopping.done()
+            gate.set()
+            await stopping
+            return collection, buffer.stats()
+
+        collection, stats = asyncio.run(scenario())
+        assert collection.batches == [[{"i": 0}, {"i": 1}], [{"i": 2}]]
+        assert stats["inserted"] == 3
+        assert stats["queued"] == 0
+
+    def test_cancelled_insert_requeued(self):
+        """A flush cancelled mid-insert puts its batch back in order"""
+        async def scenario():
+            gate = asyncio.Event()
+            collection = FakeCollection(gate=gate)
+            buffer = WriteBehindBuffer(collection, "test", batch_size=2)
+            for i in range(3):
+                buffer.add({"i": i})
+            flushing = asyncio.create_task(buffer.flush())
+            await asyncio.sleep(0.01)
+            flushing.cancel()
+            try:
+                await flushing
+            except asyncio.CancelledError:
+                pass
+            assert buffer.stats()["queued"] == 3
+
+            gate.set()
+            await buffer.flush()
+            return collection
+
+        collection = asyncio.run(scenario())
+        assert collection.batches == [[{"i": 0}, {"i": 1}], [{"i": 2}]]
+
+
+class TestCoalescingWriter:
+    """Test per-key coalesced updates."""
+
+    def test_updates_coalesce_per_key(self):
+        """Many updates to one key become one write with the latest fields"""
+        async def scenario():
+            collection = FakeCollection()
+            writer = CoalescingWriter(collection, "test", key_field="mint", flush_interval=60)
+            for i in range(100):
+                writer.update("mintA", {"progress": i, "stage": "bonding"})
+            writer.update("mintB", {"progress": 1})
+            writer.update("mintA", {"last": True})
+            await writer.flush()
+            return collection, writer.stats()
+
+        collection, stats = asyncio.run(scenario())
+        assert collection.batches == [[
+            ({"mint": "mintA"}, {"$set": {"progress": 99, "stage": "bonding", "last": True}}),
+            ({"mint": "mintB"}, {"$set": {"progress": 1}})
+        ]]
+        assert stats["updates"] == 102
+        assert stats["written"] == 2
+        assert stats["writes_saved"] == 100
+
+    def test_match_added_to_filter(self):
+        async def scenario():
+            collection = FakeCollection()
+            writer = CoalescingWriter(collection, "test", key_field="mint", match={"migrated": {"$ne": True}})
+            writer.update("mintA", {"progress": 1})
+            await writer.flush()
+            return collection
+
+        collection = asyncio.run(scenario())
+        assert collection.batches[0][0][0] == {"mint": "mintA", "migrated": {"$ne": True}}
+
+    def test_max_dirty_triggers_early_flush(self):
+        async def scenario():
+            collection = FakeCollection()
+            writer = CoalescingWriter(collection, "test", key_field="mint", flush_interval=60, max_dirty=3)
+            await writer.start()
+            for i in range(3):
+                writer.update(f"mint{i}", {"progress": i})
+            await asyncio.sleep(0.01)
+            flushed = list(collection.batches)
+            await writer.stop()
+            return flushed, writer.stats()
+
+        flushed, stats = asyncio.run(scenario())
+        assert len(flushed) == 1 and len(flushed[0]) == 3
+        assert stats["early_flushes"] == 1
+
+    def test_discard_and_stop_flush(self):
+        async def scenario():
+            collection = FakeCollection()
+            writer = CoalescingWriter(collection, "test", key_field="mint", flush_interval=60)
+            writer.update("mintA", {"progress": 1})
+            writer.update("mintB", {"progress": 2})
+            writer.discard("mintA")
+            await writer.stop()
+            return collection, writer.stats()
+
+        collection, stats = asyncio.run(scenario())
+        assert collection.batches == [[({"mint": "mintB"}, {"$set": {"progress": 2}})]]
+        assert stats["discarded"] == 1
+        assert stats["dirty"] == 0
+
+    def test_failed_flush_counted(self):
+        async def scenario():
+            writer = CoalescingWriter(FakeCollection(fail=True), "test", key_field="mint")
+            writer.update("mintA", {"progress": 1})
+            await writer.flush()
+            return writer.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["failed"] == 1
+        assert stats["written"] == 0
+        assert stats["dirty"] == 1  # kept for the next flush
+
+    def test_failed_update_merged_under_newer_fields(self):
+        """Requeued fields never overwrite an update queued during the flush"""
+        async def scenario():
+            gate = asyncio.Event()
+            collection = FakeCollection(fail=True, gate=gate)
+            writer = CoalescingWriter(collection, "test", key_field="mint")
+            writer.update("mintA", {"progress": 1, "market_cap": 10})
+            flushing = asyncio.create_task(writer.flush())
+            await asyncio.sleep(0.01)
+            writer.update("mintA", {"progress": 2})
+            gate.set()
+            await flushing
+
+            collection.fail = False
+            await writer.flush()
+            return collection, writer.stats()
+
+        collection, stats = asyncio.run(scenario())
+        assert collection.batches == [[({"mint": "mintA"}, {"$set": {"progress": 2, "market_cap": 10}})]]
+        assert stats["written"] == 1
+        assert stats["writes_saved"] == 1
+
+    def test_partial_failure_requeues_failed_keys_only(self):
+        class PartialWriteError(Exception):
+            details = {"writeErrors": [{"index": 1, "errmsg": "boom"}]}
+
+        class PartialCollection:
+            async def bulk_write(self, ops, ordered=True):
+                raise PartialWriteError("1 write error")
+
+        async def scenario():
+            writer = CoalescingWriter(PartialCollection(), "test", key_field="mint")
+            writer.update("mintA", {"progress": 1})
+            writer.update("mintB", {"progress": 2})
+            applied = await writer.flush()
+            return applied, writer
+
+        applied, writer = asyncio.run(scenario())
+        assert applied == 1
+        assert writer.pending("mintA") is None
+        assert writer.pending("mintB") == {"progress": 2}
+        stats = writer.stats()
+        assert stats["written"] == 1
+        assert stats["failed"] == 1
+
+    def test_permanent_write_errors_dropped(self):
+        class DuplicateKeyError(Exception):
+            details = {"writeErrors": [{"index": 0, "code": 11000, "errmsg": "E11000 duplicate key"}]}
+
+        class DuplicateCollection:
+            async def bulk_write(self, ops, ordered=True):
+                raise DuplicateKeyError("1 write error")
+
+        async def scenario():
+            writer = CoalescingWriter(DuplicateCollection(), "test", key_field="mint")
+            writer.update("mintA", {"progress": 1})
+            writer.update("mintB", {"progress": 2})
+            await writer.flush()
+            return writer
+
+        writer = asyncio.run(scenario())
+        assert writer.pending("mintA") is None
+        stats = writer.stats()
+        assert stats["dropped"] == 1
+        assert stats["written"] == 1
+        assert stats["dirty"] == 0
+
+    def test_key_dropped_after_max_attempts(self):
+        async def scenario():
+            collection = FakeCollection(fail=True)
+            writer = CoalescingWriter(collection, "test", key_field="mint", max_attempts=3)
+            writer.update("mintA", {"progress": 1})
+            dirty = []
+            for _ in range(4):
+                await writer.flush()
+                dirty.append(writer.stats()["dirty"])
+            return dirty, writer.stats()
+
+        dirty, stats = asyncio.run(scenario())
+        assert dirty == [1, 1, 0, 0]
+        assert stats["failed"] == 3
+        assert stats["dropped"] == 1
+        assert stats["writes_saved"] == 0
+
+    def test_success_resets_attempts(self):
+        async def scenario():
+            collection = FakeCollection(fail=True)
+            writer = CoalescingWriter(collection, "test", key_field="mint", max_attempts=2)
+            writer.update("mintA", {"progress": 1})
+            await writer.flush()
+            collection.fail = False
+            await writer.flush()
+            collection.fail = True
+            writer.update("mintA", {"progress": 2})
+            await writer.flush()
+            return writer
+
+        writer = asyncio.run(scenario())
+        assert writer.pending("mintA") == {"progress": 2}  # a fresh first failure
+        assert writer.stats()["dropped"] == 0
+
+    def test_stop_waits_for_in_flight_write(self):
+        async def scenario():
+            gate = asyncio.Event()
+            collection = FakeCollection(gate=gate)
+            writer = CoalescingWriter(collection, "test", key_field="mint", flush_interval=60, max_dirty=1)
+            await writer.start()
+            writer.update("mintA", {"progress": 1})
+            await asyncio.sleep(0.01)
+            assert collection.in_flight == 1
+            writer.update("mintB", {"progress": 2})
+
+            stopping = asyncio.create_task(writer.stop())
+            await asyncio.sleep(0.01)
+            assert not stopping.done()
+            gate.set()
+            await stopping
+            return collection, writer.stats()
+
+        collection, stats = asyncio.run(scenario())
+        assert collection.batches == [
+            [({"mint": "mintA"}, {"$set": {"progress": 1}})],
+            [({"mint": "mintB"}, {"$set": {"progress": 2}})]
+        ]
+        assert stats["written"] == 2
+        assert stats["dirty"] == 0
+
+    def test_cancelled_write_requeued(self):
+        async def scenario():
+            gate = asyncio.Event()
+            writer = CoalescingWriter(FakeCollection(gate=gate), "test", key_field="mint")
+            writer.update("mintA", {"progress": 1})
+            flushing = asyncio.create_task(writer.flush())
+            await asyncio.sleep(0.01)
+            flushing.cancel()
+            try:
+                await flushing
+            except asyncio.CancelledError:
+                pass
+            return writer
+
+        writer = asyncio.run(scenario())
+        assert writer.pending("mintA") == {"progress": 1}
+        assert writer.stats()["written"] == 0
@@ -0,0 +1,164 @@
+"""
+EVM Token USD Valuation Service
+===============================
+
+Backs the tiered-fee path with decimals-aware USD valuation for any token.
+
+Components:
+- Token metadata store (decimals, symbol): persisted in MongoDB
+  (`token_metadata`), filled once per token via a batched JSON-RPC eth_call
+- USD price table per chain: refreshed in the background with batched
+  CoinGecko token_price calls
+
+Quotes only ever read from memory (O(1)) and never wait on a price provider.
+A miss (unknown decimals or no fresh price) returns None - the caller applies
+the fallback fee - and the token is queued for an asynchronous fill. The
+tables, loops and read path are shared with solana_pricing (pricing_service).
+"""
+
+import os
+import time
+import logging
+from typing import Dict, List, Optional
+
+from http_pool import http_pool
+from pricing_service import PricingService
+from upstream_budget import PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+NATIVE_TOKEN_ADDRESS = "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"
+
+# Configuration (refresh interval, max age and LRU size: see pricing_service)
+TOKEN_PRICE_BATCH_SIZE = int(os.getenv('TOKEN_PRICE_BATCH_SIZE', '50'))  # addresses per upstream call
+
+# CoinGecko identifiers per chain
+COINGECKO_PLATFORMS = {
+    "ethereum": "ethereum",
+    "bsc": "binance-smart-chain",
+    "polygon": "polygon-pos"
+}
+COINGECKO_NATIVE_IDS = {
+    "ethereum": "ethereum",
+    "bsc": "binancecoin",
+    "polygon": "matic-network"
+}
+
+# Well-known tokens (no RPC round-trip needed)
+SEED_METADATA = {
+    "ethereum": {
+        NATIVE_TOKEN_ADDRESS: {"decimals": 18, "symbol": "ETH"},
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48": {"decimals": 6, "symbol": "USDC"},
+        "0xdac17f958d2ee523a2206206994597c13d831ec7": {"decimals": 6, "symbol": "USDT"},
+        "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2": {"decimals": 18, "symbol": "WETH"},
+    },
+    "bsc": {
+        NATIVE_TOKEN_ADDRESS: {"decimals": 18, "symbol": "BNB"},
+        "0x8ac76a51cc950d9822d68b83fe1ad97b32cd580d": {"decimals": 18, "symbol": "USDC"},
+        "0x55d398326f99059ff775485246999027b3197955": {"decimals": 18, "symbol": "USDT"},
+    },
+    "polygon": {
+        NATIVE_TOKEN_ADDRESS: {"decimals": 18, "symbol": "MATIC"},
+        "0x2791bca1f2de4661ed88a30c99a7a9449aa84174": {"decimals": 6, "symbol": "USDC.e"},
+        "0x3c499c542cef5e3811e1192ce70d8cc03d5c3359": {"decimals": 6, "symbol": "USDC"},
+    }
+}
+
+# ERC-20 selectors
+DECIMALS_SELECTOR = "0x313ce567"
+SYMBOL_SELECTOR = "0x95d89b41"
+
+
+def decode_abi_string(result: str) -> Optional[str]:
+    """Decode an eth_call result for symbol(): ABI string, or bytes32 for older tokens."""
+    if not result or result == "0x":
+        return None
+    data = bytes.fromhex(result[2:] if result.startswith("0x") else result)
+    try:
+        if len(data) >= 64:
+            offset = int.from_bytes(data[:32], "big")
+            length = int.from_bytes(data[offset:offset + 32], "big")
+            return data[offset + 32:offset + 32 + length].decode("utf-8", errors="ignore") or None
+        return data.rstrip(b"\x00").decode("utf-8", errors="ignore") or None
+    except (ValueError, IndexError):
+        return None
+
+
+class TokenPricingService(PricingService):
+    """In-memory USD valuation for EVM tokens with background fill and refresh."""
+
+    name = "Token pricing"
+
+    def __init__(self, metadata_collection, rpc_urls: Dict[str, Optional[str]]):
+        super().__init__(metadata_collection, COINGECKO_PLATFORMS, SEED_METADATA)
+        self.rpc_urls = rpc_urls
+
+    def _key(self, address: str) -> str:
+        return address.lower()
+
+    # ---------- Upstream fills ----------
+
+    async def _fill_metadata(self, chain: str, addresses: List[str]) -> None:
+        """Resolve decimals/symbol for unknown tokens in one batched JSON-RPC call and persist them."""
+        missing = [a for a in addresses if a not in self._metadata[chain]]
+        rpc_url = self.rpc_urls.get(chain)
+        if not missing or not rpc_url:
+            return
+
+        calls = []
+        for i, address in enumerate(missing):
+            for j, selector in enumerate((DECIMALS_SELECTOR, SYMBOL_SELECTOR)):
+                calls.append({
+                    "jsonrpc": "2.0",
+                    "id": i * 2 + j,
+                    "method": "eth_call",
+                    "params": [{"to": address, "data": selector}, "latest"]
+                })
+
+        async with http_pool.session("evm_rpc", timeout=10.0) as http_client:
+            response = await http_client.post(rpc_url, json=calls)
+            response.raise_for_status()
+            results = {item.get("id"): item.get("result") for item in response.json()}
+
+        for i, address in enumerate(missing):
+            decimals_hex = results.get(i * 2)
+            if not decimals_hex or decimals_hex == "0x":
+                continue  # not an ERC-20 (or call reverted) - retried on the next miss
+            await self._store_metadata(chain, address, {
+                "decimals": int(decimals_hex, 16),
+                "symbol": decode_abi_string(results.get(i * 2 + 1))
+            })
+
+    async def _refresh_prices(self, chain: str, addresses: List[str]) -> None:
+        """Refresh USD prices for a chain in batches of TOKEN_PRICE_BATCH_SIZE addresses."""
+        now = time.time()
+        prices = self._prices[chain]
+
+        async with http_pool.session("coingecko", timeout=10.0, priority=PRIORITY_BACKGROUND) as http_client:
+            if NATIVE_TOKEN_ADDRESS in addresses:
+                native_id = COINGECKO_NATIVE_IDS[chain]
+                response = await http_client.get(
+                    "https://api.coingecko.com/api/v3/simple/price",
+                    params={"ids": native_id, "vs_currencies": "usd"}
+                )
+                if response.status_code == 200:
+                    price = response.json().get(native_id, {}).get("usd")
+                    if price is not None:
+                        prices[NATIVE_TOKEN_ADDRESS] = (float(price), now)
+
+            contracts = [a for a in addresses if a != NATIVE_TOKEN_ADDRESS]
+            for start in range(0, len(contracts), TOKEN_PRICE_BATCH_SIZE):
+                batch = contracts[start:start + TOKEN_PRICE_BATCH_SIZE]
+                response = await http_client.get(
+                    f"https://api.coingecko.com/api/v3/simple/token_price/{COINGECKO_PLATFORMS[chain]}",
+                    params={"contract_addresses": ",".join(batch), "vs_currencies": "usd"}
+                )
+                if response.status_code != 200:
+                    logger.warning(f"CoinGecko token_price error on {chain}: {response.status_code}")
+                    self.refresh_errors += 1
+                    continue
+                for address, data in response.json().items():
+                    if data.get("usd") is not None:
+                        prices[address.lower()] = (float(data["usd"]), now)
+
+        self.refreshes += 1
@@ -0,0 +1,216 @@
+"""
+Bounded LRU/TTL Cache
+=====================
+
+One in-memory cache primitive for all module-level caches (quotes, discovery,
+crypto prices, NFT generation jobs).
+
+- Bounded by entry count and/or byte budget, O(1) LRU eviction
+- Per-entry TTL with lazy expiry on read (plus purge_expired() for sweeps)
+- Optional stale grace: expired entries are kept for `stale_ttl` seconds so
+  callers can serve the last known value while an upstream is unavailable
+- Hit / miss / eviction / expiration / size stats per namespace
+
+Every cache registers itself by namespace so /api/health can report them all
+via cache_stats().
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+# namespace -> cache (for stats)
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """LRU cache with per-entry TTL, bounded by entries and/or bytes."""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        stale_ttl: float = 0.0
+    ):
+        """
+        Args:
+            namespace: Name reported in stats
+            max_entries: Maximum number of entries (None = unbounded)
+            max_bytes: Byte budget, measured with `sizeof` (None = unbounded)
+            default_ttl: TTL in seconds when set() gets none (None = no expiry)
+            sizeof: Size of a value in bytes (required with max_bytes)
+            stale_ttl: Seconds an expired entry stays available to get_stale()
+        """
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("sizeof is required when max_bytes is set")
+
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self._sizeof = sizeof
+
+        # key -> (value, stored_at, expires_at, size)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, Optional[float], int]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+        _registry[namespace] = self
+
+    # ---------- Read ----------
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Look up a live entry.
+
+        Returns:
+            (value, age_seconds), or None if missing or expired
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, stored_at, expires_at, _ = entry
+        now = time.monotonic()
+        if expires_at is not None and now >= expires_at:
+            if now >= expires_at + self.stale_ttl:
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value, now - stored_at
+
+    def get_stale(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """
+        Look up an entry even if expired, as long as it is within the stale grace.
+
+        Returns:
+            (value, age_seconds), or None
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, stored_at, expires_at, _ = entry
+        now = time.monotonic()
+        if expires_at is not None and now >= expires_at + self.stale_ttl:
+            return None
+        self.stale_hits += 1
+        return value, now - stored_at
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        expires_at = entry[2]
+        return expires_at is None or time.monotonic() < expires_at
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # ---------- Write ----------
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, age: float = 0.0) -> None:
+        """
+        Store a value; ttl overrides default_ttl for this entry.
+        `age` back-dates an entry that was produced elsewhere (e.g. the shared
+        cache tier), so its age and expiry are measured from the original fetch.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        stored_at = time.monotonic() - age
+        size = self._sizeof(value) if self._sizeof else 0
+
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (value, stored_at, stored_at + ttl if ttl is not None else None, size)
+        self._bytes += size
+        self._evict()
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        return self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def purge_expired(self) -> int:
+        """Drop all entries past expiry (plus stale grace). Returns the number removed."""
+        now = time.monotonic()
+        expired = [
+            k for k, (_, _, expires_at, _) in self._data.items()
+            if expires_at is not None and now >= expires_at + self.stale_ttl
+        ]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    def _remove(self, key: Hashable) -> Any:
+        value, _, _, size = self._data.pop(key)
+        self._bytes -= size
+        return value
+
+    def _evict(self) -> None:
+        while self._data and (
+            (self.max_entries is not None and len(self._data) > self.max_entries) or
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, _, _, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    # ---------- Stats ----------
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "bytes": self._bytes if self._sizeof else None,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "stale_hits": self.stale_hits
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every registered cache, keyed by namespace."""
+    return {namespace: cache.stats() for namespace, cache in _registry.items()}
+
+
+def purge_all_expired() -> int:
+    """Sweep expired entries from every registered cache."""
+    return sum(cache.purge_expired() for cache in _registry.values())
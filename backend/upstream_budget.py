@@ -0,0 +1,201 @@
+"""
+Upstream Request Budgets
+========================
+
+Token-bucket budget per upstream API key (0x, CoinMarketCap credits,
+CoinGecko free tier, Dexscreener, Jupiter), so we use paid quotas at full
+throughput without tripping the provider's rate limiter and finding out from
+429s.
+
+- Token bucket: `rate` requests/second refill, `burst` capacity
+- Priority queue: when the bucket is empty, callers wait in priority order,
+  so firm quotes go ahead of indicative prices, discovery and background
+  refreshes
+- Headroom: low-priority work (discovery, background) only takes a token
+  while the bucket holds more than BUDGET_RESERVE_FRACTION of its burst
+- Shedding: discovery calls never queue - they raise BudgetExhausted (an
+  UpstreamUnavailable) and the endpoint serves its last cached value
+- A 429 from the provider empties the bucket and pauses it for Retry-After
+
+Budgets are applied by http_pool.UpstreamSession; limits come from UPSTREAMS
+"budget" and can be overridden via UPSTREAM_BUDGET_<UPSTREAM>_RATE / _BURST
+(rate 0 disables the budget).
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from resilience import UpstreamUnavailable
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower runs first)
+PRIORITY_QUOTE = 0       # firm quotes (/evm/quote, /solana/quote)
+PRIORITY_PRICE = 1       # indicative prices
+PRIORITY_NORMAL = 2      # everything else
+PRIORITY_DISCOVERY = 3   # trending, listings, token search - shed when tight
+PRIORITY_BACKGROUND = 4  # price/metadata refresh loops
+
+PRIORITY_NAMES = {
+    PRIORITY_QUOTE: "quote",
+    PRIORITY_PRICE: "price",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_DISCOVERY: "discovery",
+    PRIORITY_BACKGROUND: "background"
+}
+
+# Max seconds a caller waits in the queue for a token (0 = shed immediately)
+BUDGET_MAX_WAIT = {
+    PRIORITY_QUOTE: float(os.getenv('BUDGET_MAX_WAIT_QUOTE', '2.0')),
+    PRIORITY_PRICE: float(os.getenv('BUDGET_MAX_WAIT_PRICE', '1.0')),
+    PRIORITY_NORMAL: float(os.getenv('BUDGET_MAX_WAIT_NORMAL', '1.0')),
+    PRIORITY_DISCOVERY: 0.0,
+    PRIORITY_BACKGROUND: float(os.getenv('BUDGET_MAX_WAIT_BACKGROUND', '30.0'))
+}
+BUDGET_RESERVE_FRACTION = float(os.getenv('BUDGET_RESERVE_FRACTION', '0.2'))
+BUDGET_429_PAUSE = 1.0  # seconds, when the provider sends no Retry-After
+
+
+class BudgetExhausted(UpstreamUnavailable):
+    """Request shed or timed out waiting for the upstream's budget."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(upstream, "budget_exhausted", retry_after=retry_after)
+
+
+class UpstreamBudget:
+    """Token bucket with a priority wait queue for one upstream API key."""
+
+    def __init__(self, name: str, rate: float, burst: float, reserve_fraction: float = BUDGET_RESERVE_FRACTION):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.reserve = burst * reserve_fraction
+
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []  # (priority, seq, future)
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+        # Metrics
+        self.granted: Dict[str, int] = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.shed: Dict[str, int] = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.waited = 0
+        self.wait_time = 0.0
+        self.rate_limited = 0
+
+    def _refill(self, now: float) -> None:
+        if now > self._paused_until:
+            start = max(self._updated, self._paused_until)
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.rate)
+        self._updated = now
+
+    def _threshold(self, priority: int) -> float:
+        """Tokens needed before a caller of this priority may take one."""
+        return 1 + (self.reserve if priority >= PRIORITY_DISCOVERY else 0)
+
+    def _grant(self, priority: int) -> None:
+        self._tokens -= 1
+        self.granted[PRIORITY_NAMES[priority]] += 1
+
+    async def acquire(self, priority: int = PRIORITY_NORMAL) -> None:
+        """
+        Take one request token, waiting in priority order if needed.
+
+        Raises:
+            BudgetExhausted: shed (discovery) or no token within the priority's max wait
+        """
+        now = time.monotonic()
+        self._refill(now)
+        ahead_of_queue = not self._queue or priority < self._queue[0][0]
+        if ahead_of_queue and self._tokens >= self._threshold(priority):
+            self._grant(priority)
+            return
+
+        max_wait = BUDGET_MAX_WAIT.get(priority, 0.0)
+        if max_wait <= 0:
+            self.shed[PRIORITY_NAMES[priority]] += 1
+            raise BudgetExhausted(self.name, retry_after=self._time_to_token())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wake = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        else:
+            self._wake.set()  # re-evaluate the head of the queue
+
+        self.waited += 1
+        try:
+            await asyncio.wait_for(future, max_wait)
+        except asyncio.TimeoutError:
+            self.shed[PRIORITY_NAMES[priority]] += 1
+            raise BudgetExhausted(self.name, retry_after=self._time_to_token())
+        finally:
+            self.wait_time += time.monotonic() - now
+
+    async def _dispatch(self) -> None:
+        """Hand out tokens to queued callers, highest priority first, as the bucket refills."""
+        while self._queue:
+            priority, _, future = self._queue[0]
+            if future.done():  # caller timed out or was cancelled
+                heapq.heappop(self._queue)
+                continue
+            self._refill(time.monotonic())
+            needed = self._threshold(priority)
+            if self._tokens >= needed:
+                heapq.heappop(self._queue)
+                self._grant(priority)
+                future.set_result(None)
+                continue
+            delay = max(self._paused_until - time.monotonic(), 0) + (needed - self._tokens) / self.rate
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _time_to_token(self) -> float:
+        pause = max(self._paused_until - time.monotonic(), 0)
+        return pause + max(1 - self._tokens, 0) / self.rate
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """The provider answered 429: empty the bucket and pause it."""
+        self.rate_limited += 1
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0
+        self._paused_until = now + (retry_after if retry_after is not None else BUDGET_429_PAUSE)
+        logger.warning(f"{self.name} rate limited by provider - budget paused for {self._paused_until - now:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "tokens": round(max(self._tokens, 0), 2),
+            "queued": sum(1 for _, _, future in self._queue if not future.done()),
+            "granted": self.granted,
+            "shed": self.shed,
+            "waited": self.waited,
+            "avg_wait_ms": round(self.wait_time / self.waited * 1000, 1) if self.waited else None,
+            "rate_limited": self.rate_limited
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header in seconds (HTTP-date values are ignored)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
@@ -0,0 +1,372 @@
+"""
+Write-Behind Buffer for Fire-and-Forget Inserts
+===============================================
+
+Collects MongoDB documents in a bounded in-process queue and writes them with
+insert_many(ordered=False), so request handlers (quotes, swap/referral logs)
+return without waiting on a database round-trip.
+
+- Flush by size (batch_size) or time (flush_interval), whichever comes first
+- Bounded queue: when full, add() refuses the document and counts it as
+  dropped - callers decide whether to drop or write directly
+- Remaining documents are flushed on stop() (server shutdown)
+- stats(): queued, dropped, inserted, failed, flush latency
+
+CoalescingWriter is the update counterpart for hot documents: it keeps the
+latest $set fields per key and writes each dirty key once per flush with an
+unordered bulk_write, so write load follows the number of active keys
+rather than the number of updates. Updates that fail are retried on the next
+flush, except permanent write errors (duplicate key, validation); a key that
+keeps failing is dropped after COALESCE_MAX_ATTEMPTS flushes.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable per buffer)
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv('WRITE_BEHIND_MAX_QUEUE', '10000'))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '500'))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '1.0'))  # seconds
+COALESCE_MAX_DIRTY = int(os.getenv('COALESCE_MAX_DIRTY', '5000'))
+COALESCE_MAX_ATTEMPTS = int(os.getenv('COALESCE_MAX_ATTEMPTS', '5'))
+
+# Write errors that fail the same way on every retry
+PERMANENT_WRITE_ERRORS = {
+    11000,  # duplicate key
+    121     # document failed validation
+}
+
+
+class WriteBehindBuffer:
+    """Bounded write-behind queue for one MongoDB collection."""
+
+    def __init__(
+        self,
+        collection,
+        name: str,
+        max_queue: int = WRITE_BEHIND_MAX_QUEUE,
+        batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL
+    ):
+        self.collection = collection
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+        # Metrics
+        self.enqueued = 0
+        self.dropped = 0
+        self.inserted = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms: Optional[float] = None
+        self.max_flush_ms = 0.0
+
+    def add(self, doc: Dict[str, Any]) -> bool:
+        """
+        Queue a document for insertion.
+
+        Returns:
+            False if the queue is full (document not queued), True otherwise
+        """
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+
+        self._queue.append(doc)
+        self.enqueued += 1
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Write-behind buffer started: {self.name}")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write all queued documents in batches of batch_size.
+
+        Returns:
+            Number of documents inserted
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        inserted = 0
+        async with self._flush_lock:
+            while self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                inserted += await self._insert_batch(batch)
+        return inserted
+
+    async def _insert_batch(self, batch) -> int:
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            count = len(batch)
+        except asyncio.CancelledError:
+            # Cancelled mid-insert: requeue so a later flush still writes it
+            self._queue.extendleft(reversed(batch))
+            raise
+        except Exception as e:
+            # BulkWriteError still reports how many documents made it
+            details = getattr(e, "details", None) or {}
+            count = details.get("nInserted", 0)
+            self.failed += len(batch) - count
+            logger.error(f"Write-behind flush failed for {self.name} ({len(batch) - count} docs lost): {e}")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.flushes += 1
+        self.inserted += count
+        self.last_flush_ms = round(elapsed_ms, 2)
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        return count
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still queued."""
+        if self._task is not None:
+            # Let the loop finish its in-flight flush instead of cancelling it
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        logger.info(f"Write-behind buffer stopped: {self.name} (inserted={self.inserted}, dropped={self.dropped})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "enqueued": self.enqueued,
+            "inserted": self.inserted,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": round(self.max_flush_ms, 2)
+        }
+
+
+class CoalescingWriter:
+    """Write-behind $set updates for one collection, coalesced per document key."""
+
+    def __init__(
+        self,
+        collection,
+        name: str,
+        key_field: str,
+        flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+        max_dirty: int = COALESCE_MAX_DIRTY,
+        match: Optional[Dict[str, Any]] = None,
+        max_attempts: int = COALESCE_MAX_ATTEMPTS
+    ):
+        """
+        Args:
+            key_field: Field identifying the document (e.g. "mint")
+            flush_interval: Seconds between flushes
+            max_dirty: Dirty keys that trigger an early flush
+            max_attempts: Failed flushes after which a key's update is dropped
+            match: Extra filter on every update (e.g. skip documents a direct
+                write has moved on since the update was queued)
+        """
+        self.collection = collection
+        self.name = name
+        self.key_field = key_field
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.match = match or {}
+        self.max_attempts = max_attempts
+
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self._attempts: Dict[str, int] = {}  # failed flushes per dirty key
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+        # Metrics
+        self.updates = 0
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.discarded = 0
+        self.early_flushes = 0
+        self.flushes = 0
+        self.last_flush_ms: Optional[float] = None
+        self.max_flush_ms = 0.0
+
+    def update(self, key: str, fields: Dict[str, Any]) -> None:
+        """Queue a $set of `fields` on the document with this key (later values win)."""
+        pending = self._dirty.get(key)
+        if pending is None:
+            self._dirty[key] = dict(fields)
+            if len(self._dirty) >= self.max_dirty and self._wakeup is not None and not self._wakeup.is_set():
+                self.early_flushes += 1
+                self._wakeup.set()
+        else:
+            pending.update(fields)
+        self.updates += 1
+
+    def pending(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fields queued for `key` but not yet written (None if clean)."""
+        return self._dirty.get(key)
+
+    def discard(self, key: str) -> None:
+        """Drop a pending update (e.g. superseded by a direct write)."""
+        if self._dirty.pop(key, None) is not None:
+            self.discarded += 1
+        self._attempts.pop(key, None)
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Coalescing writer started: {self.name}")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        Write every dirty key with one unordered bulk_write.
+
+        Updates that were not applied go back into the dirty set (under any
+        newer fields queued meanwhile) and are retried on the next flush,
+        unless the error is permanent or the key ran out of attempts.
+
+        Returns:
+            Number of update operations applied
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, {}
+            ops = [
+                UpdateOne({self.key_field: key, **self.match}, {"$set": fields})
+                for key, fields in dirty.items()
+            ]
+            started = time.perf_counter()
+            keys = list(dirty)
+            failed: Dict[str, bool] = {}  # key -> retryable
+            try:
+                await self.collection.bulk_write(ops, ordered=False)
+            except asyncio.CancelledError:
+                self._requeue(dirty)
+                raise
+            except Exception as e:
+                # Unordered: everything but the reported errors was applied
+                details = getattr(e, "details", None) or {}
+                if details:
+                    for error in details.get("writeErrors", []):
+                        failed[keys[error["index"]]] = error.get("code") not in PERMANENT_WRITE_ERRORS
+                else:
+                    failed = dict.fromkeys(keys, True)
+                self.failed += len(failed)
+                retry = self._retry(failed)
+                self._requeue({key: dirty[key] for key in retry})
+                logger.error(f"Coalesced flush failed for {self.name} ({len(failed)} of {len(ops)} updates, {len(retry)} requeued): {e}")
+
+            for key in keys:
+                if key not in failed:
+                    self._attempts.pop(key, None)
+            applied = len(ops) - len(failed)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flushes += 1
+            self.written += applied
+            self.last_flush_ms = round(elapsed_ms, 2)
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            return applied
+
+    def _retry(self, failed: Dict[str, bool]) -> List[str]:
+        """Failed keys worth another attempt; the rest are dropped."""
+        retry = []
+        for key, retryable in failed.items():
+            attempts = self._attempts.get(key, 0) + 1
+            if retryable and attempts < self.max_attempts:
+                self._attempts[key] = attempts
+                retry.append(key)
+            else:
+                self._attempts.pop(key, None)
+                self.dropped += 1
+                logger.warning(f"Coalesced update for {self.name} key {key} dropped after {attempts} failed attempt(s)")
+        return retry
+
+    def _requeue(self, unwritten: Dict[str, Dict[str, Any]]) -> None:
+        for key, fields in unwritten.items():
+            pending = self._dirty.get(key)
+            if pending is None:
+                self._dirty[key] = fields
+            else:
+                # Fields updated since the flush started keep their newer value
+                for field, value in fields.items():
+                    pending.setdefault(field, value)
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write everything still dirty."""
+        if self._task is not None:
+            # Let the loop finish its in-flight flush instead of cancelling it
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        logger.info(f"Coalescing writer stopped: {self.name} (updates={self.updates}, written={self.written}, dirty={len(self._dirty)})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dirty": len(self._dirty),
+            "updates": self.updates,
+            "written": self.written,
+            "writes_saved": self.updates - self.written - self.dropped - len(self._dirty),
+            "coalescing_ratio": round(self.updates / self.written, 2) if self.written else None,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "discarded": self.discarded,
+            "early_flushes": self.early_flushes,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": round(self.max_flush_ms, 2)
+        }
@@ -239,6 +239,10 @@ const SwapFormV2 = ({ chainId, walletAddress }) => {
         });
       }
     } catch (err) {
+      // 409: superseded by a newer quote request, which will update the form
+      if (err.response?.status === 409) {
+        return;
+      }
       console.error('Error fetching quote:', err);
       const errorMsg = err.response?.data?.detail || err.message || 'Failed to fetch quote';
       setError(errorMsg);
@@ -269,6 +269,10 @@ const SwapFormV3 = ({ chainId = 1 }) => {
       setExchangeRate(rate);
 
     } catch (error) {
+      // 409: superseded by a newer quote request, which will update the form
+      if (error.response?.status === 409) {
+        return;
+      }
       console.error('Quote error:', error);
       
       // Fallback: Use simple price estimation if quote API fails
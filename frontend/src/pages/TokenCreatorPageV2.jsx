@@ -159,43 +159,58 @@ const TokenCreatorPageV2 = () => {
     }
   }, [selectedChain, featureBoost, cryptoPrices]);
   
-  // Poll pump.fun token status if launched
+  // Follow pump.fun token status if launched (pushed over Server-Sent Events)
   useEffect(() => {
     if (!mintAddress || launchFlow !== 'pump') return;
     
-    let pollCount = 0;
-    const MAX_POLLS_BEFORE_MANUAL = 9; // 90 seconds (9 x 10s)
+    const MANUAL_INPUT_AFTER_MS = 90000; // offer manual pair input after 90s without migration
+    const RECONNECT_MS = 10000;
+    const backendUrl = process.env.REACT_APP_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL;
+    let source = null;
+    let reconnectTimer = null;
+    let migrated = false;
     
-    const pollStatus = async () => {
-      try {
-        const backendUrl = process.env.REACT_APP_BACKEND_URL || import.meta.env.REACT_APP_BACKEND_URL;
-        const response = await fetch(`${backendUrl}/api/pump/status/${mintAddress}`);
-        const data = await response.json();
-        
-        if (data.found) {
-          setLaunchStage(data.stage);
-          if (data.pair_address) {
-            setPairAddress(data.pair_address);
-            setShowManualInput(false); // Hide manual input if auto-detected
-          }
+    const manualTimer = setTimeout(() => {
+      if (!migrated) {
+        setTimeoutReached(true);
+        console.warn('⏱️ Timeout reached - showing manual input option');
+      }
+    }, MANUAL_INPUT_AFTER_MS);
+    
+    const connect = () => {
+      source = new EventSource(`${backendUrl}/api/pump/stream/${mintAddress}`);
+      
+      source.addEventListener('status', (event) => {
+        const data = JSON.parse(event.data);
+        setLaunchStage(data.stage);
+        if (data.pair_address) {
+          setPairAddress(data.pair_address);
+          setShowManualInput(false); // Hide manual input if auto-detected
         }
-        
-        pollCount++;
-        if (pollCount >= MAX_POLLS_BEFORE_MANUAL && launchStage === 'bonding' && !pairAddress) {
-          setTimeoutReached(true);
-          console.warn('⏱️ Timeout reached - showing manual input option');
+        if (data.migrated || data.stage === 'migrated') {
+          migrated = true;
+          source.close();
         }
-      } catch (error) {
-        console.error('❌ Error polling pump status:', error);
-      }
+      });
+      
+      source.onerror = () => {
+        // The browser retries dropped streams itself; a refused one (e.g. 404
+        // before tracking starts) is closed and retried here
+        if (source.readyState === EventSource.CLOSED && !migrated) {
+          console.error('❌ Pump status stream closed - reconnecting');
+          reconnectTimer = setTimeout(connect, RECONNECT_MS);
+        }
+      };
     };
     
-    // Poll every 10 seconds
-    const interval = setInterval(pollStatus, 10000);
-    pollStatus(); // Initial call
+    connect();
     
-    return () => clearInterval(interval);
-  }, [mintAddress, launchFlow, launchStage, pairAddress]);
+    return () => {
+      clearTimeout(manualTimer);
+      clearTimeout(reconnectTimer);
+      if (source) source.close();
+    };
+  }, [mintAddress, launchFlow]);
   
   // Handle user manual action completion
   const handleUserActionComplete = async (stage) => {